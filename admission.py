@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Admission control and load shedding for the dashboard API
+Each client has a token bucket (heavy routes cost more tokens), and a global
+in-flight limit applies, of which heavy routes may only use heavy_limit, so
+cheap routes keep capacity under overload. Excess requests are rejected at
+once with Retry-After (429 over the client's rate, 503 over capacity),
+never queued.
+"""
+
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+
+CHEAP = 'cheap'
+HEAVY = 'heavy'
+
+# WSGI environ flag set by a front end that already admitted the request
+ADMITTED_KEY = 'dashboard.admitted'
+
+STATUS_TEXT = {429: '429 Too Many Requests', 503: '503 Service Unavailable'}
+
+
+class Ticket:
+    """One admitted request; released exactly once"""
+
+    __slots__ = ('route_class', 'released')
+
+    def __init__(self, route_class):
+        self.route_class = route_class
+        self.released = False
+
+
+class AdmissionController:
+    """Per-client token buckets plus a global in-flight limit with heavy-route headroom
+
+    client_rate (tokens/s) or max_concurrent set to 0/None disables that limit.
+    """
+
+    def __init__(self, max_concurrent=64, heavy_limit=16, client_rate=10, client_burst=30,
+                 costs=None, max_clients=10000, retry_after=1):
+        self.max_concurrent = max_concurrent
+        self.heavy_limit = heavy_limit
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.costs = costs or {CHEAP: 1, HEAVY: 5}
+        self.max_clients = max_clients
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+        self._in_flight = {CHEAP: 0, HEAVY: 0}
+        self._peak = 0
+        self._stats = {
+            route_class: {"admitted": 0, "rateLimited": 0, "shed": 0}
+            for route_class in (CHEAP, HEAVY)
+        }
+
+    def _take_tokens(self, client, cost, now):
+        """Spend cost tokens of client's bucket; return 0, or seconds until they are available"""
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = [self.client_burst, now]
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+            bucket[0] = min(self.client_burst, bucket[0] + (now - bucket[1]) * self.client_rate)
+            bucket[1] = now
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            return 0
+        return (cost - bucket[0]) / self.client_rate
+
+    def admit(self, client, route_class):
+        """Return (Ticket, None, None), or (None, HTTP status, retry-after seconds)"""
+        cost = self.costs[route_class]
+        stats = self._stats[route_class]
+        with self._lock:
+            if self.client_rate:
+                wait = self._take_tokens(client, cost, time.monotonic())
+                if wait:
+                    stats["rateLimited"] += 1
+                    return None, 429, wait
+            in_flight = self._in_flight[CHEAP] + self._in_flight[HEAVY]
+            if self.max_concurrent and (
+                    in_flight >= self.max_concurrent or
+                    (route_class == HEAVY and self._in_flight[HEAVY] >= self.heavy_limit)):
+                if self.client_rate:
+                    # Shedding is not the client's fault: give the tokens back
+                    bucket = self._buckets[client]
+                    bucket[0] = min(self.client_burst, bucket[0] + cost)
+                stats["shed"] += 1
+                return None, 503, self.retry_after
+            self._in_flight[route_class] += 1
+            self._peak = max(self._peak, in_flight + 1)
+            stats["admitted"] += 1
+        return Ticket(route_class), None, None
+
+    def release(self, ticket):
+        with self._lock:
+            if not ticket.released:
+                ticket.released = True
+                self._in_flight[ticket.route_class] -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "inFlight": dict(self._in_flight),
+                "peakInFlight": self._peak,
+                "maxConcurrent": self.max_concurrent,
+                "heavyLimit": self.heavy_limit,
+                "clientRate": self.client_rate,
+                "clientBurst": self.client_burst,
+                "clients": len(self._buckets),
+                "routes": {route_class: dict(counts) for route_class, counts in self._stats.items()}
+            }
+
+
+def forwarded_client(address, forwarded, trusted_proxies):
+    """Client address behind trusted proxies: the nearest X-Forwarded-For hop they did not add
+
+    Entries left of the first untrusted hop come from the client and may be forged.
+    """
+    if not forwarded or address not in trusted_proxies:
+        return address
+    for hop in reversed(forwarded.split(',')):
+        hop = hop.strip()
+        if hop and hop not in trusted_proxies:
+            return hop
+    return address
+
+
+def rejection_body(status, retry_after):
+    """JSON body and Retry-After value (whole seconds) of a rejected request"""
+    retry_after = max(1, math.ceil(retry_after))
+    error = "Too many requests from this client" if status == 429 else "Server overloaded"
+    return json.dumps({"error": error, "retryAfter": retry_after}).encode(), retry_after
+
+
+class AdmissionMiddleware:
+    """WSGI middleware admitting requests of classified paths through an AdmissionController
+
+    classify(path, query) returns CHEAP, HEAVY or None (not admission-controlled);
+    client_key(environ) identifies the client. The slot is held until the
+    response body has been sent.
+    """
+
+    def __init__(self, app, controller, classify, client_key):
+        self.app = app
+        self.controller = controller
+        self.classify = classify
+        self.client_key = client_key
+
+    def __call__(self, environ, start_response):
+        route_class = None
+        if not environ.get(ADMITTED_KEY):
+            route_class = self.classify(environ.get('PATH_INFO', ''), environ.get('QUERY_STRING', ''))
+        if route_class is None:
+            return self.app(environ, start_response)
+        ticket, status, retry_after = self.controller.admit(self.client_key(environ), route_class)
+        if ticket is None:
+            body, retry_after = rejection_body(status, retry_after)
+            start_response(STATUS_TEXT[status], [
+                ('Content-Type', 'application/json'),
+                ('Content-Length', str(len(body))),
+                ('Retry-After', str(retry_after)),
+            ])
+            return [body]
+        try:
+            result = self.app(environ, start_response)
+        except BaseException:
+            self.controller.release(ticket)
+            raise
+        return self._release_after(result, ticket)
+
+    def _release_after(self, result, ticket):
+        # Released once the body is sent, even if the server never calls close()
+        # (werkzeug skips it when the client resets the connection)
+        try:
+            yield from result
+        finally:
+            self.controller.release(ticket)
+            if hasattr(result, 'close'):
+                result.close()
@@ -0,0 +1,519 @@
+#!/usr/bin/env python3
+"""
+ASGI serving mode for the web dashboard
+Serves the routes of web_dashboard_server on asyncio, sharing its cache,
+datasets and collectors. RESTCONF reads go through a non-blocking keep-alive
+pool, and /api/stream clients are coroutines rather than threads. Routes
+without a coroutine handler run their Flask view on a thread pool, after the
+dataset they read has been fetched into the cache asynchronously.
+
+Usage: uvicorn asgi_dashboard:app --host 0.0.0.0 --port 3000
+       python asgi_dashboard.py [--host 0.0.0.0] [--port 3000] [--restconf URL]
+"""
+
+import argparse
+import asyncio
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+
+from werkzeug.http import parse_accept_header, parse_etags
+
+import web_dashboard_server as dashboard
+from admission import ADMITTED_KEY, AdmissionController, forwarded_client, rejection_body
+from async_restconf_pool import AsyncRestconfConnectionPool
+from metrics_exposition import RECORDED_KEY, method_label
+from response_encoding import dumps_bytes
+
+# Threads for Flask views, JSON decoding and compression of large bodies
+WSGI_THREADS = 32
+wsgi_executor = ThreadPoolExecutor(max_workers=WSGI_THREADS, thread_name_prefix='asgi-wsgi')
+
+restconf_pool = AsyncRestconfConnectionPool(
+    pool_size=dashboard.RESTCONF_POOL_SIZE,
+    max_per_host=dashboard.RESTCONF_MAX_PER_HOST,
+    timeout=dashboard.RESTCONF_TIMEOUT
+)
+
+# Coroutines are cheap, so this mode admits more requests in flight than Flask
+ADMISSION_MAX_CONCURRENT = 1024
+ADMISSION_HEAVY_LIMIT = 64
+admission = AdmissionController(
+    max_concurrent=ADMISSION_MAX_CONCURRENT,
+    heavy_limit=ADMISSION_HEAVY_LIMIT,
+    client_rate=dashboard.ADMISSION_CLIENT_RATE,
+    client_burst=dashboard.ADMISSION_CLIENT_BURST,
+    costs=dashboard.ADMISSION_COSTS,
+    max_clients=dashboard.ADMISSION_MAX_CLIENTS
+)
+
+# Flask-routed paths and the RESTCONF dataset their views read
+PREFETCH = (
+    ('/api/subscribers', 'subscribers'),
+    ('/api/sessions', 'sessions'),
+    ('/api/metrics/', 'network-functions'),
+)
+PREFETCH_SKIP = ('/api/metrics/history', '/api/metrics/aggregate')
+
+connections = {"requests": 0, "open": 0, "streams": 0, "wsgi": 0}
+background_tasks = {}
+
+
+async def run_blocking(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(wsgi_executor, fn, *args)
+
+
+def decode_and_version(endpoint, query, status, body):
+    return dashboard.record_version(endpoint, query, dashboard.decode_restconf_body(status, body))
+
+
+async def load_and_version(endpoint, query=''):
+    """Load data from RESTCONF without blocking and record dataset versions"""
+    url = f"{dashboard.RESTCONF_BASE}/{endpoint}"
+    if query:
+        url = f"{url}?{query}"
+    breaker = dashboard.restconf_breakers.get(endpoint)
+    breaker.allow()
+    started = time.monotonic()
+    try:
+        status, _, body = await restconf_pool.request('GET', url, {'Accept': 'application/json'},
+                                                      timeout=breaker.timeout())
+    except Exception as e:
+        dashboard.record_call(breaker, started, error=e)
+        raise
+    dashboard.record_call(breaker, started, status)
+    # Subscriber and session lists are large: decode and diff them off the loop
+    return await run_blocking(decode_and_version, endpoint, query, status, body)
+
+
+async def read_restconf_data(endpoint, params=None):
+    """Fetch data from RESTCONF API (cached, coalesced), raising on failure"""
+    key, query = dashboard.restconf_key(endpoint, params)
+    return await dashboard.restconf_cache.get_async(key, lambda: dashboard.restconf_flights.do_async(
+        key, lambda: load_and_version(endpoint, query)
+    ))
+
+
+async def fetch_restconf_data(endpoint, params=None, headers=None):
+    """Fetch data from RESTCONF API (cached, coalesced), or the last good data
+
+    Staleness marker headers are added to headers, if given.
+    """
+    key, _ = dashboard.restconf_key(endpoint, params)
+    failed = False
+    try:
+        data = await read_restconf_data(endpoint, params)
+    except Exception as e:
+        if not isinstance(e, dashboard.CircuitOpenError):
+            print(f"Error fetching {endpoint}: {e}")
+        failed = True
+        data = dashboard.last_good.get(key, ({}, None))[0]
+    if headers is not None:
+        headers.update(dashboard.stale_headers(dashboard.stale_age(endpoint, key, failed)))
+    return data
+
+
+def retrieve_exception(task):
+    if not task.cancelled():
+        task.exception()
+
+
+async def build_snapshot():
+    """Fetch all RESTCONF sections concurrently into one document"""
+    started = time.monotonic()
+    tasks = {
+        section: asyncio.ensure_future(read_restconf_data(section))
+        for section in dashboard.SNAPSHOT_TIMEOUTS
+    }
+    snapshot = {"timestamp": time.strftime('%Y-%m-%dT%H:%M:%S')}
+    errors = {}
+    for section, task in tasks.items():
+        task.add_done_callback(retrieve_exception)
+        remaining = dashboard.SNAPSHOT_TIMEOUTS[section] - (time.monotonic() - started)
+        try:
+            # A late section keeps loading into the cache for the next snapshot
+            snapshot[section] = await asyncio.wait_for(asyncio.shield(task), max(remaining, 0))
+        except asyncio.TimeoutError:
+            snapshot[section] = None
+            errors[section] = f"timed out after {dashboard.SNAPSHOT_TIMEOUTS[section]}s"
+        except Exception as e:
+            snapshot[section] = None
+            errors[section] = str(e)
+    return dashboard.finish_snapshot(snapshot, errors, started)
+
+
+def start_task(name, coroutine_function):
+    """Start a named background task on this loop unless it is already running"""
+    task = background_tasks.get(name)
+    if task is None or task.done():
+        background_tasks[name] = asyncio.ensure_future(coroutine_function())
+
+
+async def poll_snapshots():
+    """Publish a snapshot every STREAM_INTERVAL while clients are connected"""
+    broadcaster = dashboard.stream_broadcaster
+    while True:
+        if broadcaster.subscriber_count():
+            try:
+                snapshot = await build_snapshot()
+                await run_blocking(broadcaster.publish, 'snapshot', snapshot)
+            except Exception as e:
+                print(f"Error polling snapshot: {e}")
+        await asyncio.sleep(dashboard.STREAM_INTERVAL)
+
+
+def header(scope, name):
+    """Return a request header (lowercase bytes name) as text, or None"""
+    for key, value in scope['headers']:
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+def client_address(scope):
+    """Client address, from X-Forwarded-For behind a trusted proxy"""
+    address = scope['client'][0] if scope.get('client') else ''
+    return forwarded_client(address, header(scope, b'x-forwarded-for'), dashboard.TRUSTED_PROXIES)
+
+
+def query_args(scope):
+    return dict(parse_qsl(scope['query_string'].decode('latin-1')))
+
+
+async def respond(send, status, body, content_type='application/json', headers=None):
+    response_headers = [(b'content-type', content_type.encode()),
+                        (b'content-length', str(len(body)).encode())]
+    response_headers += [(name.lower().encode(), str(value).encode())
+                         for name, value in (headers or {}).items()]
+    await send({'type': 'http.response.start', 'status': status, 'headers': response_headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def json_response(send, data, status=200):
+    await respond(send, status, dumps_bytes(data))
+
+
+def encode_body(key, data, accept_encoding):
+    encoded = dashboard.body_encoder.encode(key, data)
+    encoding = encoded.negotiate(parse_accept_header(accept_encoding))
+    return encoded, encoding, encoded.variant(encoding)
+
+
+async def encoded_response(scope, send, key, data, headers=None):
+    """Serve a payload from its pre-encoded body, honouring ETag and Accept-Encoding"""
+    encoded, encoding, body = await run_blocking(
+        encode_body, key, data, header(scope, b'accept-encoding')
+    )
+    etag = encoded.variant_etag(encoding)
+    response_headers = {'ETag': f'"{etag}"', 'Vary': 'Accept-Encoding',
+                        'Cache-Control': 'no-cache'}
+    response_headers.update(headers or {})
+    if parse_etags(header(scope, b'if-none-match')).contains(etag):
+        await respond(send, 304, b'', headers=response_headers)
+        return
+    if encoding != 'identity':
+        response_headers['Content-Encoding'] = encoding
+    await respond(send, 200, body, headers=response_headers)
+
+
+async def get_network_functions(scope, receive, send):
+    headers = {}
+    data = await fetch_restconf_data('network-functions', headers=headers)
+    await encoded_response(scope, send, 'network-functions', data, headers)
+
+
+async def get_qos_profiles(scope, receive, send):
+    headers = {}
+    data = await fetch_restconf_data('qos-profiles', headers=headers)
+    await encoded_response(scope, send, 'qos-profiles', data, headers)
+
+
+def versioned_handler(endpoint):
+    async def handler(scope, receive, send):
+        headers = {}
+        data = await fetch_restconf_data(endpoint, headers=headers)
+        headers['X-Data-Version'] = dashboard.versioned_datasets[endpoint].version
+        await encoded_response(scope, send, endpoint, data, headers)
+    return handler
+
+
+async def get_metrics(scope, receive, send):
+    headers = {}
+    nf_data = await fetch_restconf_data('network-functions', headers=headers)
+    if headers.get('X-Data-Stale') == 'unavailable':
+        body, retry_after = dashboard.unavailable_body('network-functions')
+        await respond(send, 503, dumps_bytes(body), headers=dict(headers, **{'Retry-After': retry_after}))
+        return
+    try:
+        await respond(send, 200, dumps_bytes(dashboard.build_metrics(nf_data)), headers=headers)
+    except Exception as e:
+        await json_response(send, {"error": str(e)}, 500)
+
+
+async def get_snapshot(scope, receive, send):
+    snapshot = await build_snapshot()
+    await respond(send, 200, await run_blocking(dumps_bytes, snapshot))
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def get_stream(scope, receive, send):
+    """Stream dashboard snapshots as Server-Sent Events"""
+    last_event_id = header(scope, b'last-event-id') or query_args(scope).get('lastEventId')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    start_task('stream-poller', poll_snapshots)
+    broadcaster = dashboard.stream_broadcaster
+    subscriber = broadcaster.subscribe(last_event_id, loop=asyncio.get_running_loop())
+    disconnected = asyncio.ensure_future(wait_disconnect(receive))
+    connections["streams"] += 1
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ]})
+        message = "retry: 3000\n\n"
+        while True:
+            await send({'type': 'http.response.body', 'body': message.encode(), 'more_body': True})
+            get = asyncio.ensure_future(subscriber.queue.get())
+            done, _ = await asyncio.wait((get, disconnected), timeout=dashboard.STREAM_HEARTBEAT,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if get not in done:
+                get.cancel()
+            if disconnected in done:
+                break
+            message = get.result() if get in done else ": heartbeat\n\n"
+    finally:
+        connections["streams"] -= 1
+        disconnected.cancel()
+        broadcaster.unsubscribe(subscriber)
+
+
+async def get_stats(scope, receive, send):
+    stats = await run_blocking(dashboard.server_stats)
+    stats["admission"] = admission.stats()
+    stats["asgi"] = {
+        "connections": dict(connections),
+        "pool": restconf_pool.stats(),
+        "wsgiThreads": WSGI_THREADS,
+        "tasks": sorted(name for name, task in background_tasks.items() if not task.done())
+    }
+    await respond(send, 200, await run_blocking(dumps_bytes, stats))
+
+
+# GET routes served by coroutines; everything else goes to the Flask app
+ROUTES = {
+    '/api/network-functions': get_network_functions,
+    '/api/subscribers': versioned_handler('subscribers'),
+    '/api/sessions': versioned_handler('sessions'),
+    '/api/qos-profiles': get_qos_profiles,
+    '/api/metrics': get_metrics,
+    '/api/snapshot': get_snapshot,
+    '/api/stream': get_stream,
+    '/api/stats': get_stats,
+}
+# Routes that hand query strings (paging, fields, deltas) to the Flask view
+QUERY_ROUTES = ('/api/subscribers', '/api/sessions')
+
+
+def prefetch_endpoint(path):
+    if path.startswith(PREFETCH_SKIP):
+        return None
+    for prefix, endpoint in PREFETCH:
+        if path.startswith(prefix):
+            return endpoint
+    return None
+
+
+async def read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        if message['type'] != 'http.request':
+            return body
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+def wsgi_environ(scope, body):
+    """Build the WSGI environ of an ASGI HTTP request"""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin-1'),
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'], environ['REMOTE_PORT'] = scope['client'][0], str(scope['client'][1])
+    for name, value in scope['headers']:
+        name = name.decode('latin-1')
+        value = value.decode('latin-1')
+        if name == 'content-type':
+            environ['CONTENT_TYPE'] = value
+        elif name == 'content-length':
+            environ['CONTENT_LENGTH'] = value
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def start_wsgi(environ):
+    """Run the Flask app up to its first body chunk (all of it when the length is known)"""
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                              for name, value in headers]
+        return lambda data: None
+
+    result = dashboard.app(environ, start_response)
+    iterator = iter(result)
+    if any(name == b'content-length' for name, _ in started['headers']):
+        return started, result, iter(()), b''.join(iterator)
+    return started, result, iterator, next(iterator, b'')
+
+
+async def call_wsgi(scope, receive, send):
+    """Serve a request with the Flask app on the thread pool, streaming its body"""
+    environ = wsgi_environ(scope, await read_body(receive))
+    environ[ADMITTED_KEY] = True
+    environ[RECORDED_KEY] = True
+    connections["wsgi"] += 1
+    started, result, iterator, chunk = await run_blocking(start_wsgi, environ)
+    try:
+        await send({'type': 'http.response.start', 'status': started['status'],
+                    'headers': started['headers']})
+        while True:
+            following = await run_blocking(next, iterator, None)
+            await send({'type': 'http.response.body', 'body': chunk,
+                        'more_body': following is not None})
+            if following is None:
+                break
+            chunk = following
+    finally:
+        if hasattr(result, 'close'):
+            await run_blocking(result.close)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await run_blocking(dashboard.start_services)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            for task in background_tasks.values():
+                task.cancel()
+            restconf_pool.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI application: the dashboard's routes on one event loop"""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+    started = time.perf_counter()
+    status = ['500']
+
+    async def recording_send(message):
+        if message['type'] == 'http.response.start':
+            status[0] = str(message['status'])
+        await send(message)
+
+    dashboard.http_requests_in_flight.inc()
+    try:
+        await serve_http(scope, receive, recording_send)
+    finally:
+        dashboard.http_requests_in_flight.inc(amount=-1)
+        path, method = scope['path'], scope['method']
+        route = path if path in ROUTES else dashboard.route_template(path, method)
+        dashboard.http_request_duration.observe(time.perf_counter() - started,
+                                                (method_label(method), route, status[0]))
+
+
+async def serve_http(scope, receive, send):
+    """Admit and route one HTTP request"""
+    path = scope['path']
+    route_class = dashboard.admission_class(path, scope['query_string'].decode('latin-1'))
+    ticket = None
+    if route_class is not None:
+        ticket, status, retry_after = admission.admit(client_address(scope), route_class)
+        if ticket is None:
+            body, retry_after = rejection_body(status, retry_after)
+            await respond(send, status, body, headers={'Retry-After': retry_after})
+            return
+    connections["requests"] += 1
+    connections["open"] += 1
+    try:
+        handler = ROUTES.get(path) if scope['method'] == 'GET' else None
+        if handler is not None and not (path in QUERY_ROUTES and scope['query_string']):
+            await handler(scope, receive, send)
+            return
+        endpoint = prefetch_endpoint(path)
+        if endpoint is not None:
+            await fetch_restconf_data(endpoint)
+        await call_wsgi(scope, receive, send)
+    finally:
+        connections["open"] -= 1
+        if ticket is not None:
+            admission.release(ticket)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='5G Core Management dashboard (ASGI)')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=3000)
+    parser.add_argument('--restconf', default=dashboard.RESTCONF_BASE, help='RESTCONF data URL')
+    parser.add_argument('--max-concurrent', type=int, default=ADMISSION_MAX_CONCURRENT,
+                        help='in-flight /api/* requests (0 = unlimited)')
+    parser.add_argument('--client-rate', type=float, default=dashboard.ADMISSION_CLIENT_RATE,
+                        help='request tokens per second per client (0 = unlimited)')
+    parser.add_argument('--admin-token', default=dashboard.ADMIN_TOKEN,
+                        help='bearer token enabling /admin/profile (default $DASHBOARD_ADMIN_TOKEN)')
+    args = parser.parse_args()
+    dashboard.RESTCONF_BASE = args.restconf
+    dashboard.ADMIN_TOKEN = args.admin_token
+    admission.max_concurrent = args.max_concurrent
+    admission.client_rate = args.client_rate
+
+    try:
+        import uvicorn
+    except ImportError:
+        print("The ASGI mode needs an ASGI server: pip install uvicorn")
+        print("(or run asgi_dashboard:app under hypercorn, daphne, ...)")
+        sys.exit(1)
+
+    print("=" * 60)
+    print("5G Core Management - Web Dashboard Server (ASGI)")
+    print("=" * 60)
+    print(f"Dashboard: http://localhost:{args.port}")
+    print(f"RESTCONF API: {dashboard.RESTCONF_BASE}")
+    print("=" * 60)
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning', backlog=4096)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Non-blocking keep-alive HTTP connection pool for the RESTCONF API (asyncio)
+Coroutine counterpart of restconf_pool.RestconfConnectionPool for the ASGI
+dashboard: waiting on RESTCONF suspends the request instead of holding a thread.
+"""
+
+import asyncio
+import ssl
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+from restconf_pool import PoolTimeoutError
+
+# Errors that mean a pooled keep-alive connection was closed by the server
+STALE_CONNECTION_ERRORS = (
+    asyncio.IncompleteReadError,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+
+class HttpResponseError(Exception):
+    """Raised for responses that are not valid HTTP/1.x"""
+
+
+class AsyncRestconfConnectionPool:
+    """Pool of keep-alive asyncio stream connections keyed by host"""
+
+    def __init__(self, pool_size=10, max_per_host=4, timeout=2):
+        self.pool_size = pool_size
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self._idle = {}
+        self._slots = {}
+        self._idle_total = 0
+        self._in_use = 0
+        self._stats = {
+            "requests": 0,
+            "hits": 0,
+            "newConnections": 0,
+            "waits": 0,
+            "retries": 0,
+            "discarded": 0,
+            "errors": 0,
+            "timeouts": 0,
+        }
+
+    async def _connect(self, scheme, host, port):
+        """Open a new connection (counted as a miss)"""
+        self._stats["newConnections"] += 1
+        context = ssl.create_default_context() if scheme == "https" else None
+        return await asyncio.open_connection(host, port, ssl=context)
+
+    def _take_idle(self, key):
+        idle = self._idle.get(key)
+        while idle:
+            reader, writer = idle.pop()
+            self._idle_total -= 1
+            if not reader.at_eof() and not writer.is_closing():
+                self._stats["hits"] += 1
+                return reader, writer
+            writer.close()
+        return None
+
+    def _release(self, key, conn, reusable):
+        """Return a connection to the idle set, or close it"""
+        if reusable and self._idle_total < self.pool_size:
+            self._idle.setdefault(key, deque()).append(conn)
+            self._idle_total += 1
+            return
+        if reusable:
+            self._stats["discarded"] += 1
+        conn[1].close()
+
+    async def request(self, method, url, headers=None, timeout=None):
+        """Send a request and return (status, headers, body bytes)
+
+        timeout overrides the pool timeout for this request (slot wait included).
+        """
+        timeout = timeout or self.timeout
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        host = parts.hostname
+        port = parts.port or (443 if scheme == "https" else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        key = (scheme, host, port)
+
+        self._stats["requests"] += 1
+        slots = self._slots.get(key)
+        if slots is None:
+            slots = self._slots[key] = asyncio.Semaphore(self.max_per_host)
+        started = time.monotonic()
+        if slots.locked():
+            self._stats["waits"] += 1
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout)
+        except asyncio.TimeoutError:
+            self._stats["errors"] += 1
+            raise PoolTimeoutError(f"No free connection to {host}:{port}")
+        self._in_use += 1
+        try:
+            remaining = timeout - (time.monotonic() - started)
+            return await asyncio.wait_for(
+                self._request(key, method, host, path, headers), max(remaining, 0.001)
+            )
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            self._stats["errors"] += 1
+            raise TimeoutError(f"RESTCONF request to {host}:{port} timed out after {timeout}s")
+        except Exception:
+            self._stats["errors"] += 1
+            raise
+        finally:
+            self._in_use -= 1
+            slots.release()
+
+    async def _request(self, key, method, host, path, headers):
+        conn = self._take_idle(key)
+        reused = conn is not None
+        if conn is None:
+            conn = await self._connect(*key)
+        try:
+            try:
+                status, resp_headers, body = await self._send(conn, method, host, path, headers)
+            except STALE_CONNECTION_ERRORS:
+                if not reused:
+                    raise
+                # Server closed the idle keep-alive socket; retry once on a fresh one
+                conn[1].close()
+                self._stats["retries"] += 1
+                conn = await self._connect(*key)
+                status, resp_headers, body = await self._send(conn, method, host, path, headers)
+        except BaseException:
+            conn[1].close()
+            raise
+        keep_alive = resp_headers.get("connection", "").lower() != "close"
+        self._release(key, conn, keep_alive)
+        return status, resp_headers, body
+
+    async def _send(self, conn, method, host, path, headers):
+        """Issue one HTTP/1.1 request on a connection and read the full response"""
+        reader, writer = conn
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {host}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1'))
+        await writer.drain()
+
+        status_line = await reader.readuntil(b"\r\n")
+        try:
+            version, status, _ = status_line.decode('latin-1').split(' ', 2)
+            status = int(status)
+        except ValueError:
+            raise HttpResponseError(f"Bad status line: {status_line!r}")
+        resp_headers = {}
+        while True:
+            line = await reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            resp_headers[name.strip().lower()] = value.strip()
+        # HTTP/1.0 connections close after the response unless kept alive explicitly
+        if version == 'HTTP/1.0' and resp_headers.get("connection", "").lower() != "keep-alive":
+            resp_headers["connection"] = "close"
+
+        if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            body = b''
+        elif resp_headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readuntil(b"\r\n")).split(b';', 1)[0], 16)
+                if size == 0:
+                    while await reader.readuntil(b"\r\n") != b"\r\n":
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b''.join(chunks)
+        elif "content-length" in resp_headers:
+            body = await reader.readexactly(int(resp_headers["content-length"]))
+        else:
+            body = await reader.read()
+            resp_headers["connection"] = "close"
+        return status, resp_headers, body
+
+    def stats(self):
+        """Return pool counters and current occupancy"""
+        return dict(self._stats, idle=self._idle_total, inUse=self._in_use,
+                    poolSize=self.pool_size, maxPerHost=self.max_per_host)
+
+    def close(self):
+        """Close all idle connections"""
+        for conns in self._idle.values():
+            for _, writer in conns:
+                writer.close()
+        self._idle.clear()
+        self._idle_total = 0
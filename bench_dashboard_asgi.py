@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for the dashboard: Flask server vs ASGI mode
+Usage: python bench_dashboard_asgi.py [--streams 1000] [--requests 5000] [--concurrency 200]
+
+Starts each serving mode on a free port over a local RESTCONF stub, holds
+--streams open /api/stream connections, then sends --requests GETs of
+/api/network-functions from --concurrency keep-alive clients. Reports
+requests/sec, latency percentiles, and the server's threads and RSS.
+Admission control is switched off: this measures what each mode can serve.
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from bench_snmp_agent import serve_restconf
+
+REQUEST_TIMEOUT = 10
+
+SERVERS = {
+    'flask': ("import web_dashboard_server as w; w.RESTCONF_BASE = {restconf!r}; "
+              "w.admission.max_concurrent = w.admission.client_rate = 0; "
+              "w.app.run(host='127.0.0.1', port={port}, threaded=True)"),
+    'asgi': ("import uvicorn, asgi_dashboard as a; a.dashboard.RESTCONF_BASE = {restconf!r}; "
+             "a.admission.max_concurrent = a.admission.client_rate = 0; "
+             "uvicorn.run(a.app, host='127.0.0.1', port={port}, log_level='warning', "
+             "lifespan='off', backlog=4096)"),
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def process_status(pid):
+    """Return (threads, RSS MB) of a process from /proc"""
+    fields = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            fields[name] = value.split()
+    return int(fields['Threads'][0]), int(fields['VmRSS'][0]) / 1024
+
+
+async def open_stream(port):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(b"GET /api/stream HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n")
+    await reader.readuntil(b"\r\n\r\n")
+    return writer
+
+
+async def get(reader, writer, path):
+    """GET path on a connection; returns (status ok, server closes the connection)"""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = 0
+    close = False
+    for line in head.lower().split(b"\r\n"):
+        if line.startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+        elif line.startswith(b"connection:"):
+            close = b"close" in line
+    await reader.readexactly(length)
+    return head.split(b" ", 2)[1] == b"200", close
+
+
+async def client(port, count, latencies, failures):
+    """Send count requests one after another, reconnecting when the server closes"""
+    connection = None
+    for _ in range(count):
+        started = time.perf_counter()
+        try:
+            if connection is None:
+                connection = await asyncio.open_connection('127.0.0.1', port)
+            ok, close = await asyncio.wait_for(get(*connection, '/api/network-functions'),
+                                               REQUEST_TIMEOUT)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            failures.append(1)
+            ok, close = False, True
+        else:
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                failures.append(1)
+        if close and connection is not None:
+            connection[1].close()
+            connection = None
+    if connection is not None:
+        connection[1].close()
+
+
+async def load(port, streams, requests, concurrency):
+    writers = []
+    opened = time.perf_counter()
+    for batch in range(0, streams, 100):
+        results = await asyncio.gather(*(open_stream(port) for _ in range(min(100, streams - batch))),
+                                       return_exceptions=True)
+        writers += [w for w in results if not isinstance(w, BaseException)]
+    open_seconds = time.perf_counter() - opened
+    latencies = []
+    failures = []
+    started = time.perf_counter()
+    await asyncio.gather(*(client(port, requests // concurrency, latencies, failures)
+                           for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    for writer in writers:
+        writer.close()
+    return len(writers), open_seconds, latencies, failures, elapsed
+
+
+def wait_ready(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1) as s:
+                s.sendall(b"GET /api/network-functions HTTP/1.1\r\nHost: localhost\r\n\r\n")
+                if s.recv(12).startswith(b"HTTP/1.1 200"):
+                    return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def bench(mode, restconf, streams, requests, concurrency):
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, '-c', SERVERS[mode].format(restconf=restconf, port=port)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not wait_ready(port):
+            print(f"{mode}: server did not start")
+            return
+        streams_open, open_seconds, latencies, failures, elapsed = asyncio.run(
+            load(port, streams, requests, concurrency)
+        )
+        latencies.sort()
+        threads, rss = process_status(server.pid)
+        p = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000 if latencies else 0
+        print(f"{mode:5s}: {streams_open:5d} streams open ({open_seconds:5.1f}s)  "
+              f"{len(latencies) / elapsed:7.0f} req/s  p50 {p(0.5):7.1f} ms  p99 {p(0.99):7.1f} ms  "
+              f"failed {len(failures):5d}  server threads {threads:5d}  RSS {rss:6.1f} MB")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Dashboard concurrency benchmark')
+    parser.add_argument('--modes', nargs='+', default=list(SERVERS), choices=list(SERVERS))
+    parser.add_argument('--streams', type=int, default=1000, help='open /api/stream connections')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--subscribers', type=int, default=1000)
+    args = parser.parse_args()
+
+    print("Dashboard concurrency benchmark")
+    print("=" * 50)
+    print(f"{args.streams} SSE clients held open, {args.requests} GET /api/network-functions "
+          f"from {args.concurrency} clients, {os.cpu_count()} CPUs")
+    restconf = serve_restconf(args.subscribers)
+    for mode in args.modes:
+        bench(mode, restconf, args.streams, args.requests, args.concurrency)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the multi-process dashboard (--workers)
+Usage: python bench_dashboard_workers.py [--workers 0 1 2 4] [--requests 6000] [--concurrency 64]
+
+Starts web_dashboard_server.py over a local RESTCONF stub for each worker
+count (0 = the single-process server), waits for the first published
+snapshot, then sends --requests GETs spread over the /api/* read routes from
+--concurrency clients. Reports requests/sec, MB/s, latency percentiles and
+how many RESTCONF requests the whole server made while under load.
+Admission control is switched off: this measures what each setup can serve.
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+from bench_dashboard_asgi import free_port, get, wait_ready
+from bench_snmp_agent import serve_restconf
+
+REQUEST_TIMEOUT = 10
+ROUTES = (
+    '/api/network-functions',
+    '/api/subscribers',
+    '/api/sessions',
+    '/api/metrics',
+    '/api/snapshot',
+)
+
+
+async def client(port, index, count, latencies, failures):
+    """Send count requests, cycling through ROUTES, one connection per response"""
+    for i in range(count):
+        path = ROUTES[(index + i) % len(ROUTES)]
+        started = time.perf_counter()
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            try:
+                ok, _ = await asyncio.wait_for(get(reader, writer, path), REQUEST_TIMEOUT)
+            finally:
+                writer.close()
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            failures.append(1)
+            continue
+        latencies.append(time.perf_counter() - started)
+        if not ok:
+            failures.append(1)
+
+
+async def load(port, requests, concurrency):
+    latencies = []
+    failures = []
+    started = time.perf_counter()
+    await asyncio.gather(*(client(port, i, requests // concurrency, latencies, failures)
+                           for i in range(concurrency)))
+    return latencies, failures, time.perf_counter() - started
+
+
+def route_bytes(port):
+    """Average identity body size of ROUTES, for MB/s"""
+    async def sizes():
+        total = 0
+        for path in ROUTES:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+            head = await reader.readuntil(b"\r\n\r\n")
+            for line in head.lower().split(b"\r\n"):
+                if line.startswith(b"content-length:"):
+                    total += int(line.split(b":", 1)[1])
+            writer.close()
+        return total / len(ROUTES)
+    return asyncio.run(sizes())
+
+
+def bench(workers, restconf, counts, requests, concurrency, warmup):
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, 'web_dashboard_server.py', '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--restconf', restconf,
+         '--max-concurrent', '0', '--client-rate', '0'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    label = f"{workers} workers" if workers else "single process"
+    try:
+        if not wait_ready(port):
+            print(f"{label}: server did not start")
+            return
+        # Let the collector publish every section (and the caches fill) first
+        time.sleep(warmup)
+        average_size = route_bytes(port)
+        upstream_before = sum(counts.values())
+        latencies, failures, elapsed = asyncio.run(load(port, requests, concurrency))
+        upstream = sum(counts.values()) - upstream_before
+        latencies.sort()
+        p = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000 if latencies else 0
+        rate = len(latencies) / elapsed
+        print(f"{label:>14s}: {rate:7.0f} req/s  {rate * average_size / 1e6:7.1f} MB/s  "
+              f"p50 {p(0.5):7.1f} ms  p99 {p(0.99):7.1f} ms  failed {len(failures):5d}  "
+              f"RESTCONF requests {upstream:4d} in {elapsed:5.1f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Multi-process dashboard throughput benchmark')
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4],
+                        help='worker counts to run (0 = single-process server)')
+    parser.add_argument('--requests', type=int, default=6000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--subscribers', type=int, default=10000)
+    parser.add_argument('--warmup', type=float, default=3)
+    args = parser.parse_args()
+
+    print("Multi-process dashboard benchmark")
+    print("=" * 50)
+    print(f"{args.requests} GETs over {len(ROUTES)} routes from {args.concurrency} clients, "
+          f"{args.subscribers} subscribers, {os.cpu_count()} CPUs")
+    counts = {}
+    restconf = serve_restconf(args.subscribers, counts)
+    for workers in args.workers:
+        bench(workers, restconf, counts, args.requests, args.concurrency, args.warmup)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark for vectorized metric aggregations
+Usage: python bench_metrics_aggregate.py [series] [samples]
+       (default: 1000 series x 60480 samples = 1 week at 10s)
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from metrics_aggregate import SampleWindows, percentiles, rates, top_n
+
+STEP = 10
+RUNS = 5
+
+
+def timed(label, fn):
+    best = None
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<32} {best * 1000:9.1f} ms")
+
+
+def main():
+    series = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    samples = int(sys.argv[2]) if len(sys.argv) > 2 else 7 * 86400 // STEP
+    print(f"Metric aggregation benchmark: {series} series x {samples} samples ({STEP}s step)")
+    print("=" * 60)
+
+    rng = np.random.default_rng(42)
+    names = [f"upf/upf-{i}/cpuUtilization" for i in range(series)]
+    now = time.time()
+    times = now - STEP * np.arange(samples)[::-1]
+    values = (rng.random((series, samples), dtype='float32') * 100).astype('float32')
+    # 0.1% missing samples so the NaN-aware paths are exercised
+    values[rng.random((series, samples)) < 0.001] = np.nan
+
+    windows = SampleWindows(samples)
+    start = time.perf_counter()
+    windows.load(names, times, values)
+    print(f"{'load':<32} {(time.perf_counter() - start) * 1000:9.1f} ms")
+    print(f"{'memory':<32} {windows.stats()['bytes'] / 2 ** 20:9.1f} MB")
+    del values
+
+    for label, seconds in (("1h", 3600), ("1d", 86400), ("1w", 7 * 86400)):
+        def query_percentiles():
+            _, _, block = windows.window(None, seconds)
+            percentiles(block)
+
+        def query_rate():
+            _, t, block = windows.window(None, seconds)
+            rates(t, block)
+
+        def query_top():
+            n, t, block = windows.window(None, seconds)
+            top_n(n, t, block, 10)
+
+        timed(f"p50/p95/p99 over {label}", query_percentiles)
+        timed(f"rate over {label}", query_rate)
+        timed(f"top-10 by avg over {label}", query_top)
+
+    start = time.perf_counter()
+    sample = {name: 1.0 for name in names}
+    for _ in range(100):
+        windows.append(time.time(), sample)
+    print(f"{'append 1 column':<32} {(time.perf_counter() - start) * 10:9.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the subscriber prefix search index
+Usage: python bench_search_index.py [sizes...]   (default: 1000000 10000000)
+
+Builds the IMSI index (the largest field; term and record ID share one
+string as they do in the dashboard) and reports build time, prefix query
+latency and incremental update latency at each size.
+"""
+
+import random
+import resource
+import sys
+import time
+
+from search_index import SortedTermIndex
+
+QUERIES = 2000
+UPDATES = 10000
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def bench(size):
+    print(f"\n--- {size:,} subscribers ---")
+    start = time.perf_counter()
+    imsis = [f"00101{i:010d}" for i in range(0, size * 3, 3)]
+    print(f"generate:      {time.perf_counter() - start:8.2f} s")
+
+    index = SortedTermIndex()
+    start = time.perf_counter()
+    index.bulk_load((imsi, imsi) for imsi in imsis)
+    print(f"bulk load:     {time.perf_counter() - start:8.2f} s")
+
+    rng = random.Random(42)
+    latencies = []
+    found = 0
+    for _ in range(QUERIES):
+        imsi = imsis[rng.randrange(size)]
+        prefix = imsi[:rng.randint(8, 14)]
+        start = time.perf_counter()
+        found += len(index.prefix(prefix, 20))
+        latencies.append((time.perf_counter() - start) * 1e6)
+    print(f"prefix top-20: p50 {percentile(latencies, 50):7.1f} us  "
+          f"p99 {percentile(latencies, 99):7.1f} us  ({found / QUERIES:.1f} hits/query)")
+
+    after = None
+    start = time.perf_counter()
+    for _ in range(50):
+        page = index.prefix('0010100', 20, after)
+        after = page[-1]
+    print(f"paginate:      {(time.perf_counter() - start) * 1e6 / 50:7.1f} us/page")
+
+    latencies = []
+    for i in range(UPDATES):
+        new_imsi = f"00101{rng.randrange(size * 3) | 1:010d}"
+        old_imsi = imsis[rng.randrange(size)]
+        start = time.perf_counter()
+        index.add(new_imsi, new_imsi)
+        index.remove(old_imsi, old_imsi)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    print(f"add+remove:    p50 {percentile(latencies, 50):7.1f} us  "
+          f"p99 {percentile(latencies, 99):7.1f} us")
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"max RSS:       {max_rss:8.0f} MB")
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000000, 10000000]
+    print("Subscriber prefix index benchmark")
+    print("=" * 50)
+    for size in sizes:
+        bench(size)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Load generator for the SNMP agent: 1 worker vs N workers
+Usage: python bench_snmp_agent.py [--workers 1 4] [--rate 4000] [--duration 5]
+
+Serves a synthetic core over a local RESTCONF stub, starts the agent with
+each worker count on a free port, and fires GETBULK requests open-loop from
+several client processes at the target rate. Reports answered requests/sec
+and the share of requests that never got a response (drop rate).
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from pyasn1.codec.ber import encoder
+from pysnmp.proto import api
+
+from bench_snmp_walk import synthetic_core
+from snmp_mib import SCALARS_OID, SUBSCRIBER_ENTRY_OID
+
+AGENT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'simple_snmp_agent.py')
+MAX_REPETITIONS = 10
+GRACE_SECONDS = 1.0
+
+
+def serve_restconf(subscribers, counts=None):
+    """Serve the synthetic core as RESTCONF JSON on a free local port
+
+    counts, if given, is a dict incremented per requested endpoint.
+    """
+    nf_data, subs, sessions = synthetic_core(subscribers)
+    bodies = {
+        'network-functions': json.dumps(nf_data).encode(),
+        'subscribers': json.dumps({"subscribers": subs}).encode(),
+        'sessions': json.dumps({"sessions": sessions}).encode(),
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            endpoint = self.path.rsplit('/', 1)[-1]
+            body = bodies.get(endpoint)
+            if counts is not None:
+                counts[endpoint] = counts.get(endpoint, 0) + 1
+            self.send_response(200 if body else 404)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body or b'')))
+            self.end_headers()
+            self.wfile.write(body or b'')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/restconf/data"
+
+
+def encode_request(oid, bulk=True):
+    """Encode one SNMPv2c GETBULK (or GET) message for community public"""
+    p = api.protoModules[api.protoVersion2c]
+    pdu = p.GetBulkRequestPDU() if bulk else p.GetRequestPDU()
+    p.apiPDU.setDefaults(pdu)
+    if bulk:
+        p.apiBulkPDU.setNonRepeaters(pdu, 0)
+        p.apiBulkPDU.setMaxRepetitions(pdu, MAX_REPETITIONS)
+    p.apiPDU.setVarBinds(pdu, [(oid, p.Null(''))])
+    message = p.Message()
+    p.apiMessage.setDefaults(message)
+    p.apiMessage.setCommunity(message, 'public')
+    p.apiMessage.setPDU(message, pdu)
+    return encoder.encode(message)
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(port, timeout=30):
+    """Poll the agent with GETs until it answers with data"""
+    message = encode_request(SCALARS_OID + (2, 0), bulk=False)
+    deadline = time.monotonic() + timeout
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.settimeout(0.5)
+        while time.monotonic() < deadline:
+            s.sendto(message, ('127.0.0.1', port))
+            try:
+                s.recv(65535)
+                return True
+            except socket.timeout:
+                continue
+    return False
+
+
+def client(port, rate, duration, messages, results):
+    """Send messages open-loop at rate/s for duration; count responses"""
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+    s.setblocking(False)
+    target = ('127.0.0.1', port)
+    sent = received = 0
+    start = time.perf_counter()
+    end = start + duration
+    interval = 1.0 / rate
+    while True:
+        now = time.perf_counter()
+        if now >= end:
+            break
+        while sent < (now - start) / interval:
+            try:
+                s.sendto(messages[sent % len(messages)], target)
+            except BlockingIOError:
+                pass
+            sent += 1
+        try:
+            while True:
+                s.recv(65535)
+                received += 1
+        except BlockingIOError:
+            pass
+        time.sleep(min(interval, 0.001))
+    # Responses later than the grace period count as dropped (the poller timed out)
+    deadline = time.perf_counter() + GRACE_SECONDS
+    while received < sent:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            break
+        s.settimeout(remaining)
+        try:
+            s.recv(65535)
+            received += 1
+        except socket.timeout:
+            break
+    results.put((sent, received))
+
+
+def bench(workers, restconf, rate, duration, clients, subscribers):
+    port = free_port()
+    agent = subprocess.Popen(
+        [sys.executable, AGENT, '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--restconf', restconf],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not wait_ready(port):
+            print(f"{workers} worker(s): agent did not answer")
+            return
+        rng = random.Random(42)
+        messages = [encode_request(SUBSCRIBER_ENTRY_OID + (rng.randint(1, 7), rng.randint(1, subscribers)))
+                    for _ in range(200)]
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=client,
+                                         args=(port, rate / clients, duration, messages, results))
+                 for _ in range(clients)]
+        for proc in procs:
+            proc.start()
+        totals = [results.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+        sent = sum(t[0] for t in totals)
+        received = sum(t[1] for t in totals)
+        drop = 100.0 * (sent - received) / sent if sent else 0.0
+        print(f"{workers:2d} worker(s): sent {sent:7d}  answered {received / (duration + GRACE_SECONDS):8.0f} req/s  "
+              f"drop {drop:5.1f} %")
+    finally:
+        agent.terminate()
+        agent.wait()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='SNMP agent load generator')
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=[1, max(2, os.cpu_count() or 1)])
+    parser.add_argument('--rate', type=float, default=4000, help='total requests/sec offered')
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--subscribers', type=int, default=10000)
+    args = parser.parse_args()
+
+    print("SNMP agent load benchmark")
+    print("=" * 50)
+    print(f"{args.rate:.0f} GETBULK/s offered (max-repetitions {MAX_REPETITIONS}), "
+          f"{args.clients} clients, {os.cpu_count()} CPUs")
+    restconf = serve_restconf(args.subscribers)
+    for workers in args.workers:
+        bench(workers, restconf, args.rate, args.duration, args.clients, args.subscribers)
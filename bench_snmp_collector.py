@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the concurrent SNMP collector against local agents
+Usage: python bench_snmp_collector.py [--agents 4] [--rounds 3] [--subscribers 2000]
+
+Starts several simple_snmp_agent.py instances on free ports over a local
+RESTCONF stub, then polls all of them per round with one SnmpCollector.
+Reports the round time, samples/sec and per-target latency and timeouts.
+"""
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+
+from bench_snmp_agent import AGENT, free_port, serve_restconf, wait_ready
+from snmp_collector import SnmpCollector, SnmpTarget
+from snmp_mib import NF_ENTRY_OID, SUBSCRIBER_ENTRY_OID
+
+
+def start_agents(count, restconf):
+    agents = []
+    for _ in range(count):
+        port = free_port()
+        process = subprocess.Popen(
+            [sys.executable, AGENT, '--host', '127.0.0.1', '--port', str(port),
+             '--transport', 'asyncio', '--restconf', restconf],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        agents.append((port, process))
+    return agents
+
+
+async def bench(collector, rounds):
+    for round_number in range(1, rounds + 1):
+        before = collector.stats()["samples"]
+        await collector.poll()
+        stats = collector.stats()
+        samples = stats["samples"] - before
+        print(f"round {round_number}: {stats['lastRoundMs']:8.1f} ms  {samples:7d} samples  "
+              f"{samples / (stats['lastRoundMs'] / 1000):9.0f} samples/s")
+    collector.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='SNMP collector benchmark')
+    parser.add_argument('--agents', type=int, default=4)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--subscribers', type=int, default=2000)
+    parser.add_argument('--rate', type=float, default=200, help='requests/sec per target')
+    parser.add_argument('--subscriber-table', action='store_true',
+                        help='also walk the subscriber table')
+    args = parser.parse_args()
+
+    print("SNMP collector benchmark")
+    print("=" * 50)
+    restconf = serve_restconf(args.subscribers)
+    agents = start_agents(args.agents, restconf)
+    try:
+        ready = [port for port, _ in agents if wait_ready(port)]
+        print(f"{len(ready)}/{len(agents)} agents ready, {args.subscribers} subscribers each")
+        subtrees = [NF_ENTRY_OID] + ([SUBSCRIBER_ENTRY_OID] if args.subscriber_table else [])
+        targets = [SnmpTarget('127.0.0.1', port, rate=args.rate) for port in ready]
+        collector = SnmpCollector(targets, subtrees)
+        started = time.perf_counter()
+        asyncio.run(bench(collector, args.rounds))
+        print(f"total {time.perf_counter() - started:.2f}s")
+        for name, stats in collector.stats()["targets"].items():
+            latency = stats["latency"]
+            print(f"{name}: requests {stats['requests']:5d}  timeouts {stats['timeouts']:3d}  "
+                  f"avg {latency.get('avgMs', 0):6.2f} ms  p95 {latency.get('p95Ms', 0):6.2f} ms  "
+                  f"maxRepetitions {stats['maxRepetitions']}")
+    finally:
+        for _, process in agents:
+            process.terminate()
+        for _, process in agents:
+            process.wait()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Replay benchmark for the SNMP trap receiver
+Usage: python bench_snmp_traps.py [--rate 10000] [--duration 5] [--storm-rate 50000]
+
+Times the fast-path decoder against pyasn1, then replays a mix of NF alarm
+traps and informs open-loop at the target rate into a TrapReceiver feeding
+an EventStore. Reports stored events/sec, drops and queue high-water mark,
+then repeats as a storm against a small queue: excess traps are dropped
+(from the queue, or by the kernel when the receive thread is saturated)
+instead of growing memory.
+"""
+
+import argparse
+import multiprocessing
+import random
+import socket
+import time
+import timeit
+
+from pyasn1.codec.ber import decoder, encoder
+from pysnmp.proto import api, rfc1902
+
+from event_store import EventStore
+from snmp_mib import ALARM_OBJECTS_OID, NOTIFICATIONS_OID, SNMP_TRAP_OID, SYS_UPTIME_OID
+from snmp_traps import TrapReceiver, decode_notification
+
+P = api.protoModules[api.protoVersion2c]
+ALARMS = (
+    (1, 'AMF', 'amf-{}', 'critical', 'AMF overload: CPU above 90%'),
+    (2, 'UPF', 'upf-{}', 'major', 'UPF N3 link down'),
+    (3, 'UPF', 'upf-{}', 'cleared', 'UPF N3 link up'),
+    (4, 'SMF', 'smf-{}', 'warning', 'SMF status changed to DEGRADED'),
+)
+
+
+def encode_alarm(request_id, notification, nf_type, instance, severity, alarm_text, inform=False):
+    """Encode one SNMPv2c trap (or inform) carrying the 5G MIB alarm objects"""
+    pdu = P.InformRequestPDU() if inform else P.SNMPv2TrapPDU()
+    P.apiTrapPDU.setDefaults(pdu)
+    P.apiPDU.setRequestID(pdu, request_id)
+    P.apiPDU.setVarBinds(pdu, [
+        (SYS_UPTIME_OID, rfc1902.TimeTicks(request_id % 100000)),
+        (SNMP_TRAP_OID, rfc1902.ObjectName(NOTIFICATIONS_OID + (notification,))),
+        (ALARM_OBJECTS_OID + (1, 0), rfc1902.OctetString(nf_type)),
+        (ALARM_OBJECTS_OID + (2, 0), rfc1902.OctetString(instance)),
+        (ALARM_OBJECTS_OID + (3, 0), rfc1902.OctetString(severity)),
+        (ALARM_OBJECTS_OID + (4, 0), rfc1902.OctetString(alarm_text)),
+    ])
+    message = P.Message()
+    P.apiMessage.setDefaults(message)
+    P.apiMessage.setCommunity(message, 'public')
+    P.apiMessage.setPDU(message, pdu)
+    return encoder.encode(message)
+
+
+def sample_traps(count=200, informs=0.1):
+    rng = random.Random(7)
+    traps = []
+    for i in range(count):
+        notification, nf_type, instance, severity, alarm_text = rng.choice(ALARMS)
+        traps.append(encode_alarm(i + 1, notification, nf_type, instance.format(rng.randint(1, 16)),
+                                  severity, alarm_text, inform=rng.random() < informs))
+    return traps
+
+
+def sender(port, rate, duration, messages, results):
+    """Send messages open-loop at rate/s for duration"""
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    target = ('127.0.0.1', port)
+    sent = 0
+    start = time.perf_counter()
+    end = start + duration
+    while True:
+        now = time.perf_counter()
+        if now >= end:
+            break
+        while sent < (now - start) * rate:
+            s.sendto(messages[sent % len(messages)], target)
+            sent += 1
+        time.sleep(0.0005)
+    results.put(sent)
+
+
+def bench_decode(traps):
+    number = 2000
+    fast = timeit.timeit(lambda: [decode_notification(trap) for trap in traps[:10]], number=number // 10)
+    slow = timeit.timeit(lambda: [decoder.decode(trap, asn1Spec=P.Message()) for trap in traps[:10]],
+                         number=number // 100)
+    print(f"decode: fast path {fast / number * 1e6:7.1f} us/trap   "
+          f"pyasn1 {slow / (number // 10) * 1e6:7.1f} us/trap")
+
+
+def replay(label, traps, rate, duration, senders, queue_size):
+    store = EventStore(capacity=50000)
+    receiver = TrapReceiver(('127.0.0.1', 0), on_batch=store.append_many, queue_size=queue_size)
+    receiver.start()
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=sender,
+                                     args=(receiver.address[1], rate / senders, duration, traps, results))
+             for _ in range(senders)]
+    for proc in procs:
+        proc.start()
+    sent = sum(results.get() for _ in procs)
+    for proc in procs:
+        proc.join()
+    time.sleep(0.5)
+    receiver.close()
+    stats = receiver.stats()
+    lost = sent - stats["received"]
+    print(f"{label}: sent {sent:7d}  stored {store.stats()['appended']:7d} "
+          f"({store.stats()['appended'] / duration:7.0f}/s)  dropped {stats['dropped']:6d}  "
+          f"lost in socket {lost:6d}  batches {stats['batches']:5d}  "
+          f"max queue {stats['maxQueueDepth']}/{queue_size}  informs acked {stats['informsAcked']}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='SNMP trap receiver replay benchmark')
+    parser.add_argument('--rate', type=float, default=10000, help='traps/sec offered')
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--senders', type=int, default=2)
+    parser.add_argument('--storm-rate', type=float, default=50000)
+    parser.add_argument('--storm-queue', type=int, default=1000)
+    args = parser.parse_args()
+
+    print("SNMP trap receiver benchmark")
+    print("=" * 50)
+    traps = sample_traps()
+    bench_decode(traps)
+    replay(f"{args.rate:.0f}/s", traps, args.rate, args.duration, args.senders, 20000)
+    replay(f"storm {args.storm_rate:.0f}/s", traps, args.storm_rate, args.duration,
+           args.senders, args.storm_queue)
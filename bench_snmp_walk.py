@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark for walking the 5G MIB served by the SNMP agent
+Usage: python bench_snmp_walk.py [subscribers...]   (default: 10000 50000)
+
+Builds the MIB index for a synthetic core (sessions = subscribers / 2) and
+walks it through the instrumentation the command responders call: the whole
+enterprise subtree one GETNEXT at a time, and the subscriber table with one
+varbind per column as GETBULK repetitions do.
+A linear scan over the same OIDs is timed for comparison.
+"""
+
+import random
+import sys
+import time
+
+from pysnmp.proto import rfc1902, rfc1905
+
+from snmp_mib import (
+    ENTERPRISE_OID, SUBSCRIBER_ENTRY_OID, FiveGMibInstrum, build_mib_index, decode_oid
+)
+
+LINEAR_LOOKUPS = 200
+
+
+def synthetic_core(subscribers):
+    nf_data = {
+        nf_type: [{"id": f"{nf_type}-{i}", "status": "active", "cpuUtilization": 40 + i,
+                   "memoryUtilization": 50, "throughput": 1000 * i}
+                  for i in range(count)]
+        for nf_type, count in (('amf', 4), ('smf', 4), ('upf', 16))
+    }
+    subs = [{"imsi": f"00101{i:010d}", "msisdn": f"4470{i:08d}", "status": "active",
+             "dnn": "internet", "sNssai": {"sst": 1, "sd": "010203"}, "servingAmf": f"amf-{i % 4}"}
+            for i in range(subscribers)]
+    sessions = [{"sessionId": f"pdu-{i}", "imsi": f"00101{i:010d}", "status": "active",
+                 "dnn": "internet", "smf": f"smf-{i % 4}", "upf": f"upf-{i % 16}"}
+                for i in range(subscribers // 2)]
+    return nf_data, subs, sessions
+
+
+def walk(mib, start_oids):
+    """Walk from start_oids in lockstep until every column leaves its subtree
+
+    One OID walks the whole MIB with GETNEXT; one OID per table column walks
+    the table row by row the way GETBULK repetitions do.
+    """
+    columns = [(tuple(oid), (rfc1902.ObjectName(oid), None)) for oid in start_oids]
+    count = 0
+    while columns:
+        result = mib.readNextVars([varBind for _, varBind in columns])
+        columns = [(prefix, (name, value)) for (prefix, _), (name, value) in zip(columns, result)
+                   if value is not rfc1905.endOfMibView and tuple(name)[:len(prefix)] == prefix]
+        count += len(columns)
+    return count
+
+
+def bench(subscribers):
+    print(f"\n--- {subscribers:,} subscribers ---")
+    nf_data, subs, sessions = synthetic_core(subscribers)
+    start = time.perf_counter()
+    mib = FiveGMibInstrum(build_mib_index(nf_data, subs, sessions))
+    size = len(mib.index)
+    print(f"build index:   {time.perf_counter() - start:8.2f} s  ({size:,} objects)")
+
+    table_columns = [SUBSCRIBER_ENTRY_OID + (column,) for column in range(1, 8)]
+    for label, start_oids in (('getnext walk', [ENTERPRISE_OID]), ('table walk', table_columns)):
+        start = time.perf_counter()
+        count = walk(mib, start_oids)
+        elapsed = time.perf_counter() - start
+        print(f"{label + ':':14} {elapsed:8.2f} s  {elapsed * 1e6 / count:6.1f} us/varbind")
+
+    oids = [decode_oid(key) for key in mib.index.keys]
+    rng = random.Random(42)
+    targets = [oids[rng.randrange(size)] for _ in range(LINEAR_LOOKUPS)]
+    start = time.perf_counter()
+    for target in targets:
+        next(oid for oid in oids if oid > target)
+    linear = (time.perf_counter() - start) * 1e6 / LINEAR_LOOKUPS
+    start = time.perf_counter()
+    for target in targets:
+        mib.index.next_index(target)
+    indexed = (time.perf_counter() - start) * 1e6 / LINEAR_LOOKUPS
+    print(f"next lookup:   linear {linear:9.1f} us   bisect {indexed:5.1f} us")
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 50000]
+    print("5G MIB walk benchmark")
+    print("=" * 50)
+    for size in sizes:
+        bench(size)
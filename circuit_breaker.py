@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Circuit breakers with latency-adaptive timeouts for upstream calls
+Closed: calls pass and consecutive failures are counted. Open (after
+failure_threshold of them): calls fail fast until reset_timeout passes. Then
+half-open: one probe call goes through; success closes the breaker, failure
+reopens it for twice as long (up to max_reset_timeout).
+"""
+
+import threading
+import time
+from collections import deque
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+# Successful calls kept for the latency distribution, and how many are needed
+# (and how often the timeout is recomputed) before it replaces max_timeout;
+# a timed-out call recomputes it at once so it can grow before the breaker opens
+LATENCY_WINDOW = 200
+MIN_SAMPLES = 20
+TIMEOUT_UPDATE_EVERY = 10
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+
+
+def percentile(samples, q):
+    """Return the q-th percentile (0-100) of sorted samples"""
+    return samples[min(len(samples) - 1, int(len(samples) * q / 100))]
+
+
+class CircuitBreaker:
+    """Breaker for one upstream, with a timeout of timeout_multiplier x p99 latency"""
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=5, max_reset_timeout=60,
+                 min_timeout=0.5, max_timeout=2, timeout_multiplier=4):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout_multiplier = timeout_multiplier
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive = 0
+        self._open_for = reset_timeout
+        self._retry_at = 0.0
+        self._probe_started = None
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._timeout = max_timeout
+        self._changed = time.time()
+        self._stats = {"successes": 0, "failures": 0, "timeouts": 0, "rejected": 0, "opened": 0}
+
+    @property
+    def state(self):
+        return self._state
+
+    def _transition(self, state):
+        print(f"Circuit {self.name}: {self._state} -> {state}")
+        self._state = state
+        self._changed = time.time()
+
+    def _open(self, now):
+        self._transition(OPEN)
+        self._retry_at = now + self._open_for
+        self._stats["opened"] += 1
+
+    def allow(self):
+        """Admit a call, or raise CircuitOpenError while the breaker is open"""
+        if self._state == CLOSED:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if self._state == OPEN and now >= self._retry_at:
+                self._transition(HALF_OPEN)
+                self._probe_started = None
+            if self._state == CLOSED:
+                return
+            # One probe at a time; a probe that never reported frees its slot
+            if self._state == HALF_OPEN and (self._probe_started is None or
+                                             now - self._probe_started > self.max_timeout):
+                self._probe_started = now
+                return
+            self._stats["rejected"] += 1
+            retry_in = max(0.0, self._retry_at - now)
+        raise CircuitOpenError(f"{self.name}: circuit {self._state}, retry in {retry_in:.1f}s")
+
+    def ignore(self):
+        """Forget an admitted call that never reached the upstream (frees a half-open probe)"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_started = None
+
+    def timeout(self):
+        """Return the timeout for the next call"""
+        return self._timeout
+
+    def success(self, latency):
+        """Record a successful call and its latency"""
+        with self._lock:
+            self._stats["successes"] += 1
+            self._consecutive = 0
+            self._record_latency(latency)
+            if self._state != CLOSED:
+                self._transition(CLOSED)
+                self._open_for = self.reset_timeout
+
+    def failure(self, timed_out_after=None):
+        """Record a failed call; a timed-out call also counts as a latency sample"""
+        now = time.monotonic()
+        with self._lock:
+            self._stats["failures"] += 1
+            self._consecutive += 1
+            if timed_out_after is not None:
+                # Censored sample: lets the timeout grow when the upstream slows down
+                self._stats["timeouts"] += 1
+                self._record_latency(timed_out_after, update=True)
+            if self._state == HALF_OPEN:
+                self._open_for = min(self._open_for * 2, self.max_reset_timeout)
+                self._open(now)
+            elif self._state == CLOSED and self._consecutive >= self.failure_threshold:
+                self._open(now)
+
+    def _record_latency(self, latency, update=False):
+        self._latencies.append(latency)
+        count = self._stats["successes"] + self._stats["timeouts"]
+        if len(self._latencies) >= MIN_SAMPLES and (update or count % TIMEOUT_UPDATE_EVERY == 0):
+            p99 = percentile(sorted(self._latencies), 99)
+            self._timeout = min(self.max_timeout,
+                                max(self.min_timeout, p99 * self.timeout_multiplier))
+
+    def stats(self):
+        with self._lock:
+            samples = sorted(self._latencies)
+            stats = dict(self._stats)
+            stats["state"] = self._state
+            stats["since"] = self._changed
+            stats["consecutiveFailures"] = self._consecutive
+            stats["timeout"] = round(self._timeout, 3)
+            if self._state == OPEN:
+                stats["retryIn"] = round(max(0.0, self._retry_at - time.monotonic()), 1)
+        stats["latencyMs"] = {
+            f"p{q}": round(percentile(samples, q) * 1000, 2) for q in (50, 99)
+        } if samples else None
+        return stats
+
+
+class CircuitBreakers:
+    """One CircuitBreaker per upstream name, created on first use"""
+
+    def __init__(self, **settings):
+        self.settings = settings
+        self._lock = threading.Lock()
+        self._breakers = {}
+
+    def get(self, name):
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(name)
+                if breaker is None:
+                    breaker = self._breakers[name] = CircuitBreaker(name, **self.settings)
+        return breaker
+
+    def stats(self):
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {name: breaker.stats() for name, breaker in breakers.items()}
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Pagination, field projection and streamed JSON for large RESTCONF lists
+"""
+
+import base64
+import json
+from itertools import islice
+
+from dataset_versions import find_list
+
+STREAM_BATCH_SIZE = 500
+
+
+class QueryError(Exception):
+    """Raised for invalid limit/cursor/fields/depth parameters"""
+
+
+def encode_cursor(offset):
+    """Encode a list offset as an opaque cursor"""
+    return base64.urlsafe_b64encode(f"o:{offset}".encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode an opaque cursor back into a list offset"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        kind, offset = base64.urlsafe_b64decode(padded.encode()).decode().split(':', 1)
+        if kind != 'o' or int(offset) < 0:
+            raise ValueError(cursor)
+        return int(offset)
+    except Exception:
+        raise QueryError(f"Invalid cursor: {cursor}")
+
+
+def parse_fields(fields):
+    """Parse a RESTCONF fields expression ("a;b/c") into a nested selector dict"""
+    if not fields:
+        return None
+    selector = {}
+    for path in fields.replace(',', ';').split(';'):
+        path = path.strip()
+        if not path:
+            continue
+        node = selector
+        for name in path.split('/'):
+            node = node.setdefault(name, {})
+    return selector
+
+
+def select_fields(value, selector):
+    """Keep only the selected members of a value"""
+    if not selector:
+        return value
+    if isinstance(value, list):
+        return [select_fields(item, selector) for item in value]
+    if not isinstance(value, dict):
+        return value
+    return {
+        name: select_fields(value[name], child)
+        for name, child in selector.items()
+        if name in value
+    }
+
+
+def limit_depth(value, depth):
+    """Drop nested containers deeper than depth levels (depth 1 keeps leaves only)"""
+    if depth is None:
+        return value
+    if isinstance(value, dict):
+        return {
+            name: limit_depth(child, depth - 1)
+            for name, child in value.items()
+            if depth > 1 or not isinstance(child, (dict, list))
+        }
+    if isinstance(value, list):
+        return [limit_depth(item, depth - 1) for item in value
+                if depth > 1 or not isinstance(item, (dict, list))]
+    return value
+
+
+class CollectionQuery:
+    """Parsed limit/cursor/fields/depth query parameters"""
+
+    def __init__(self, args, max_limit=10000):
+        self.limit = self._int(args.get('limit'), 'limit', 1)
+        if self.limit is not None:
+            self.limit = min(self.limit, max_limit)
+        cursor = args.get('cursor')
+        self.offset = decode_cursor(cursor) if cursor else 0
+        self.selector = parse_fields(args.get('fields'))
+        self.depth = self._int(args.get('depth'), 'depth', 1)
+
+    @staticmethod
+    def _int(value, name, minimum):
+        if value is None or value == 'unbounded':
+            return None
+        try:
+            number = int(value)
+        except ValueError:
+            raise QueryError(f"{name} must be an integer")
+        if number < minimum:
+            raise QueryError(f"{name} must be >= {minimum}")
+        return number
+
+    def view(self, entry):
+        """Apply field projection and depth to one entry"""
+        return limit_depth(select_fields(entry, self.selector), self.depth)
+
+
+def stream_collection(payload, list_name, query, batch_size=STREAM_BATCH_SIZE):
+    """Yield a JSON document for one page of a list, a batch of entries at a time"""
+    items = find_list(payload, list_name)
+    if items is None:
+        yield json.dumps(payload)
+        return
+
+    list_key = list_name
+    yield '{'
+    for key, value in payload.items() if isinstance(payload, dict) else ():
+        if value is items:
+            list_key = key
+            continue
+        yield f"{json.dumps(key)}:{json.dumps(value)},"
+
+    end = len(items) if query.limit is None else min(query.offset + query.limit, len(items))
+    yield f"{json.dumps(list_key)}:["
+    page = islice(items, query.offset, end)
+    first = True
+    while True:
+        batch = list(islice(page, batch_size))
+        if not batch:
+            break
+        chunk = ','.join(json.dumps(query.view(entry)) for entry in batch)
+        yield chunk if first else ',' + chunk
+        first = False
+    yield ']'
+
+    next_cursor = encode_cursor(end) if end < len(items) else None
+    yield f',"nextCursor":{json.dumps(next_cursor)},"total":{len(items)}}}'
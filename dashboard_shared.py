@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Shared dashboard snapshot for multi-process dashboard servers
+The collector writes every published response body (with its compressed
+variants, ETag and headers) to one file, atomically replaced; workers map it
+read-only and write the bodies to the socket straight from the mapping.
+
+Layout (native byte order): header (magic, version, directory length), the
+JSON directory {name: {"etag", "headers", "variants": {encoding: [offset,
+length]}}}, then the bodies. Offsets are relative to the end of the directory.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+from werkzeug.serving import WSGIRequestHandler
+
+from response_encoding import COMPRESS_MIN_SIZE, brotli, variant_etag
+
+MAGIC = b'5GDS'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('=4sII')
+
+# How often a worker checks whether the collector published a new file
+RELOAD_INTERVAL = 0.5
+
+
+def write_shared_snapshot(path, entries):
+    """Write {name: (EncodedBody, headers)} to path, replacing any previous file atomically"""
+    directory = {}
+    bodies = []
+    position = 0
+    for name, (encoded, headers) in entries.items():
+        encodings = ['identity']
+        if len(encoded.body) >= COMPRESS_MIN_SIZE:
+            encodings += ['br', 'gzip'] if brotli is not None else ['gzip']
+        variants = {}
+        for encoding in encodings:
+            body = encoded.variant(encoding)
+            variants[encoding] = [position, len(body)]
+            bodies.append(body)
+            position += len(body)
+        directory[name] = {"etag": encoded.etag, "headers": headers or {}, "variants": variants}
+    index = json.dumps(directory, separators=(',', ':')).encode()
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(index)))
+        f.write(index)
+        f.writelines(bodies)
+    os.replace(temp_path, path)
+
+
+class MappedSnapshot:
+    """One published snapshot file, mapped read-only
+
+    The file is closed once mapped. Entries reference the mapping, not the
+    snapshot, so a replaced snapshot is unmapped as soon as the last
+    in-flight response using it is done.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, size = HEADER.unpack_from(self.map, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"Not a shared dashboard snapshot: {path}")
+            directory = json.loads(self.map[HEADER.size:HEADER.size + size])
+        except BaseException:
+            self.map.close()
+            raise
+        base = HEADER.size + size
+        self.entries = {
+            name: SharedEntry(self.map, name, item["etag"], item["headers"], {
+                encoding: (base + offset, length) for encoding, (offset, length) in item["variants"].items()
+            })
+            for name, item in directory.items()
+        }
+
+
+class SharedEntry:
+    """One published response body and its variants (absolute offsets into the mapping)"""
+
+    __slots__ = ('mapping', 'name', 'etag', 'headers', 'variants')
+
+    def __init__(self, mapping, name, etag, headers, variants):
+        self.mapping = mapping
+        self.name = name
+        self.etag = etag
+        self.headers = headers
+        self.variants = variants
+
+    def negotiate(self, accept_encodings):
+        """Pick the best published encoding the client accepts"""
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and encoding in accept_encodings:
+                return encoding
+        return 'identity'
+
+    def span(self, encoding='identity'):
+        """Return the (offset, length) of one variant in the mapping"""
+        return self.variants[encoding]
+
+    def body(self, encoding='identity'):
+        """Return a variant as a zero-copy view of the mapping"""
+        offset, length = self.span(encoding)
+        return memoryview(self.mapping)[offset:offset + length]
+
+    def json(self):
+        """Decode the identity body"""
+        return json.loads(bytes(self.body()))
+
+
+class SharedSnapshot:
+    """Worker view of the collector's published snapshot, remapped when replaced"""
+
+    def __init__(self, path, reload_interval=RELOAD_INTERVAL, on_change=None):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.on_change = on_change
+        self.mapped = None
+        self._identity = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._stats = {"reloads": 0, "served": 0, "notModified": 0, "bytes": 0}
+
+    def reload(self):
+        """Map the published file again if the collector replaced it"""
+        now = time.monotonic()
+        if now - self._checked < self.reload_interval:
+            return
+        with self._lock:
+            if now - self._checked < self.reload_interval:
+                return
+            self._checked = now
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                return
+            identity = (st.st_ino, st.st_mtime_ns)
+            if identity == self._identity:
+                return
+            try:
+                mapped = MappedSnapshot(self.path)
+            except (OSError, ValueError) as e:
+                print(f"Error mapping {self.path}: {e}")
+                return
+            previous = self.mapped.entries if self.mapped is not None else {}
+            # Old mappings stay alive while in-flight responses still reference them
+            self.mapped = mapped
+            self._identity = identity
+            self._stats["reloads"] += 1
+        changed = [name for name, entry in mapped.entries.items()
+                   if name not in previous or previous[name].etag != entry.etag]
+        if changed and self.on_change is not None:
+            self.on_change(changed)
+
+    def entry(self, name):
+        """Return the published SharedEntry for name, or None"""
+        mapped = self.mapped
+        return mapped.entries.get(name) if mapped is not None else None
+
+    def count(self, status, length):
+        with self._lock:
+            if status == 304:
+                self._stats["notModified"] += 1
+            else:
+                self._stats["served"] += 1
+                self._stats["bytes"] += length
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        mapped = self.mapped
+        stats["path"] = self.path
+        stats["entries"] = sorted(mapped.entries) if mapped is not None else []
+        return stats
+
+
+def parse_accept_encodings(value):
+    """Return the content codings a client accepts (q=0 excluded)"""
+    accepted = set()
+    for item in (value or '').split(','):
+        coding, _, params = item.strip().partition(';')
+        if coding and params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def etag_matches(value, etag):
+    """True if an If-None-Match header value matches a strong ETag"""
+    if not value:
+        return False
+    return any(tag.strip() in ('*', f'"{etag}"', f'W/"{etag}"') for tag in value.split(','))
+
+
+def shared_request_handler(snapshot, routes, on_response=None):
+    """Werkzeug request handler serving routes {path: entry name} from snapshot
+
+    on_response(method, path, status, seconds) is called after each response
+    sent from the snapshot (those never reach the WSGI app).
+    """
+
+    class SharedSnapshotHandler(WSGIRequestHandler):
+        def run_wsgi(self):
+            started = time.perf_counter()
+            snapshot.reload()
+            path, _, query = self.path.partition('?')
+            name = routes.get(path)
+            served = name and self.command in ('GET', 'HEAD') and not query
+            entry = snapshot.entry(name) if served else None
+            if entry is None:
+                return super().run_wsgi()
+            status = self.send_entry(entry)
+            if on_response is not None:
+                on_response(self.command, path, status, time.perf_counter() - started)
+
+        def send_entry(self, entry):
+            """Send a published body from the mapping: the only copy is into the socket"""
+            encoding = entry.negotiate(parse_accept_encodings(self.headers.get('Accept-Encoding')))
+            etag = variant_etag(entry.etag, encoding)
+            if etag_matches(self.headers.get('If-None-Match'), etag):
+                status, length = 304, 0
+            else:
+                _, length = entry.span(encoding)
+                status = 200
+            self.send_response(status)
+            if status == 200:
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(length))
+                if encoding != 'identity':
+                    self.send_header('Content-Encoding', encoding)
+            self.send_header('ETag', f'"{etag}"')
+            self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('Cache-Control', 'no-cache')
+            for header, value in entry.headers.items():
+                self.send_header(header, value)
+            # Same connection handling as werkzeug's WSGI responses
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+            self.end_headers()
+            if status == 200 and length and self.command == 'GET':
+                with entry.body(encoding) as body:
+                    self.connection.sendall(body)
+            snapshot.count(status, length)
+            return status
+
+    return SharedSnapshotHandler
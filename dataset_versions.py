@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Versioned copies of RESTCONF list datasets with incremental deltas
+Entries are keyed by ID and change detection uses a per-entry hash
+"""
+
+import hashlib
+import json
+import threading
+from collections import deque
+
+
+def entry_hash(entry):
+    """Return a short stable digest of one list entry"""
+    encoded = json.dumps(entry, sort_keys=True, separators=(',', ':')).encode()
+    return hashlib.blake2b(encoded, digest_size=8).digest()
+
+
+def find_list(payload, list_name):
+    """Return the list called list_name in a RESTCONF payload, or None"""
+    if isinstance(payload, list):
+        return payload
+    if not isinstance(payload, dict):
+        return None
+    for key, value in payload.items():
+        if (key == list_name or key.endswith(f":{list_name}")) and isinstance(value, list):
+            return value
+    return None
+
+
+class VersionedDataset:
+    """Monotonically versioned list dataset with a bounded change log"""
+
+    def __init__(self, list_name, id_fields, max_versions=100):
+        self.list_name = list_name
+        self.id_fields = id_fields
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._payload = None
+        self._version = 0
+        self._changes = deque(maxlen=max_versions)
+        self._listeners = []
+
+    @property
+    def version(self):
+        return self._version
+
+    def add_listener(self, listener):
+        """Call listener(changes) with [(id, op, entry)] after each changed update"""
+        self._listeners.append(listener)
+
+    def entry_id(self, entry, index):
+        """Return the ID of an entry from the first ID field it has"""
+        if isinstance(entry, dict):
+            for field in self.id_fields:
+                if entry.get(field) is not None:
+                    return str(entry[field])
+        return f"#{index}"
+
+    def update(self, payload, version=None):
+        """Apply a freshly fetched payload; returns the (possibly new) version
+
+        version adopts another process's numbering (shared-snapshot workers);
+        a jump of more than one drops the change log, so older ?since values
+        get the full payload instead of a delta that skips versions.
+        """
+        items = find_list(payload, self.list_name)
+        if items is None:
+            return self._version
+
+        entries = {}
+        for index, entry in enumerate(items):
+            entries[self.entry_id(entry, index)] = (entry_hash(entry), entry)
+
+        with self._lock:
+            previous = self._entries
+            changes = []
+            for entry_id, (digest, _) in entries.items():
+                old = previous.get(entry_id)
+                if old is None:
+                    changes.append((entry_id, 'add'))
+                elif old[0] != digest:
+                    changes.append((entry_id, 'replace'))
+            for entry_id in previous.keys() - entries.keys():
+                changes.append((entry_id, 'remove'))
+
+            self._payload = payload
+            if version is not None:
+                if version == self._version + 1:
+                    self._changes.append((version, changes))
+                elif version != self._version:
+                    self._changes.clear()
+                self._version = version
+            elif changes or self._version == 0:
+                self._version += 1
+                self._changes.append((self._version, changes))
+            self._entries = entries
+            version = self._version
+
+        if changes:
+            applied = [
+                (entry_id, op, entries[entry_id][1] if op != 'remove' else None)
+                for entry_id, op in changes
+            ]
+            for listener in self._listeners:
+                listener(applied)
+        return version
+
+    def _can_delta(self, since):
+        if since == self._version:
+            return True
+        return since < self._version and bool(self._changes) and since >= self._changes[0][0] - 1
+
+    def can_delta(self, since):
+        """True if delta(since) would return changes rather than None"""
+        with self._lock:
+            return self._can_delta(since)
+
+    def delta(self, since):
+        """Return JSON-Patch style changes after version since, or None if too old"""
+        with self._lock:
+            if since == self._version:
+                return {"version": self._version, "full": False, "changes": []}
+            if not self._can_delta(since):
+                return None
+
+            first_ops = {}
+            for version, changes in self._changes:
+                if version <= since:
+                    continue
+                for entry_id, op in changes:
+                    first_ops.setdefault(entry_id, op)
+
+            patch = []
+            for entry_id, first_op in first_ops.items():
+                current = self._entries.get(entry_id)
+                existed_before = first_op != 'add'
+                path = f"/{self.list_name}/{entry_id}"
+                if current is None:
+                    if existed_before:
+                        patch.append({"op": "remove", "path": path})
+                else:
+                    patch.append({
+                        "op": "replace" if existed_before else "add",
+                        "path": path,
+                        "value": current[1]
+                    })
+            return {"version": self._version, "full": False, "changes": patch}
+
+    def full(self):
+        """Return the current payload with its version"""
+        with self._lock:
+            return {"version": self._version, "full": True, "data": self._payload}
+
+    def stats(self):
+        """Return version and size information"""
+        with self._lock:
+            return {
+                "version": self._version,
+                "entries": len(self._entries),
+                "oldestDeltaVersion": self._changes[0][0] - 1 if self._changes else None
+            }
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Bounded in-memory store for NF events (SNMP traps and informs)
+Events get increasing ids; the oldest are evicted once capacity is reached,
+so clients page forward with ?since=<id> and notice gaps from the first id.
+"""
+
+import threading
+from collections import Counter, deque
+
+DEFAULT_CAPACITY = 10000
+# Distinct event names counted individually; the rest are counted as 'other'
+MAX_NAMES = 256
+
+
+class EventStore:
+    """Fixed-capacity event log with per-name counts"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._events = deque(maxlen=capacity)
+        self._last_id = 0
+        self._counts = Counter()
+        self._stats = {"appended": 0, "batches": 0, "evicted": 0}
+
+    def append_many(self, events):
+        """Assign ids to a batch of event dicts and add them in one step"""
+        with self._lock:
+            self._stats["evicted"] += max(0, len(self._events) + len(events) - self.capacity)
+            for event in events:
+                self._last_id += 1
+                event["id"] = self._last_id
+                self._events.append(event)
+                name = event.get("name")
+                if name not in self._counts and len(self._counts) >= MAX_NAMES:
+                    name = 'other'
+                self._counts[name] += 1
+            self._stats["appended"] += len(events)
+            self._stats["batches"] += 1
+            return self._last_id
+
+    def query(self, since=None, limit=100, name=None, source=None):
+        """Events after id since (oldest first), or the latest limit events"""
+        with self._lock:
+            events = list(self._events)
+            last_id = self._last_id
+        if since is not None:
+            first_id = events[0]["id"] if events else last_id + 1
+            start = max(0, since + 1 - first_id)
+            events = events[start:]
+        if name is not None:
+            events = [event for event in events if event.get("name") == name]
+        if source is not None:
+            events = [event for event in events if event.get("source") == source]
+        events = events[:limit] if since is not None else events[-limit:]
+        return {"events": events, "lastId": last_id}
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, size=len(self._events), capacity=self.capacity,
+                        lastId=self._last_id, names=dict(self._counts))
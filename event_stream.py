@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Server-Sent Events fan-out for the web dashboard
+One publisher pushes events to many subscribers through bounded queues
+"""
+
+import asyncio
+import json
+import queue
+import threading
+from collections import deque
+
+
+class Subscriber:
+    """One connected stream client with a bounded event queue"""
+
+    def __init__(self, max_queue):
+        self.queue = queue.Queue(maxsize=max_queue)
+
+    def offer(self, event):
+        """Queue an event without blocking; returns how many old events were dropped"""
+        dropped = 0
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return dropped
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    dropped += 1
+                except queue.Empty:
+                    pass
+
+
+class AsyncSubscriber:
+    """Stream client served by a coroutine; events are handed to its loop"""
+
+    def __init__(self, max_queue, loop, broadcaster):
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.loop = loop
+        self.broadcaster = broadcaster
+
+    def offer(self, event):
+        """Queue an event from any thread; drops are counted on the loop"""
+        self.loop.call_soon_threadsafe(self._put, event)
+        return 0
+
+    def _put(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.broadcaster.count_dropped(1)
+        self.queue.put_nowait(event)
+
+
+class EventBroadcaster:
+    """Fans published events out to all subscribers and keeps a replay buffer"""
+
+    def __init__(self, max_queue=16, replay_size=32):
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._replay = deque(maxlen=replay_size)
+        self._last_id = 0
+        self._stats = {
+            "published": 0,
+            "connects": 0,
+            "disconnects": 0,
+            "replayed": 0,
+            "dropped": 0,
+        }
+
+    def publish(self, event_type, data):
+        """Serialize data once and queue it for every subscriber"""
+        with self._lock:
+            self._last_id += 1
+            event = format_event(self._last_id, event_type, json.dumps(data))
+            self._replay.append((self._last_id, event))
+            subscribers = list(self._subscribers)
+            self._stats["published"] += 1
+        dropped = 0
+        for subscriber in subscribers:
+            dropped += subscriber.offer(event)
+        if dropped:
+            self.count_dropped(dropped)
+
+    def count_dropped(self, dropped):
+        with self._lock:
+            self._stats["dropped"] += dropped
+
+    def subscribe(self, last_event_id=None, loop=None):
+        """Register a subscriber, replaying events missed since last_event_id
+
+        With an event loop the subscriber is an AsyncSubscriber for a coroutine.
+        """
+        if loop is not None:
+            subscriber = AsyncSubscriber(self.max_queue, loop, self)
+        else:
+            subscriber = Subscriber(self.max_queue)
+        with self._lock:
+            missed = []
+            if self._replay:
+                oldest_id = self._replay[0][0]
+                if (last_event_id is None or last_event_id > self._last_id
+                        or last_event_id < oldest_id - 1):
+                    # New client, restarted server or gap past the buffer: latest only
+                    missed = [self._replay[-1][1]]
+                else:
+                    missed = [event for event_id, event in self._replay
+                              if event_id > last_event_id]
+            for event in missed[-self.max_queue:]:
+                subscriber.offer(event)
+            self._stats["replayed"] += len(missed)
+            self._subscribers.add(subscriber)
+            self._stats["connects"] += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """Remove a subscriber"""
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.discard(subscriber)
+                self._stats["disconnects"] += 1
+
+    def subscriber_count(self):
+        """Return the number of connected subscribers"""
+        with self._lock:
+            return len(self._subscribers)
+
+    def stats(self):
+        """Return fan-out counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["subscribers"] = len(self._subscribers)
+            stats["lastEventId"] = self._last_id
+        return stats
+
+
+def format_event(event_id, event_type, payload):
+    """Format one SSE message"""
+    return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n"
+
+
+def stream_events(broadcaster, subscriber, heartbeat=15, retry_ms=3000):
+    """Yield SSE messages for a subscriber, with heartbeats while idle"""
+    try:
+        yield f"retry: {retry_ms}\n\n"
+        while True:
+            try:
+                yield subscriber.queue.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ": heartbeat\n\n"
+    finally:
+        broadcaster.unsubscribe(subscriber)
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Vectorized windowed aggregations over metric series (requires NumPy)
+All series share one time axis: a [series x samples] ring of float32 values
+so percentiles, rates and top-N run as single batch operations.
+"""
+
+import threading
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from metrics_history import match_names
+
+DEFAULT_PERCENTILES = (50, 95, 99)
+MAX_SERIES = 5000
+
+
+class AggregationUnavailable(Exception):
+    """Raised when NumPy is not installed"""
+
+
+class SampleWindows:
+    """Fixed-capacity columnar ring of samples for many series
+
+    Samples of series beyond max_series are dropped and counted.
+    """
+
+    def __init__(self, capacity, initial_series=64, dtype='float32', max_series=MAX_SERIES):
+        if np is None:
+            raise AggregationUnavailable("NumPy is required for metric aggregation")
+        self.capacity = capacity
+        self.dtype = dtype
+        self.max_series = max_series
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._names = []
+        self.times = np.zeros(capacity, dtype='float64')
+        self.values = np.full((initial_series, capacity), np.nan, dtype=dtype)
+        self.head = 0
+        self.count = 0
+
+    def _row(self, name):
+        row = self._rows.get(name)
+        if row is None:
+            row = len(self._names)
+            if row >= self.max_series:
+                self._dropped += 1
+                return None
+            if row >= self.values.shape[0]:
+                grown = np.full((self.values.shape[0] * 2, self.capacity), np.nan, dtype=self.dtype)
+                grown[:row] = self.values
+                self.values = grown
+            self._rows[name] = row
+            self._names.append(name)
+        return row
+
+    def append(self, timestamp, samples):
+        """Add one column: a value per series name at timestamp"""
+        with self._lock:
+            column = self.head
+            self.times[column] = timestamp
+            self.values[:, column] = np.nan
+            for name, value in samples.items():
+                row = self._row(name)
+                if row is not None:
+                    self.values[row, column] = value
+            self.head = (column + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+
+    def load(self, names, times, values):
+        """Replace contents with a [series x samples] block (oldest sample first)"""
+        with self._lock:
+            n = min(len(times), self.capacity)
+            kept = min(len(names), self.max_series)
+            self._rows = {}
+            self._names = []
+            self._dropped += len(names) - kept
+            self.values = np.full((max(kept, 1), self.capacity), np.nan, dtype=self.dtype)
+            for name in names[:kept]:
+                self._row(name)
+            self.times[:n] = times[-n:]
+            self.values[:kept, :n] = values[:kept, -n:]
+            self.head = n % self.capacity
+            self.count = n
+
+    def window(self, patterns, seconds, now=None):
+        """Return (names, times, block) for matching series over the last seconds"""
+        with self._lock:
+            names = match_names(self._names, patterns)
+            if not names or not self.count:
+                return [], np.empty(0), np.empty((0, 0), dtype=self.dtype)
+            start = self.head - self.count
+            if start >= 0:
+                segments = [(start, self.head)]
+            else:
+                segments = [(start % self.capacity, self.capacity), (0, self.head)]
+            newest = self.times[(self.head - 1) % self.capacity] if now is None else now
+            threshold = newest - seconds
+
+            # Trim each physical segment to the window before touching values
+            parts = []
+            for a, b in segments:
+                a += int(np.searchsorted(self.times[a:b], threshold, side='left'))
+                if a < b:
+                    parts.append((a, b))
+            if len(names) == len(self._names):
+                rows = slice(0, len(names))
+            else:
+                rows = np.fromiter((self._rows[name] for name in names), dtype=np.intp)
+            times = [self.times[a:b] for a, b in parts]
+            blocks = [self.values[rows, a:b] for a, b in parts]
+            # Copy while locked: append() overwrites ring columns in place
+            if len(parts) == 1:
+                return names, times[0].copy(), blocks[0].copy()
+            if not parts:
+                return names, np.empty(0), np.empty((len(names), 0), dtype=self.dtype)
+            return names, np.concatenate(times), np.concatenate(blocks, axis=1)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "series": len(self._names),
+                "droppedSeries": self._dropped,
+                "samples": self.count,
+                "capacity": self.capacity,
+                "bytes": int(self.values.nbytes + self.times.nbytes)
+            }
+
+
+def percentiles(block, q=DEFAULT_PERCENTILES):
+    """Per-series percentiles; rows are series, NaN marks missing samples"""
+    if not block.size:
+        return np.empty((0, len(q)))
+    if np.isnan(block).any():
+        return _nan_percentiles(block, q)
+    return np.percentile(block, q, axis=1).T
+
+
+def _nan_percentiles(block, q):
+    """Percentiles ignoring NaN, vectorized: sort rows once and index by valid count"""
+    ordered = np.sort(block, axis=1)
+    valid = (~np.isnan(block)).sum(axis=1)
+    result = np.full((block.shape[0], len(q)), np.nan)
+    has = valid > 0
+    for j, pct in enumerate(q):
+        position = (valid - 1) * (pct / 100.0)
+        low = np.floor(position).astype(np.intp)
+        high = np.ceil(position).astype(np.intp)
+        rows = np.arange(block.shape[0])
+        low_values = ordered[rows, np.clip(low, 0, None)]
+        high_values = ordered[rows, np.clip(high, 0, None)]
+        result[:, j] = np.where(has, low_values + (high_values - low_values) * (position - low), np.nan)
+    return result
+
+
+def first_last(times, block):
+    """Return (first value, first time, last value, last time) of valid samples per series"""
+    valid = ~np.isnan(block)
+    has = valid.any(axis=1)
+    first = valid.argmax(axis=1)
+    last = block.shape[1] - 1 - valid[:, ::-1].argmax(axis=1)
+    rows = np.arange(block.shape[0])
+    first_values = np.where(has, block[rows, first], np.nan)
+    last_values = np.where(has, block[rows, last], np.nan)
+    return first_values, times[first], last_values, times[last]
+
+
+def rates(times, block):
+    """Per-second rate of change between the first and last valid sample per series"""
+    if not block.size:
+        return np.empty(0)
+    first_values, first_times, last_values, last_times = first_last(times, block)
+    elapsed = last_times - first_times
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(elapsed > 0, (last_values - first_values) / elapsed, np.nan)
+
+
+def scores(times, block, by):
+    """Per-series load score used for top-N: avg, max or last"""
+    valid = ~np.isnan(block)
+    counts = valid.sum(axis=1)
+    if by == 'max':
+        result = np.where(valid, block, -np.inf).max(axis=1)
+        return np.where(counts > 0, result, np.nan)
+    if by == 'last':
+        return first_last(times, block)[2]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(counts > 0, np.where(valid, block, 0).sum(axis=1) / counts, np.nan)
+
+
+def top_n(names, times, block, n, by='avg'):
+    """Return [(name, score)] of the n highest-scoring series"""
+    if not block.size:
+        return []
+    values = scores(times, block, by).astype('float64')
+    values = np.where(np.isnan(values), -np.inf, values)
+    n = min(n, len(names))
+    candidates = np.argpartition(-values, n - 1)[:n]
+    candidates = candidates[np.argsort(-values[candidates])]
+    return [(names[i], float(values[i])) for i in candidates if values[i] != -np.inf]
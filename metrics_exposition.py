@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Prometheus text exposition of the dashboard's own counters and histograms
+Every thread records into its own shard (keyed by thread ident, so shards are
+reused as werkzeug's per-request threads come and go), so recording takes no
+lock; a scrape sums the shards. Values computed at scrape time (breaker
+states, admission counters) come from registered collector callbacks.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+# Latency buckets in seconds, from cache hits to the RESTCONF timeout
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# WSGI environ keys: the route template set by the app, and a flag set by a
+# front end that already recorded the request
+ROUTE_KEY = 'dashboard.route'
+RECORDED_KEY = 'dashboard.recorded'
+
+# Method label values; anything else a client sends is labelled "other"
+HTTP_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'DELETE', 'CONNECT', 'OPTIONS', 'TRACE', 'PATCH'))
+
+
+def method_label(method):
+    """Bounded label value for an HTTP method"""
+    return method if method in HTTP_METHODS else 'other'
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names, values, extra=''):
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class ShardedMetric:
+    """Per-thread series storage: {label values: list of numbers} per thread ident"""
+
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._shards = {}
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = self._shards.get(threading.get_ident())
+        if shard is None:
+            with self._lock:
+                shard = self._shards.setdefault(threading.get_ident(), {})
+        return shard
+
+    def _merged(self):
+        """Sum the shards into {label values: list}"""
+        with self._lock:
+            shards = list(self._shards.values())
+        merged = {}
+        for shard in shards:
+            for labels, values in list(shard.items()):
+                total = merged.get(labels)
+                if total is None:
+                    merged[labels] = list(values)
+                else:
+                    for i, value in enumerate(values):
+                        total[i] += value
+        return merged
+
+
+class Counter(ShardedMetric):
+    """Counter (or, with negative increments, an up/down gauge)"""
+
+    kind = 'counter'
+
+    def inc(self, labels=(), amount=1):
+        shard = self._shard()
+        series = shard.get(labels)
+        if series is None:
+            shard[labels] = [amount]
+        else:
+            series[0] += amount
+
+    def expose(self):
+        lines = []
+        for labels, (value,) in sorted(self._merged().items()):
+            lines.append(f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """Up/down gauge such as requests in flight"""
+
+    kind = 'gauge'
+
+
+class Histogram(ShardedMetric):
+    """Cumulative-bucket histogram; observe() is a bisect and two increments"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, labels=()):
+        shard = self._shard()
+        series = shard.get(labels)
+        if series is None:
+            # One count per bucket, one for +Inf, then the sum
+            series = shard[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def expose(self):
+        lines = []
+        for labels, series in sorted(self._merged().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                cumulative += count
+                le = format_labels(self.labelnames, labels, f'le="{format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            label_text = format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Metrics and scrape-time collectors rendered in Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self.register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def add_collector(self, collect):
+        """collect() returns [(name, type, help, labelnames, [(label values, value)])]"""
+        self._collectors.append(collect)
+
+    def exposition(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines += metric.expose()
+        for collect in self._collectors:
+            try:
+                families = collect()
+            except Exception as e:
+                print(f"Error collecting metrics: {e}")
+                continue
+            for name, kind, help_text, labelnames, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{format_labels(labelnames, labels)} {format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+class RequestMetricsMiddleware:
+    """WSGI middleware recording request latency by route and status, and requests in flight
+
+    The route label is the template the app stores under ROUTE_KEY (raw paths
+    would make unbounded series); route_of(environ) names the others.
+    """
+
+    def __init__(self, app, duration, in_flight, route_of):
+        self.app = app
+        self.duration = duration
+        self.in_flight = in_flight
+        self.route_of = route_of
+
+    def __call__(self, environ, start_response):
+        if environ.get(RECORDED_KEY):
+            return self.app(environ, start_response)
+        started = time.perf_counter()
+        status = ['500']
+
+        def recording_start_response(status_line, headers, exc_info=None):
+            status[0] = status_line[:3]
+            return start_response(status_line, headers, exc_info)
+
+        self.in_flight.inc()
+        try:
+            result = self.app(environ, recording_start_response)
+        except BaseException:
+            self._record(environ, started, status[0])
+            raise
+        return self._record_after(result, environ, started, status)
+
+    def _record(self, environ, started, status):
+        self.in_flight.inc(amount=-1)
+        route = environ.get(ROUTE_KEY) or self.route_of(environ)
+        self.duration.observe(time.perf_counter() - started,
+                              (method_label(environ.get('REQUEST_METHOD')), route, status))
+
+    def _record_after(self, result, environ, started, status):
+        try:
+            yield from result
+        finally:
+            self._record(environ, started, status[0])
+            if hasattr(result, 'close'):
+                result.close()
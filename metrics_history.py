@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+In-memory metrics history: fixed-size ring buffers per series
+Each series keeps 1s, 1m and 1h downsampled tiers of avg/min/max
+Buckets cost 32 bytes and rings grow as they fill, so a series takes about
+160 KB after a day and 184 KB once its hourly tier is full (30 days); at
+the default MAX_SERIES that is at most about 370 MB.
+"""
+
+import fnmatch
+import math
+import threading
+from array import array
+
+# (step seconds, number of buckets kept)
+DEFAULT_TIERS = ((1, 3600), (60, 1440), (3600, 720))
+MAX_SERIES = 2000
+
+
+def match_names(names, patterns):
+    """Return the names matching any of the glob patterns (all when none given)"""
+    if not patterns:
+        return list(names)
+    return [name for name in names
+            if any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)]
+
+
+class RingTier:
+    """Fixed-capacity ring of (time, avg, min, max) buckets at one step, grown as it fills"""
+
+    __slots__ = ('step', 'capacity', 'times', 'avgs', 'mins', 'maxs', 'head', 'count',
+                 '_bucket', '_sum', '_n', '_min', '_max')
+
+    def __init__(self, step, capacity):
+        self.step = step
+        self.capacity = capacity
+        self.times = array('d')
+        self.avgs = array('d')
+        self.mins = array('d')
+        self.maxs = array('d')
+        self.head = 0
+        self.count = 0
+        self._bucket = None
+        self._sum = 0.0
+        self._n = 0
+        self._min = 0.0
+        self._max = 0.0
+
+    def add(self, timestamp, value):
+        """Fold a sample into the current bucket, closing it when the step rolls over"""
+        bucket = float(math.floor(timestamp / self.step) * self.step)
+        if bucket != self._bucket:
+            if self._bucket is not None and bucket < self._bucket:
+                return
+            self._flush()
+            self._bucket = bucket
+            self._sum = 0.0
+            self._n = 0
+            self._min = value
+            self._max = value
+        self._sum += value
+        self._n += 1
+        if value < self._min:
+            self._min = value
+        if value > self._max:
+            self._max = value
+
+    def _flush(self):
+        if self._bucket is None or not self._n:
+            return
+        i = self.head
+        if i == len(self.times):
+            # Still filling: the ring is as long as the buckets it holds
+            self.times.append(self._bucket)
+            self.avgs.append(self._sum / self._n)
+            self.mins.append(self._min)
+            self.maxs.append(self._max)
+        else:
+            self.times[i] = self._bucket
+            self.avgs[i] = self._sum / self._n
+            self.mins[i] = self._min
+            self.maxs[i] = self._max
+        self.head = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def retained_from(self):
+        """Return the earliest time this tier can still hold, or None if empty"""
+        if self._bucket is None:
+            return None
+        return self._bucket - self.step * self.capacity
+
+    def points(self, start, end):
+        """Return [time, avg, min, max] buckets overlapping start..end"""
+        points = []
+        first = start - self.step
+        for k in range(self.count):
+            i = (self.head - self.count + k) % self.capacity
+            t = self.times[i]
+            if first < t <= end:
+                points.append([t, self.avgs[i], self.mins[i], self.maxs[i]])
+        if self._bucket is not None and self._n and first < self._bucket <= end:
+            points.append([self._bucket, self._sum / self._n, self._min, self._max])
+        return points
+
+
+class TieredSeries:
+    """One metric series stored at several resolutions"""
+
+    def __init__(self, tiers=DEFAULT_TIERS):
+        self.tiers = [RingTier(step, capacity) for step, capacity in tiers]
+
+    def add(self, timestamp, value):
+        for tier in self.tiers:
+            tier.add(timestamp, value)
+
+    def select_tier(self, start, step):
+        """Pick the coarsest tier no coarser than step whose retention reaches start"""
+        covering = [tier for tier in self.tiers
+                     if tier.retained_from() is not None and tier.retained_from() <= start]
+        if not covering:
+            return self.tiers[-1]
+        fine = [tier for tier in covering if tier.step <= step]
+        return fine[-1] if fine else covering[0]
+
+    def query(self, start, end, step):
+        """Return (step, points) for a time range, re-bucketed to step if coarser"""
+        tier = self.select_tier(start, step)
+        points = tier.points(start, end)
+        if step <= tier.step:
+            return tier.step, points
+        merged = []
+        for t, avg, low, high in points:
+            bucket = math.floor(t / step) * step
+            if merged and merged[-1][0] == bucket:
+                last = merged[-1]
+                last[1] += avg
+                last[2] = min(last[2], low)
+                last[3] = max(last[3], high)
+                last[4] += 1
+            else:
+                merged.append([bucket, avg, low, high, 1])
+        return step, [[t, total / n, low, high] for t, total, low, high, n in merged]
+
+
+class MetricsHistory:
+    """Named tiered series with pattern-based queries"""
+
+    def __init__(self, tiers=DEFAULT_TIERS, max_series=MAX_SERIES):
+        self.tier_spec = tiers
+        self.max_series = max_series
+        self._lock = threading.Lock()
+        self._series = {}
+        self._dropped = 0
+
+    def record(self, timestamp, samples):
+        """Add one sample per series name from a {name: value} dict"""
+        with self._lock:
+            for name, value in samples.items():
+                series = self._series.get(name)
+                if series is None:
+                    if len(self._series) >= self.max_series:
+                        self._dropped += 1
+                        continue
+                    series = self._series[name] = TieredSeries(self.tier_spec)
+                series.add(timestamp, float(value))
+
+    def names(self, patterns=None):
+        """Return series names matching any of the glob patterns"""
+        with self._lock:
+            names = sorted(self._series)
+        return match_names(names, patterns)
+
+    def query(self, patterns, start, end, step):
+        """Return {name: {"step", "points"}} for matching series"""
+        result = {}
+        for name in self.names(patterns):
+            with self._lock:
+                actual_step, points = self._series[name].query(start, end, step)
+            result[name] = {"step": actual_step, "points": points}
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "series": len(self._series),
+                "droppedSeries": self._dropped,
+                "tiers": [{"step": step, "capacity": capacity} for step, capacity in self.tier_spec]
+            }
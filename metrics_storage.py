@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Durable metrics storage: append-only fixed-width segments read through mmap
+Layout: <root>/<quoted series name>/<segment start>.seg
+Each segment has a 16-byte header (magic, version, record count) followed
+by little-endian (timestamp, value) float64 pairs. Segments are mapped on
+demand and unmapped least-recently-used first, so open file descriptors stay
+bounded however many series there are. Unmapping does not msync: the kernel
+writes dirty pages back on its own, and flush() forces it (on a timer and at
+close), so evictions on the append path never wait for the disk.
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import quote, unquote
+
+MAGIC = b'5GMS'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sIQ')
+RECORD = struct.Struct('<dd')
+HEADER_SIZE = HEADER.size
+RECORD_SIZE = RECORD.size
+
+SEGMENT_SECONDS = 86400
+SEGMENT_RECORDS = 86400 + 1024
+RETENTION_SECONDS = 7 * 86400
+# Each mapping holds a file descriptor, so only this many segments stay mapped
+MAX_MAPPED_SEGMENTS = 256
+MAX_SERIES = 5000
+
+
+class Segment:
+    """One segment file, mapped only while in the storage's LRU of mapped segments"""
+
+    def __init__(self, path, start, writable):
+        self.path = path
+        self.start = start
+        self.writable = writable
+        self.map = None
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            magic, version, count = HEADER.unpack(f.read(HEADER_SIZE))
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"Not a metrics segment: {path}")
+            self.capacity = (size - HEADER_SIZE) // RECORD_SIZE
+            self.count = min(count, self.capacity)
+            self.last = None
+            if self.count:
+                f.seek(HEADER_SIZE + (self.count - 1) * RECORD_SIZE)
+                self.last = RECORD.unpack(f.read(RECORD_SIZE))[0]
+
+    @classmethod
+    def create(cls, path, start, capacity=SEGMENT_RECORDS):
+        """Create a preallocated (sparse) segment"""
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0))
+            f.truncate(HEADER_SIZE + capacity * RECORD_SIZE)
+        return cls(path, start, True)
+
+    def open(self):
+        """Map the file; the mapping holds the only file descriptor"""
+        with open(self.path, 'r+b' if self.writable else 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0,
+                                 access=mmap.ACCESS_WRITE if self.writable else mmap.ACCESS_READ)
+
+    def last_time(self):
+        return self.last
+
+    def append(self, timestamp, value):
+        """Append one record to the mapped segment; returns False when it is full"""
+        if self.count >= self.capacity:
+            return False
+        RECORD.pack_into(self.map, HEADER_SIZE + self.count * RECORD_SIZE, timestamp, value)
+        self.count += 1
+        self.last = timestamp
+        HEADER.pack_into(self.map, 0, MAGIC, FORMAT_VERSION, self.count)
+        return True
+
+    def values(self):
+        """Return a zero-copy float64 view of [t0, v0, t1, v1, ...]"""
+        used = HEADER_SIZE + self.count * RECORD_SIZE
+        return memoryview(self.map)[HEADER_SIZE:used].cast('d')
+
+    def range(self, start, end):
+        """Return a zero-copy view of the pairs with start <= t <= end"""
+        view = self.values()
+        lo = _bisect_time(view, self.count, start, False)
+        hi = _bisect_time(view, self.count, end, True)
+        return view[2 * lo:2 * hi]
+
+    def seal(self):
+        """Unmap and truncate unused preallocated space; the segment is read-only from now on"""
+        self.close()
+        with open(self.path, 'r+b') as f:
+            f.truncate(HEADER_SIZE + self.count * RECORD_SIZE)
+        self.writable = False
+        self.capacity = self.count
+
+    def flush(self):
+        """Write the mapped pages to disk (msync)"""
+        if self.map is not None and self.writable:
+            self.map.flush()
+
+    def close(self):
+        """Unmap; views handed out keep their own reference"""
+        if self.map is None:
+            return
+        try:
+            self.map.close()
+        except BufferError:
+            # A caller still holds a view; the mapping is released with it
+            pass
+        self.map = None
+
+
+def _bisect_time(view, count, timestamp, right):
+    """Binary search over the timestamps of a [t, v, ...] view"""
+    lo, hi = 0, count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        t = view[2 * mid]
+        if t < timestamp or (right and t == timestamp):
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+class MetricsStorage:
+    """Per-series segment files with rotation and retention"""
+
+    def __init__(self, root, segment_seconds=SEGMENT_SECONDS,
+                 segment_records=SEGMENT_RECORDS, retention=RETENTION_SECONDS,
+                 max_series=MAX_SERIES, max_mapped=MAX_MAPPED_SEGMENTS):
+        self.root = root
+        self.segment_seconds = segment_seconds
+        self.segment_records = segment_records
+        self.retention = retention
+        self.max_series = max_series
+        self.max_mapped = max_mapped
+        self._lock = threading.RLock()
+        self._series = {}
+        self._mapped = OrderedDict()
+        self._dropped = 0
+        self.open_ms = self._open()
+
+    def _map(self, segment):
+        """Map a segment for use, unmapping the least recently used beyond max_mapped"""
+        if segment.map is not None:
+            self._mapped.move_to_end(segment)
+            return
+        segment.open()
+        self._mapped[segment] = None
+        while len(self._mapped) > self.max_mapped:
+            evicted, _ = self._mapped.popitem(last=False)
+            evicted.close()
+
+    def _unmap(self, segment):
+        self._mapped.pop(segment, None)
+        segment.close()
+
+    def _open(self):
+        """Index every existing segment (read lazily); returns the time taken in ms"""
+        started = time.perf_counter()
+        os.makedirs(self.root, exist_ok=True)
+        for entry in os.scandir(self.root):
+            if not entry.is_dir():
+                continue
+            name = unquote(entry.name)
+            files = sorted(
+                (float(f.name[:-4]), f.path) for f in os.scandir(entry.path)
+                if f.name.endswith('.seg')
+            )
+            segments = []
+            for index, (start, path) in enumerate(files):
+                try:
+                    segments.append(Segment(path, start, index == len(files) - 1))
+                except (ValueError, OSError) as e:
+                    print(f"Skipping segment {path}: {e}")
+            if segments:
+                self._series[name] = segments
+        return round((time.perf_counter() - started) * 1000, 2)
+
+    def _series_dir(self, name):
+        return os.path.join(self.root, quote(name, safe=''))
+
+    def append(self, name, timestamp, value):
+        """Append one sample to a series (out-of-order samples are dropped)"""
+        with self._lock:
+            segments = self._series.get(name)
+            if segments is None and len(self._series) >= self.max_series:
+                self._dropped += 1
+                return False
+            active = segments[-1] if segments else None
+            if active is not None:
+                last = active.last_time()
+                if last is not None and timestamp <= last:
+                    return False
+            if (active is not None and active.writable
+                    and timestamp < active.start + self.segment_seconds
+                    and active.count < active.capacity):
+                self._map(active)
+                return active.append(timestamp, value)
+            if active is not None and active.writable:
+                self._unmap(active)
+                active.seal()
+            directory = self._series_dir(name)
+            os.makedirs(directory, exist_ok=True)
+            start = float(int(timestamp))
+            path = os.path.join(directory, f"{int(start)}.seg")
+            segment = Segment.create(path, start, self.segment_records)
+            # Only a series whose first segment exists is indexed
+            if segments is None:
+                segments = self._series[name] = []
+            segments.append(segment)
+            self._map(segment)
+            return segment.append(timestamp, value)
+
+    def append_many(self, timestamp, samples):
+        """Append one timestamped sample for each {name: value}"""
+        for name, value in samples.items():
+            self.append(name, timestamp, float(value))
+
+    def query(self, name, start, end):
+        """Return zero-copy [t, v, ...] views for a series between start and end"""
+        views = []
+        # Views are taken under the lock (seal/compact unmap segments); each
+        # keeps its mapping alive after that
+        with self._lock:
+            segments = self._series.get(name, ())
+            for index, segment in enumerate(segments):
+                next_start = segments[index + 1].start if index + 1 < len(segments) else None
+                if (not segment.count or segment.start > end or
+                        (next_start is not None and next_start <= start)):
+                    continue
+                self._map(segment)
+                view = segment.range(start, end)
+                if len(view):
+                    views.append(view)
+        return views
+
+    def names(self):
+        with self._lock:
+            return sorted(self._series)
+
+    def compact(self, now=None):
+        """Seal idle segments and delete segments past the retention period"""
+        now = time.time() if now is None else now
+        cutoff = now - self.retention
+        removed = 0
+        with self._lock:
+            for name, segments in list(self._series.items()):
+                active = segments[-1]
+                if active.writable and now >= active.start + self.segment_seconds:
+                    self._unmap(active)
+                    active.seal()
+                while segments:
+                    segment = segments[0]
+                    last = segment.last_time()
+                    if segment.writable or (last is not None and last >= cutoff):
+                        break
+                    self._unmap(segment)
+                    os.remove(segment.path)
+                    segments.pop(0)
+                    removed += 1
+                if not segments:
+                    del self._series[name]
+                    try:
+                        os.rmdir(self._series_dir(name))
+                    except OSError:
+                        pass
+        return removed
+
+    def flush(self):
+        """msync the mapped writable segments (unmapped ones are left to the kernel)"""
+        with self._lock:
+            for segment in self._mapped:
+                segment.flush()
+
+    def stats(self):
+        with self._lock:
+            segments = [s for series in self._series.values() for s in series]
+            return {
+                "series": len(self._series),
+                "segments": len(segments),
+                "records": sum(s.count for s in segments),
+                "mapped": len(self._mapped),
+                "dropped": self._dropped,
+                "openMs": self.open_ms,
+                "retentionSeconds": self.retention
+            }
+
+    def close(self):
+        with self._lock:
+            for segments in self._series.values():
+                for segment in segments:
+                    segment.flush()
+                    segment.close()
+            self._series.clear()
+            self._mapped.clear()
+
+
+def downsample(views, step):
+    """Bucket [t, v, ...] views into [[time, avg, min, max], ...] at step seconds"""
+    points = []
+    for view in views:
+        for i in range(0, len(view), 2):
+            t = view[i]
+            v = view[i + 1]
+            bucket = float(int(t // step) * step)
+            if points and points[-1][0] == bucket:
+                last = points[-1]
+                last[1] += v
+                last[2] = min(last[2], v)
+                last[3] = max(last[3], v)
+                last[4] += 1
+            else:
+                points.append([bucket, v, v, v, 1])
+    return [[t, total / n, low, high] for t, total, low, high, n in points]
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Per-instance network function metrics with precomputed load rankings
+Updated from one network-functions read per collection pass
+"""
+
+import threading
+
+NF_METRIC_FIELDS = (
+    'activeSessions', 'activePduSessions', 'activeUsers', 'throughput',
+    'packetLoss', 'cpuUtilization', 'memoryUtilization'
+)
+
+# Fields combined into the load score (percent utilization)
+LOAD_FIELDS = ('cpuUtilization', 'memoryUtilization')
+
+
+def iter_instances(nf_data):
+    """Yield (nf type, instance id, instance dict) for every NF instance"""
+    for nf_type, instances in nf_data.items():
+        if not isinstance(instances, list):
+            continue
+        for index, instance in enumerate(instances):
+            if not isinstance(instance, dict):
+                continue
+            instance_id = instance.get('id') or instance.get('name') or f"{nf_type}-{index}"
+            yield nf_type, str(instance_id), instance
+
+
+def instance_metrics(instance):
+    """Return the numeric metric fields of one NF instance"""
+    metrics = {}
+    for field in NF_METRIC_FIELDS:
+        value = instance.get(field)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[field] = value
+    return metrics
+
+
+def load_score(metrics):
+    """Return the load score of an instance: its highest utilization percentage"""
+    values = [metrics[field] for field in LOAD_FIELDS if field in metrics]
+    return max(values) if values else None
+
+
+class NfMetrics:
+    """Latest per-instance metrics, grouped by NF type and ranked per metric"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._groups = {}
+        self._rankings = {}
+        self.updated = None
+
+    def update(self, timestamp, nf_data):
+        """Rebuild instance records and rankings from a network-functions payload"""
+        groups = {}
+        for nf_type, instance_id, instance in iter_instances(nf_data):
+            metrics = instance_metrics(instance)
+            groups.setdefault(nf_type, {})[instance_id] = {
+                "type": nf_type,
+                "id": instance_id,
+                "name": instance.get('name', instance_id),
+                "status": instance.get('status'),
+                "load": load_score(metrics),
+                "metrics": metrics
+            }
+
+        rankings = {}
+        for nf_type, instances in groups.items():
+            fields = {'load'}
+            for record in instances.values():
+                fields.update(record["metrics"])
+            rankings[nf_type] = {}
+            for field in fields:
+                ranked = sorted(
+                    (record for record in instances.values() if self._value(record, field) is not None),
+                    key=lambda record: self._value(record, field),
+                    reverse=True
+                )
+                rankings[nf_type][field] = [record["id"] for record in ranked]
+                if field == 'load':
+                    for rank, record in enumerate(ranked, 1):
+                        record["loadRank"] = rank
+
+        with self._lock:
+            self._groups = groups
+            self._rankings = rankings
+            self.updated = timestamp
+
+    @staticmethod
+    def _value(record, field):
+        return record["load"] if field == 'load' else record["metrics"].get(field)
+
+    def types(self):
+        with self._lock:
+            return {nf_type: len(instances) for nf_type, instances in self._groups.items()}
+
+    def instance(self, nf_type, instance_id):
+        """Return one instance record, or None"""
+        with self._lock:
+            return self._groups.get(nf_type, {}).get(instance_id)
+
+    def group(self, nf_type, sort='load', descending=True, limit=None):
+        """Return the instances of one NF type ordered by a precomputed ranking
+
+        Returns None for an unknown type and raises KeyError for an unknown sort field.
+        """
+        with self._lock:
+            instances = self._groups.get(nf_type)
+            if instances is None:
+                return None
+            order = self._rankings[nf_type].get(sort)
+            if order is None:
+                raise KeyError(sort)
+            if not descending:
+                order = order[::-1]
+            if limit is not None:
+                order = order[:limit]
+            return [instances[instance_id] for instance_id in order]
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+TTL response cache with LRU eviction and stale-while-revalidate
+Sits in front of the RESTCONF fetches made by the web dashboard
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheEntry:
+    """Cached value with its freshness deadlines"""
+
+    __slots__ = ('value', 'fresh_until', 'stale_until')
+
+    def __init__(self, value, fresh_until, stale_until):
+        self.value = value
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+class ResponseCache:
+    """Bounded LRU cache with per-key TTLs and background revalidation"""
+
+    def __init__(self, max_entries=128, default_ttl=5, ttls=None, stale_ttl=30):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.ttls = dict(ttls or {})
+        self.stale_ttl = stale_ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._tasks = set()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "staleHits": 0,
+            "refreshes": 0,
+            "refreshErrors": 0,
+            "evictions": 0,
+        }
+        self._key_stats = {}
+
+    def ttl_for(self, key):
+        """Return the freshness TTL for a key (falls back to its path without query)"""
+        ttl = self.ttls.get(key)
+        if ttl is None:
+            ttl = self.ttls.get(str(key).split('?', 1)[0], self.default_ttl)
+        return ttl
+
+    def _lookup(self, key):
+        """Return (found, value, revalidate) for key and count the hit or miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            key_stats = self._key_stats.setdefault(
+                str(key).split('?', 1)[0], {"hits": 0, "misses": 0, "staleHits": 0}
+            )
+            if entry is not None and now < entry.fresh_until:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                key_stats["hits"] += 1
+                return True, entry.value, False
+            if entry is not None and now < entry.stale_until:
+                self._entries.move_to_end(key)
+                self._stats["staleHits"] += 1
+                key_stats["staleHits"] += 1
+                revalidate = key not in self._refreshing
+                self._refreshing.add(key)
+                return True, entry.value, revalidate
+            self._stats["misses"] += 1
+            key_stats["misses"] += 1
+        return False, None, False
+
+    def get(self, key, loader):
+        """Return the cached value for key, loading it with loader() on a miss"""
+        found, value, revalidate = self._lookup(key)
+        if revalidate:
+            threading.Thread(target=self._revalidate, args=(key, loader), daemon=True).start()
+        if found:
+            return value
+        value = loader()
+        self.put(key, value)
+        return value
+
+    async def get_async(self, key, loader):
+        """Like get(), for a coroutine loader; stale entries are refreshed in a task"""
+        found, value, revalidate = self._lookup(key)
+        if revalidate:
+            task = asyncio.ensure_future(self._revalidate_async(key, loader))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        if found:
+            return value
+        value = await loader()
+        self.put(key, value)
+        return value
+
+    def _revalidate(self, key, loader):
+        """Refresh a stale entry in the background"""
+        try:
+            value = loader()
+        except Exception as e:
+            self._refreshed(key, error=e)
+        else:
+            self._refreshed(key, value)
+
+    async def _revalidate_async(self, key, loader):
+        try:
+            value = await loader()
+        except Exception as e:
+            self._refreshed(key, error=e)
+        else:
+            self._refreshed(key, value)
+
+    def _refreshed(self, key, value=None, error=None):
+        if error is not None:
+            print(f"Error refreshing {key}: {error}")
+        else:
+            self.put(key, value)
+        with self._lock:
+            self._stats["refreshErrors" if error is not None else "refreshes"] += 1
+            self._refreshing.discard(key)
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entries if full"""
+        now = time.monotonic()
+        ttl = self.ttl_for(key)
+        entry = CacheEntry(value, now + ttl, now + ttl + self.stale_ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, key=None):
+        """Drop one key, or the whole cache when key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """Return hit/miss counters overall and per endpoint"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+            stats["maxEntries"] = self.max_entries
+            stats["keys"] = {
+                key: dict(counts, ttl=self.ttl_for(key))
+                for key, counts in self._key_stats.items()
+            }
+        return stats
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Pre-encoded JSON response bodies with gzip/brotli variants and strong ETags
+Each cached payload is serialized and compressed once, then reused
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def dumps_bytes(data):
+    """Serialize data to JSON bytes with the fastest available backend"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data)
+        except TypeError:
+            pass
+    return json.dumps(data, separators=(',', ':')).encode()
+
+
+def variant_etag(etag, encoding):
+    """Strong ETag of one content coding of a body (RFC 9110: it must differ per coding)"""
+    return etag if encoding == 'identity' else f"{etag}-{encoding}"
+
+
+def json_backend():
+    """Return the name of the JSON backend in use"""
+    return 'orjson' if orjson is not None else 'json'
+
+
+class EncodedBody:
+    """One serialized payload with its ETag and lazily built compressed variants"""
+
+    __slots__ = ('body', 'etag', '_variants', '_lock')
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self._variants = {'identity': body}
+        self._lock = threading.Lock()
+
+    def variant(self, encoding):
+        """Return the body in the given content encoding, compressing it once"""
+        body = self._variants.get(encoding)
+        if body is not None:
+            return body
+        with self._lock:
+            body = self._variants.get(encoding)
+            if body is None:
+                if encoding == 'br':
+                    body = brotli.compress(self.body, quality=BROTLI_QUALITY)
+                elif encoding == 'gzip':
+                    body = gzip.compress(self.body, compresslevel=GZIP_LEVEL, mtime=0)
+                else:
+                    raise ValueError(f"Unsupported encoding: {encoding}")
+                self._variants[encoding] = body
+        return body
+
+    def variant_etag(self, encoding):
+        return variant_etag(self.etag, encoding)
+
+    def negotiate(self, accept_encodings):
+        """Pick the best encoding the client accepts for this body"""
+        if len(self.body) < COMPRESS_MIN_SIZE:
+            return 'identity'
+        if brotli is not None and 'br' in accept_encodings:
+            return 'br'
+        if 'gzip' in accept_encodings:
+            return 'gzip'
+        return 'identity'
+
+    def size(self):
+        return sum(len(body) for body in self._variants.values())
+
+
+class BodyEncoder:
+    """Memoizes the encoded body of each cached payload by key"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bodies = {}
+        self._stats = {"encodes": 0, "reuses": 0}
+
+    def encode(self, key, payload):
+        """Return the EncodedBody for payload, reusing it while payload is unchanged"""
+        with self._lock:
+            cached = self._bodies.get(key)
+            if cached is not None and cached[0] is payload:
+                self._stats["reuses"] += 1
+                return cached[1]
+        encoded = EncodedBody(dumps_bytes(payload))
+        with self._lock:
+            self._bodies[key] = (payload, encoded)
+            self._stats["encodes"] += 1
+        return encoded
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["bodies"] = len(self._bodies)
+            stats["bytes"] = sum(encoded.size() for _, encoded in self._bodies.values())
+            stats["backend"] = json_backend()
+            stats["brotli"] = brotli is not None
+        return stats
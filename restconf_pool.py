@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Persistent keep-alive HTTP connection pool for the RESTCONF API
+Shared by every dashboard route so polling does not open a new socket per call
+"""
+
+import http.client
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+# Errors that mean a pooled keep-alive connection was closed by the server
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection slot frees up before the timeout"""
+
+
+class RestconfConnectionPool:
+    """Thread-safe pool of keep-alive HTTP connections keyed by host
+
+    pool_size caps the idle connections kept across all hosts; connections
+    in use are limited per host by max_per_host (further callers wait).
+    """
+
+    def __init__(self, pool_size=10, max_per_host=4, timeout=2):
+        self.pool_size = pool_size
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self._lock = threading.Condition()
+        self._idle = {}
+        self._in_use = {}
+        self._idle_total = 0
+        self._stats = {
+            "requests": 0,
+            "hits": 0,
+            "newConnections": 0,
+            "waits": 0,
+            "retries": 0,
+            "discarded": 0,
+            "errors": 0,
+        }
+
+    def _acquire(self, scheme, host, port, timeout):
+        """Take an idle connection or open a new one within the per-host limit"""
+        key = (scheme, host, port)
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            waited = False
+            while True:
+                idle = self._idle.get(key)
+                if idle:
+                    conn = idle.pop()
+                    self._idle_total -= 1
+                    self._in_use[key] = self._in_use.get(key, 0) + 1
+                    self._stats["hits"] += 1
+                    return conn, True
+                if self._in_use.get(key, 0) < self.max_per_host:
+                    self._in_use[key] = self._in_use.get(key, 0) + 1
+                    break
+                if not waited:
+                    self._stats["waits"] += 1
+                    waited = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(f"No free connection to {host}:{port}")
+                self._lock.wait(remaining)
+        return self._connect(scheme, host, port, timeout), False
+
+    def _connect(self, scheme, host, port, timeout):
+        """Open a new connection (counted as a miss)"""
+        with self._lock:
+            self._stats["newConnections"] += 1
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout)
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _release(self, key, conn, reusable):
+        """Return a connection to the idle set, or drop it"""
+        with self._lock:
+            self._in_use[key] -= 1
+            if reusable and self._idle_total < self.pool_size:
+                self._idle.setdefault(key, deque()).append(conn)
+                self._idle_total += 1
+                conn = None
+            elif reusable:
+                self._stats["discarded"] += 1
+            self._lock.notify()
+        if conn is not None:
+            conn.close()
+
+    def request(self, method, url, headers=None, timeout=None):
+        """Send a request and return (status, headers, body bytes)
+
+        timeout overrides the pool timeout for this request (connection wait,
+        connect and each socket read).
+        """
+        timeout = timeout or self.timeout
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        host = parts.hostname
+        port = parts.port or (443 if scheme == "https" else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        key = (scheme, host, port)
+
+        with self._lock:
+            self._stats["requests"] += 1
+        conn, reused = self._acquire(scheme, host, port, timeout)
+        try:
+            try:
+                response = self._send(conn, method, path, headers, timeout)
+            except STALE_CONNECTION_ERRORS:
+                if not reused:
+                    raise
+                # Server closed the idle keep-alive socket; retry once on a fresh one
+                conn.close()
+                with self._lock:
+                    self._stats["retries"] += 1
+                conn = self._connect(scheme, host, port, timeout)
+                response = self._send(conn, method, path, headers, timeout)
+        except Exception:
+            with self._lock:
+                self._stats["errors"] += 1
+            self._release(key, conn, False)
+            raise
+        status, resp_headers, body, keep_alive = response
+        self._release(key, conn, keep_alive)
+        return status, resp_headers, body
+
+    def _send(self, conn, method, path, headers, timeout):
+        """Issue one request on a connection; returns (status, headers, body, keep-alive)
+
+        http.client decides keep-alive (HTTP version, Connection header, a body
+        read to EOF) and has already closed the socket when it will not be reused.
+        """
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        conn.request(method, path, headers=headers or {})
+        response = conn.getresponse()
+        body = response.read()
+        return response.status, response.headers, body, not response.will_close
+
+    def stats(self):
+        """Return pool counters and current occupancy"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["idle"] = self._idle_total
+            stats["inUse"] = sum(self._in_use.values())
+            stats["poolSize"] = self.pool_size
+            stats["maxPerHost"] = self.max_per_host
+        return stats
+
+    def close(self):
+        """Close all idle connections"""
+        with self._lock:
+            idle = [conn for conns in self._idle.values() for conn in conns]
+            self._idle.clear()
+            self._idle_total = 0
+        for conn in idle:
+            conn.close()
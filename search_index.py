@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Prefix search index for subscriber lookup by IMSI, MSISDN and DNN
+Sorted (term, id) pairs held in bounded chunks so updates stay incremental
+"""
+
+import base64
+import json
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+CHUNK_SIZE = 1024
+
+SEARCH_FIELDS = ('imsi', 'msisdn', 'dnn')
+
+
+class SortedTermIndex:
+    """Sorted list of (term, id) pairs split into chunks of at most 2 * CHUNK_SIZE"""
+
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self._chunks = []
+        self._maxes = []
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def bulk_load(self, pairs):
+        """Replace the contents with pairs (sorted once, then chunked)"""
+        pairs = sorted(pairs)
+        size = self.chunk_size
+        self._chunks = [pairs[i:i + size] for i in range(0, len(pairs), size)]
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+        self._size = len(pairs)
+
+    def add(self, term, record_id):
+        """Insert one pair"""
+        item = (term, record_id)
+        if not self._chunks:
+            self._chunks.append([item])
+            self._maxes.append(item)
+            self._size = 1
+            return
+        pos = bisect_left(self._maxes, item)
+        if pos == len(self._maxes):
+            pos -= 1
+            self._chunks[pos].append(item)
+            self._maxes[pos] = item
+        else:
+            insort(self._chunks[pos], item)
+        self._size += 1
+
+        chunk = self._chunks[pos]
+        if len(chunk) > 2 * self.chunk_size:
+            half = len(chunk) // 2
+            self._chunks[pos:pos + 1] = [chunk[:half], chunk[half:]]
+            self._maxes[pos:pos + 1] = [chunk[half - 1], chunk[-1]]
+
+    def remove(self, term, record_id):
+        """Delete one pair if present"""
+        item = (term, record_id)
+        pos = bisect_left(self._maxes, item)
+        if pos == len(self._maxes):
+            return False
+        chunk = self._chunks[pos]
+        index = bisect_left(chunk, item)
+        if index == len(chunk) or chunk[index] != item:
+            return False
+        del chunk[index]
+        self._size -= 1
+        if not chunk:
+            del self._chunks[pos]
+            del self._maxes[pos]
+        elif index == len(chunk):
+            self._maxes[pos] = chunk[-1]
+        return True
+
+    def prefix(self, prefix, limit, after=None):
+        """Return up to limit pairs whose term starts with prefix, after a given pair"""
+        if after is not None and after[0] >= prefix:
+            start, find = after, bisect_right
+        else:
+            start, find = (prefix,), bisect_left
+        pos = bisect_left(self._maxes, start)
+        results = []
+        while pos < len(self._chunks) and len(results) < limit:
+            chunk = self._chunks[pos]
+            index = find(chunk, start)
+            for item in chunk[index:]:
+                if not item[0].startswith(prefix):
+                    return results
+                results.append(item)
+                if len(results) >= limit:
+                    return results
+            pos += 1
+        return results
+
+
+def subscriber_terms(entry):
+    """Return the (imsi, msisdn, dnn) search terms of a subscriber entry"""
+    imsi = entry.get('imsi') or entry.get('supi') or ''
+    imsi = str(imsi)
+    if imsi.startswith('imsi-'):
+        imsi = imsi[len('imsi-'):]
+    msisdn = str(entry.get('msisdn') or entry.get('gpsi') or '')
+    if msisdn.startswith('msisdn-'):
+        msisdn = msisdn[len('msisdn-'):]
+    dnn = str(entry.get('dnn') or entry.get('apn') or '').lower()
+    return imsi, msisdn, dnn
+
+
+class SubscriberSearchIndex:
+    """Per-field prefix indexes over subscribers, updated from dataset changes"""
+
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        self._lock = threading.RLock()
+        self._indexes = {field: SortedTermIndex(chunk_size) for field in SEARCH_FIELDS}
+        self._terms = {}
+
+    def apply(self, changes):
+        """Apply [(id, op, entry)] changes from a VersionedDataset"""
+        with self._lock:
+            if not self._terms and all(op == 'add' for _, op, _ in changes):
+                self._bulk_load(changes)
+                return
+            for record_id, op, entry in changes:
+                old = self._terms.pop(record_id, None)
+                if old is not None:
+                    for field, term in zip(SEARCH_FIELDS, old):
+                        if term:
+                            self._indexes[field].remove(term, record_id)
+                if op != 'remove' and isinstance(entry, dict):
+                    terms = subscriber_terms(entry)
+                    self._terms[record_id] = terms
+                    for field, term in zip(SEARCH_FIELDS, terms):
+                        if term:
+                            self._indexes[field].add(term, record_id)
+
+    def _bulk_load(self, changes):
+        """Build all indexes at once from an initial full load"""
+        pairs = {field: [] for field in SEARCH_FIELDS}
+        for record_id, _, entry in changes:
+            if not isinstance(entry, dict):
+                continue
+            terms = subscriber_terms(entry)
+            self._terms[record_id] = terms
+            for field, term in zip(SEARCH_FIELDS, terms):
+                if term:
+                    pairs[field].append((term, record_id))
+        for field, field_pairs in pairs.items():
+            self._indexes[field].bulk_load(field_pairs)
+
+    def search(self, query, fields=SEARCH_FIELDS, limit=20, cursor=None):
+        """Return (matches, next_cursor) for a prefix across fields in order
+
+        Each match is (field, term, id). A cursor is (field, term, id) of the
+        last match returned and resumes right after it.
+        """
+        query = query.lower()
+        matches = []
+        with self._lock:
+            started = cursor is None
+            for field in fields:
+                after = None
+                if not started:
+                    if field != cursor[0]:
+                        continue
+                    started = True
+                    after = (cursor[1], cursor[2])
+                for term, record_id in self._indexes[field].prefix(query, limit - len(matches) + 1, after):
+                    matches.append((field, term, record_id))
+                if len(matches) > limit:
+                    break
+        next_cursor = matches[limit - 1] if len(matches) > limit else None
+        return matches[:limit], next_cursor
+
+    def stats(self):
+        with self._lock:
+            return {field: len(index) for field, index in self._indexes.items()}
+
+
+def encode_search_cursor(match):
+    """Encode a (field, term, id) match as an opaque cursor"""
+    return base64.urlsafe_b64encode(json.dumps(list(match)).encode()).decode().rstrip('=')
+
+
+def decode_search_cursor(cursor):
+    """Decode a search cursor, raising ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        field, term, record_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if field not in SEARCH_FIELDS:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return field, term, record_id
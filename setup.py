@@ -31,6 +31,11 @@ setup(
         "flask",
         "pysnmp",
     ],
+    extras_require={
+        "fast": ["orjson", "brotli"],
+        "analytics": ["numpy"],
+        "asgi": ["uvicorn"],
+    },
     entry_points={
         "console_scripts": [
             "5g-prototype-install=install_dependencies:main",
@@ -1,40 +1,199 @@
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import time
+
 from pysnmp.entity import engine, config
 from pysnmp.entity.rfc3413 import cmdrsp, context
 from pysnmp.carrier.asyncore.dgram import udp
 from pysnmp.carrier.asyncore.dispatch import AsyncoreDispatcher
 
-# Create SNMP engine
-snmpEngine = engine.SnmpEngine()
-
-# Transport setup
-config.addTransport(
-    snmpEngine,
-    udp.domainName,
-    udp.UdpTransport().openServerMode(('localhost', 161))
+from dataset_versions import find_list
+from restconf_pool import RestconfConnectionPool
+from snmp_mib import (
+    ENTERPRISE_OID, SCALARS_OID, NF_ENTRY_OID, SUBSCRIBER_ENTRY_OID, SESSION_ENTRY_OID,
+    PROVIDER_ENTRY_OID, build_scalars, build_nf_table, build_subscriber_table,
+    build_session_table, build_provider_table
 )
+from snmp_providers import ProviderMib, SubtreeProvider, pinned_responder
+from snmp_asyncio import AsyncioUdpTransport
+from snmp_shared import SharedMib, write_shared_mib
 
-# SNMPv2c setup
-config.addV1System(snmpEngine, 'test-agent', 'public')
+SNMP_AGENT_ADDRESS = ('localhost', 161)
+
+# RESTCONF source of the 5G MIB tables
+RESTCONF_BASE = "http://localhost:830/restconf/data"
+RESTCONF_TIMEOUT = 2
+
+# Seconds each table stays fresh, and how long a stale copy is served while
+# it is refreshed in the background
+MIB_TTLS = {
+    'nfTable': 5,
+    'subscriberTable': 10,
+    'sessionTable': 3,
+}
+MIB_STALE_TTL = 30
+
+# Multi-worker mode: the leader refreshes the tables and publishes the MIB
+# to a file that every worker maps read-only
+SHARED_MIB_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+SHARED_PUBLISH_INTERVAL = 1
+
+
+def create_provider_mib(restconf_base=RESTCONF_BASE):
+    """Provider-backed 5G MIB: each table is one cached whole-list RESTCONF read"""
+    restconf_pool = RestconfConnectionPool(pool_size=4, max_per_host=4, timeout=RESTCONF_TIMEOUT)
+
+    def load_restconf_data(endpoint):
+        """Fetch data from RESTCONF API, raising on failure"""
+        status, _, body = restconf_pool.request(
+            'GET', f"{restconf_base}/{endpoint}", {'Accept': 'application/json'}
+        )
+        if status >= 400:
+            raise Exception(f"HTTP Error {status}")
+        return json.loads(body.decode())
+
+    def load_counts():
+        """Scalar counts, derived from the table snapshots of the current PDU"""
+        nfs = mib.subtree_index('nfTable').summary
+        subscribers = mib.subtree_index('subscriberTable').summary
+        sessions = mib.subtree_index('sessionTable').summary
+        return (nfs.get('rows'), subscribers.get('rows'), sessions.get('rows'),
+                subscribers.get('active'))
+
+    mib = ProviderMib([
+        SubtreeProvider('scalars', SCALARS_OID, load_counts,
+                        lambda counts: build_scalars(*counts)),
+        SubtreeProvider('nfTable', NF_ENTRY_OID, lambda: load_restconf_data('network-functions'),
+                        build_nf_table, MIB_TTLS['nfTable']),
+        SubtreeProvider('subscriberTable', SUBSCRIBER_ENTRY_OID,
+                        lambda: find_list(load_restconf_data('subscribers'), 'subscribers'),
+                        build_subscriber_table, MIB_TTLS['subscriberTable']),
+        SubtreeProvider('sessionTable', SESSION_ENTRY_OID,
+                        lambda: find_list(load_restconf_data('sessions'), 'sessions'),
+                        build_session_table, MIB_TTLS['sessionTable']),
+        SubtreeProvider('agentProviderTable', PROVIDER_ENTRY_OID, lambda: mib.stats(),
+                        build_provider_table),
+    ], stale_ttl=MIB_STALE_TTL)
+    return mib
+
+
+def create_engine(mib, address=SNMP_AGENT_ADDRESS, transport='asyncore', reuse_port=False):
+    """SNMPv2c engine serving mib on a UDP address with the asyncore or asyncio carrier"""
+    snmpEngine = engine.SnmpEngine()
+
+    # Transport setup
+    if transport == 'asyncio':
+        server = AsyncioUdpTransport().openServerMode(address, reuse_port=reuse_port)
+        config.addTransport(snmpEngine, udp.domainName, server)
+    else:
+        config.addTransport(snmpEngine, udp.domainName, udp.UdpTransport().openServerMode(address))
+
+    # SNMPv2c setup
+    config.addV1System(snmpEngine, 'test-agent', 'public')
+
+    config.addTargetParams(
+        snmpEngine, 'test-params', 'test-agent', 'noAuthNoPriv', 1
+    )
+
+    # Allow the v2c community to read the 5G MIB subtree
+    config.addVacmUser(
+        snmpEngine, 2, 'test-agent', 'noAuthNoPriv', readSubTree=ENTERPRISE_OID
+    )
+
+    # Create SNMP context served from the 5G MIB
+    snmpContext = context.SnmpContext(snmpEngine)
+    snmpContext.unregisterContextName(b'')
+    snmpContext.registerContextName(b'', mib)
+
+    # Register SNMP applications (each PDU reads one pinned set of snapshots)
+    pinned_responder(cmdrsp.GetCommandResponder)(snmpEngine, snmpContext)
+    pinned_responder(cmdrsp.SetCommandResponder)(snmpEngine, snmpContext)
+    pinned_responder(cmdrsp.NextCommandResponder)(snmpEngine, snmpContext)
+    pinned_responder(cmdrsp.BulkCommandResponder)(snmpEngine, snmpContext)
+    return snmpEngine
+
+
+def run_engine(snmpEngine):
+    """Run the dispatcher (the job keeps it serving until interrupted)"""
+    snmpEngine.transportDispatcher.jobStarted(1)
+    try:
+        snmpEngine.transportDispatcher.runDispatcher()
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+        snmpEngine.transportDispatcher.closeDispatcher()
+
+
+def run_worker(address, path):
+    """Worker process: asyncio agent on a shared SO_REUSEPORT socket"""
+    leader = os.getppid()
+    snmpEngine = create_engine(SharedMib(path), address, 'asyncio', reuse_port=True)
+
+    def check_leader(timeNow):
+        # Exit with the leader rather than keep serving an orphaned snapshot
+        if os.getppid() != leader:
+            snmpEngine.transportDispatcher.loop.stop()
+
+    snmpEngine.transportDispatcher.registerTimerCbFun(check_leader)
+    run_engine(snmpEngine)
+
+
+def publish_mib(mib, path, interval=SHARED_PUBLISH_INTERVAL):
+    """Leader loop: publish the merged MIB whenever a table snapshot changes"""
+    published = None
+    while True:
+        with mib.pinned():
+            tables = tuple(mib.subtree_index(name) for name in MIB_TTLS)
+            if tables != published:
+                write_shared_mib(path, mib.merged_index())
+                published = tables
+        time.sleep(interval)
 
-config.addTargetParams(
-    snmpEngine, 'test-params', 'test-agent', 'noAuthNoPriv', 1
-)
 
-# Create SNMP context
-snmpContext = context.SnmpContext(snmpEngine)
+def run_workers(count, address, restconf_base=RESTCONF_BASE):
+    """Leader plus count worker processes bound to the same UDP port"""
+    path = os.path.join(SHARED_MIB_DIR, f"5g-snmp-mib-{address[1]}")
+    mib = create_provider_mib(restconf_base)
+    workers = [
+        multiprocessing.Process(target=run_worker, args=(address, path),
+                                name=f"snmp-worker-{i}", daemon=True)
+        for i in range(count)
+    ]
+    for worker in workers:
+        worker.start()
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"SNMP agent on {address[0]}:{address[1]} with {count} workers (shared MIB {path})")
+    try:
+        publish_mib(mib, path)
+    except (KeyboardInterrupt, SystemExit):
+        print("\nShutting down...")
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.join()
 
-# Register SNMP applications
-cmdrsp.GetCommandResponder(snmpEngine, snmpContext)
-cmdrsp.SetCommandResponder(snmpEngine, snmpContext)
-cmdrsp.NextCommandResponder(snmpEngine, snmpContext)
-cmdrsp.BulkCommandResponder(snmpEngine, snmpContext)
 
-print("SNMP engine initialized")
-print("Transport dispatcher:", snmpEngine.transportDispatcher)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='5G core SNMP agent')
+    parser.add_argument('--host', default=SNMP_AGENT_ADDRESS[0])
+    parser.add_argument('--port', type=int, default=SNMP_AGENT_ADDRESS[1])
+    parser.add_argument('--transport', choices=('asyncore', 'asyncio'), default='asyncore',
+                        help='carrier for the single-process agent')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='run N asyncio worker processes sharing the port (SO_REUSEPORT)')
+    parser.add_argument('--restconf', default=RESTCONF_BASE, help='RESTCONF data URL')
+    args = parser.parse_args()
+    address = (args.host, args.port)
 
-# Run the dispatcher
-try:
-    snmpEngine.transportDispatcher.runDispatcher()
-except KeyboardInterrupt:
-    print("\nShutting down...")
-    snmpEngine.transportDispatcher.closeDispatcher()
\ No newline at end of file
+    if args.workers > 0:
+        run_workers(args.workers, address, args.restconf)
+    else:
+        snmpEngine = create_engine(create_provider_mib(args.restconf), address, args.transport)
+        print("SNMP engine initialized")
+        print("Transport dispatcher:", snmpEngine.transportDispatcher)
+        run_engine(snmpEngine)
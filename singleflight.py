@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Single-flight request coalescing
+Concurrent callers asking for the same key share one upstream call
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+
+
+class _Flight:
+    """One in-progress call and the callers waiting on it"""
+
+    __slots__ = ('event', 'future', 'result', 'error', 'callers', 'started')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.future = None
+        self.result = None
+        self.error = None
+        self.callers = 1
+        self.started = time.monotonic()
+
+
+class SingleFlight:
+    """Run at most one call per key at a time and share its outcome"""
+
+    def __init__(self, history_size=100):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._history = deque(maxlen=history_size)
+        self._stats = {
+            "flights": 0,
+            "coalesced": 0,
+            "errors": 0,
+            "maxCallers": 0,
+        }
+
+    def do(self, key, fn):
+        """Return fn() for key, joining an in-flight call if there is one"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.callers += 1
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                flight = self._flights[key] = _Flight()
+                self._stats["flights"] += 1
+                leader = True
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+        except Exception as e:
+            flight.error = e
+        finally:
+            self._finish(key, flight)
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def _finish(self, key, flight):
+        """Retire a flight, record it and wake the callers waiting on it"""
+        with self._lock:
+            del self._flights[key]
+            if flight.error is not None:
+                self._stats["errors"] += 1
+            self._stats["maxCallers"] = max(self._stats["maxCallers"], flight.callers)
+            self._history.append({
+                "key": str(key),
+                "callers": flight.callers,
+                "durationMs": round((time.monotonic() - flight.started) * 1000, 2),
+                "error": str(flight.error) if flight.error is not None else None
+            })
+        flight.event.set()
+        if flight.future is not None and not flight.future.done():
+            flight.future.set_result(None)
+
+    async def do_async(self, key, fn):
+        """Coroutine version of do(): shares flights with threads calling do()"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.callers += 1
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                flight = self._flights[key] = _Flight()
+                flight.future = asyncio.get_running_loop().create_future()
+                self._stats["flights"] += 1
+                leader = True
+
+        if not leader:
+            if flight.future is None:
+                # Joined a thread's flight: wait for it off the event loop
+                await asyncio.get_running_loop().run_in_executor(None, flight.event.wait)
+            else:
+                await asyncio.shield(flight.future)
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = await fn()
+        except Exception as e:
+            flight.error = e
+        except asyncio.CancelledError:
+            flight.error = RuntimeError(f"Call for {key} was cancelled")
+            raise
+        finally:
+            self._finish(key, flight)
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def stats(self):
+        """Return coalescing counters and the most recent flights"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["inFlight"] = len(self._flights)
+            stats["recent"] = list(self._history)
+        return stats
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+asyncio UDP carrier for pysnmp command responders
+pysnmp 4.4's own asyncio carrier relies on asyncio.coroutine, which no longer
+exists on current Python; this implements the same transport/dispatcher API
+on a plain asyncio datagram endpoint, with optional SO_REUSEPORT so several
+worker processes can serve one port.
+"""
+
+import asyncio
+import socket
+import time
+
+from pysnmp.carrier.base import AbstractTransport, AbstractTransportDispatcher
+from pysnmp.carrier.asyncore.dgram.udp import UdpTransportAddress, domainName
+
+# Kernel receive buffer per socket: absorbs request bursts from many pollers
+RECEIVE_BUFFER = 4 * 1024 * 1024
+
+
+class AsyncioUdpDispatcher(AbstractTransportDispatcher):
+    """Transport dispatcher driven by the event loop of its transport"""
+
+    def __init__(self):
+        AbstractTransportDispatcher.__init__(self)
+        self.loop = None
+        self._timer = None
+
+    def registerTransport(self, tDomain, transport):
+        AbstractTransportDispatcher.registerTransport(self, tDomain, transport)
+        self.loop = transport.loop
+
+    def _tick(self):
+        self.handleTimerTick(time.time())
+        self._timer = self.loop.call_later(self.getTimerResolution(), self._tick)
+
+    def runDispatcher(self, timeout=0.0):
+        self._tick()
+        self.loop.run_forever()
+
+    def closeDispatcher(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        AbstractTransportDispatcher.closeDispatcher(self)
+
+
+class AsyncioUdpTransport(asyncio.DatagramProtocol, AbstractTransport):
+    """UDP server transport on an asyncio datagram endpoint"""
+
+    protoTransportDispatcher = AsyncioUdpDispatcher
+    addressType = UdpTransportAddress
+    sockFamily = socket.AF_INET
+
+    def __init__(self, loop=None):
+        self.loop = loop or asyncio.new_event_loop()
+        self.transport = None
+
+    def openServerMode(self, iface, reuse_port=False):
+        sock = socket.socket(self.sockFamily, socket.SOCK_DGRAM)
+        if reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER)
+        sock.bind(iface)
+        sock.setblocking(False)
+        self.transport, _ = self.loop.run_until_complete(
+            self.loop.create_datagram_endpoint(lambda: self, sock=sock)
+        )
+        return self
+
+    def datagram_received(self, datagram, transportAddress):
+        self._cbFun(self, self.addressType(transportAddress), datagram)
+
+    def sendMessage(self, outgoingMessage, transportAddress):
+        self.transport.sendto(outgoingMessage, tuple(transportAddress))
+
+    def closeTransport(self):
+        if self.transport is not None:
+            self.transport.close()
+        AbstractTransport.closeTransport(self)
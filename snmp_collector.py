@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Concurrent SNMP GETBULK collector for many agents on asyncio
+All targets share one UDP socket; responses are matched by request-id.
+Each target has its own rate limit and an adaptive max-repetitions (grow
+while responses are fast, halve on timeouts/tooBig). Numeric values are
+handed to on_batch(timestamp, {series: value}) in batches.
+
+Usage: python snmp_collector.py host:port [host:port ...] [--subtree OID] [--rounds N]
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import time
+from collections import deque
+
+from pyasn1.codec.ber import decoder, encoder
+from pyasn1.type import univ
+from pysnmp.proto import api, rfc1905
+
+from snmp_mib import INDEX_NAMES, NF_ENTRY_OID, object_name
+
+P = api.protoModules[api.protoVersion2c]
+
+DEFAULT_SUBTREES = (NF_ENTRY_OID,)
+DEFAULT_TIMEOUT = 1.0
+DEFAULT_RETRIES = 1
+DEFAULT_RATE = 50
+DEFAULT_CONCURRENCY = 256
+DEFAULT_BATCH_SIZE = 5000
+# Distinct sample names kept per agent; an agent's further objects are dropped
+DEFAULT_MAX_SERIES_PER_TARGET = 100
+
+MIN_REPETITIONS = 1
+MAX_REPETITIONS = 50
+REPETITIONS_STEP = 5
+LATENCY_SAMPLES = 256
+
+END_OF_SUBTREE = (rfc1905.endOfMibView.tagSet, rfc1905.noSuchObject.tagSet,
+                  rfc1905.noSuchInstance.tagSet)
+TOO_BIG = 1
+
+
+class SnmpError(Exception):
+    """Raised when an agent answers with an error status"""
+
+
+class TokenBucket:
+    """Per-target request rate limit"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate / 10)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AdaptiveRepetitions:
+    """AIMD max-repetitions: grow while fast, halve on slow answers and timeouts"""
+
+    def __init__(self, initial=10, low=MIN_REPETITIONS, high=MAX_REPETITIONS):
+        self.value = initial
+        self.low = low
+        self.high = high
+
+    def success(self, latency, target_latency):
+        if latency <= target_latency:
+            self.value = min(self.high, self.value + REPETITIONS_STEP)
+        else:
+            self.shrink()
+
+    def shrink(self):
+        self.value = max(self.low, self.value // 2)
+
+
+class SnmpTarget:
+    """One agent to poll, with its rate limit, repetitions and stats"""
+
+    def __init__(self, host, port=161, community='public', name=None, rate=DEFAULT_RATE,
+                 max_repetitions=10):
+        self.host = host
+        self.port = int(port)
+        self.community = community
+        self.name = name or f"{host}:{self.port}"
+        self.bucket = TokenBucket(rate)
+        self.repetitions = AdaptiveRepetitions(max_repetitions)
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.counters = {
+            "requests": 0,
+            "responses": 0,
+            "timeouts": 0,
+            "errors": 0,
+            "walks": 0,
+            "failedWalks": 0,
+            "failedPolls": 0,
+            "varbinds": 0,
+            "droppedSamples": 0,
+        }
+        self.last_poll = None
+        self.series = set()
+
+    @classmethod
+    def parse(cls, spec, **kwargs):
+        """Build a target from 'host[:port]' or a dict of constructor arguments"""
+        if isinstance(spec, dict):
+            return cls(**dict(kwargs, **spec))
+        host, _, port = spec.rpartition(':') if ':' in spec else (spec, '', '161')
+        return cls(host, int(port), **kwargs)
+
+    def stats(self):
+        # Copied first: the collector's loop thread appends while Flask threads read
+        recent = list(self.latencies)
+        latencies = sorted(recent)
+        summary = {}
+        if latencies:
+            summary = {
+                "lastMs": round(recent[-1] * 1000, 2),
+                "avgMs": round(sum(latencies) / len(latencies) * 1000, 2),
+                "p95Ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 2),
+                "maxMs": round(latencies[-1] * 1000, 2),
+            }
+        return dict(self.counters, latency=summary, maxRepetitions=self.repetitions.value,
+                    lastPoll=self.last_poll)
+
+
+class _CollectorProtocol(asyncio.DatagramProtocol):
+    def __init__(self, collector):
+        self.collector = collector
+
+    def datagram_received(self, data, addr):
+        self.collector._response(data)
+
+
+def encode_getbulk(request_id, community, oid, max_repetitions):
+    pdu = P.GetBulkRequestPDU()
+    P.apiBulkPDU.setDefaults(pdu)
+    P.apiBulkPDU.setRequestID(pdu, request_id)
+    P.apiBulkPDU.setNonRepeaters(pdu, 0)
+    P.apiBulkPDU.setMaxRepetitions(pdu, max_repetitions)
+    P.apiBulkPDU.setVarBinds(pdu, [(oid, P.Null(''))])
+    message = P.Message()
+    P.apiMessage.setDefaults(message)
+    P.apiMessage.setCommunity(message, community)
+    P.apiMessage.setPDU(message, pdu)
+    return encoder.encode(message)
+
+
+def numeric_value(value):
+    """Return an SNMP value as a number, or None for non-numeric syntaxes"""
+    if isinstance(value, univ.Integer):
+        return int(value)
+    return None
+
+
+class SnmpCollector:
+    """Walk subtrees on many agents concurrently and emit numeric samples in batches"""
+
+    def __init__(self, targets, subtrees=DEFAULT_SUBTREES, on_batch=None,
+                 timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+                 concurrency=DEFAULT_CONCURRENCY, batch_size=DEFAULT_BATCH_SIZE,
+                 prefix='snmp', max_series_per_target=DEFAULT_MAX_SERIES_PER_TARGET):
+        self.targets = list(targets)
+        self.subtrees = [tuple(subtree) for subtree in subtrees]
+        self.on_batch = on_batch
+        self.timeout = timeout
+        self.retries = retries
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.prefix = prefix
+        self.max_series_per_target = max_series_per_target
+        self.transport = None
+        self._pending = {}
+        self._request_ids = itertools.count(random.randrange(1, 1 << 30))
+        self._batch = {}
+        self._batch_time = None
+        self._stats = {"rounds": 0, "batches": 0, "samples": 0, "lastRoundMs": None,
+                       "unmatched": 0, "failedPolls": 0}
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: _CollectorProtocol(self), local_addr=('0.0.0.0', 0)
+        )
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+
+    def _response(self, data):
+        try:
+            message, _ = decoder.decode(data, asn1Spec=P.Message())
+            pdu = P.apiMessage.getPDU(message)
+            request_id = int(P.apiPDU.getRequestID(pdu))
+        except Exception:
+            self._stats["unmatched"] += 1
+            return
+        future = self._pending.pop(request_id, None)
+        if future is None or future.done():
+            self._stats["unmatched"] += 1
+            return
+        future.set_result(pdu)
+
+    async def getbulk(self, target, oid):
+        """One GETBULK with retries; returns the response varbinds"""
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.retries + 1):
+            await target.bucket.acquire()
+            request_id = next(self._request_ids) % (1 << 31)
+            future = loop.create_future()
+            self._pending[request_id] = future
+            message = encode_getbulk(request_id, target.community, oid, target.repetitions.value)
+            target.counters["requests"] += 1
+            started = time.perf_counter()
+            self.transport.sendto(message, (target.host, target.port))
+            try:
+                pdu = await asyncio.wait_for(future, self.timeout)
+            except asyncio.TimeoutError:
+                target.counters["timeouts"] += 1
+                target.repetitions.shrink()
+                continue
+            finally:
+                self._pending.pop(request_id, None)
+            latency = time.perf_counter() - started
+            target.counters["responses"] += 1
+            target.latencies.append(latency)
+            status = int(P.apiPDU.getErrorStatus(pdu))
+            if status == TOO_BIG:
+                target.repetitions.shrink()
+                continue
+            if status:
+                target.counters["errors"] += 1
+                raise SnmpError(f"{target.name}: error status {status}")
+            target.repetitions.success(latency, self.timeout / 5)
+            return P.apiPDU.getVarBinds(pdu)
+        raise asyncio.TimeoutError(f"{target.name}: no response after {self.retries + 1} attempts")
+
+    async def walk(self, target, subtree):
+        """GETBULK-walk one subtree; returns [(oid tuple, value)]"""
+        results = []
+        oid = subtree
+        while True:
+            varbinds = await self.getbulk(target, oid)
+            if not varbinds:
+                return results
+            for name, value in varbinds:
+                name = tuple(name)
+                if value.tagSet in END_OF_SUBTREE or name[:len(subtree)] != subtree:
+                    return results
+                if results and name <= results[-1][0]:
+                    # Agent did not advance: stop instead of looping forever
+                    return results
+                results.append((name, value))
+            oid = results[-1][0]
+
+    async def poll_target(self, target, timestamp):
+        samples = {}
+        for subtree in self.subtrees:
+            try:
+                varbinds = await self.walk(target, subtree)
+            except (asyncio.TimeoutError, SnmpError) as e:
+                target.counters["failedWalks"] += 1
+                print(f"SNMP walk failed: {e}")
+                continue
+            target.counters["walks"] += 1
+            target.counters["varbinds"] += len(varbinds)
+            for name, value in varbinds:
+                number = numeric_value(value)
+                if number is None:
+                    continue
+                name = object_name(name)
+                if name.partition('.')[0] in INDEX_NAMES:
+                    continue
+                if name not in target.series:
+                    if len(target.series) >= self.max_series_per_target:
+                        target.counters["droppedSamples"] += 1
+                        continue
+                    target.series.add(name)
+                samples[f"{self.prefix}/{target.name}/{name}"] = number
+        target.last_poll = timestamp
+        self._add(timestamp, samples)
+
+    def _add(self, timestamp, samples):
+        self._batch.update(samples)
+        self._batch_time = timestamp
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Hand the buffered samples to on_batch"""
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, {}
+        self._stats["batches"] += 1
+        self._stats["samples"] += len(batch)
+        if self.on_batch is not None:
+            try:
+                self.on_batch(self._batch_time, batch)
+            except Exception as e:
+                print(f"Error delivering SNMP samples: {e}")
+
+    async def poll(self):
+        """Poll every target once (bounded concurrency) and flush the batch"""
+        if self.transport is None:
+            await self.start()
+        started = time.perf_counter()
+        timestamp = time.time()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(target):
+            async with semaphore:
+                try:
+                    await self.poll_target(target, timestamp)
+                except Exception as e:
+                    # One bad agent (malformed PDU, transport error) must not end the collector
+                    target.counters["failedPolls"] += 1
+                    self._stats["failedPolls"] += 1
+                    print(f"SNMP poll of {target.name} failed: {e}")
+
+        await asyncio.gather(*(bounded(target) for target in self.targets))
+        self.flush()
+        self._stats["rounds"] += 1
+        self._stats["lastRoundMs"] = round((time.perf_counter() - started) * 1000, 1)
+
+    async def run(self, interval, rounds=None):
+        """Poll every interval seconds (forever, or for rounds rounds)"""
+        try:
+            for _ in (range(rounds) if rounds else itertools.count()):
+                started = time.monotonic()
+                await self.poll()
+                await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+        finally:
+            self.close()
+
+    def stats(self):
+        return dict(self._stats, pending=len(self._pending),
+                    targets={target.name: target.stats() for target in self.targets})
+
+
+def parse_oid(text):
+    return tuple(int(arc) for arc in text.strip('.').split('.'))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Concurrent SNMP GETBULK collector')
+    parser.add_argument('targets', nargs='+', help='host[:port] of each agent')
+    parser.add_argument('--subtree', action='append', type=parse_oid,
+                        help=f"OID subtree to walk (default {'.'.join(map(str, NF_ENTRY_OID))})")
+    parser.add_argument('--community', default='public')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help='requests/sec per target')
+    parser.add_argument('--interval', type=float, default=10)
+    parser.add_argument('--rounds', type=int, default=1)
+    args = parser.parse_args()
+
+    targets = [SnmpTarget.parse(spec, community=args.community, rate=args.rate)
+               for spec in args.targets]
+    collector = SnmpCollector(
+        targets, args.subtree or DEFAULT_SUBTREES,
+        on_batch=lambda timestamp, samples: print(f"batch: {len(samples)} samples")
+    )
+    asyncio.run(collector.run(args.interval, args.rounds))
+    for name, stats in collector.stats()["targets"].items():
+        print(f"{name}: {stats}")
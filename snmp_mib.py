@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+5G core MIB for the SNMP agent, served from a pre-sorted OID index
+OIDs are encoded as fixed-width big-endian arcs so byte order matches OID
+order and GET/GETNEXT/GETBULK are a bisect per varbind.
+
+FIVEG-CORE-MIB (enterprises.55555.1)
+  .1  scalars       nfCount(1) subscriberCount(2) sessionCount(3) activeSubscriberCount(4)
+  .2  nfTable       nfIndex(1) nfType(2) nfInstanceId(3) nfStatus(4) nfCpuUtilization(5)
+                    nfMemoryUtilization(6) nfActiveSessions(7) nfThroughput(8)
+                    nfPacketLossMilli(9)
+  .3  subscriberTable  subIndex(1) subImsi(2) subMsisdn(3) subStatus(4) subDnn(5)
+                       subSnssai(6) subServingAmf(7)
+  .4  sessionTable  sessIndex(1) sessId(2) sessImsi(3) sessStatus(4) sessDnn(5)
+                    sessSnssai(6) sessSmf(7) sessUpf(8)
+  .5  agentProviderTable  provIndex(1) provSubtree(2) provAgeMs(3) provLastRefreshMs(4)
+                          provMaxRefreshMs(5) provRefreshes(6) provRefreshErrors(7)
+                          provCacheHits(8) provCacheMisses(9)
+  .6  alarm objects (accessible-for-notify)  alarmNfType(1) alarmNfInstanceId(2)
+                    alarmSeverity(3) alarmText(4)
+  .0  notifications amfOverload(1) upfLinkDown(2) upfLinkUp(3) nfStatusChange(4)
+"""
+
+import struct
+from bisect import bisect_left, bisect_right
+
+from pysnmp.proto import rfc1902, rfc1905
+from pysnmp.smi import error
+
+from nf_metrics import iter_instances, instance_metrics
+from subscriber_store import SubscriberRecord, SessionRecord
+
+ENTERPRISE_OID = (1, 3, 6, 1, 4, 1, 55555)
+FIVEG_MIB_OID = ENTERPRISE_OID + (1,)
+SCALARS_OID = FIVEG_MIB_OID + (1,)
+NF_ENTRY_OID = FIVEG_MIB_OID + (2, 1)
+SUBSCRIBER_ENTRY_OID = FIVEG_MIB_OID + (3, 1)
+SESSION_ENTRY_OID = FIVEG_MIB_OID + (4, 1)
+PROVIDER_ENTRY_OID = FIVEG_MIB_OID + (5, 1)
+ALARM_OBJECTS_OID = FIVEG_MIB_OID + (6,)
+NOTIFICATIONS_OID = FIVEG_MIB_OID + (0,)
+
+# SNMPv2-MIB objects carried first in every trap/inform
+SYS_UPTIME_OID = (1, 3, 6, 1, 2, 1, 1, 3, 0)
+SNMP_TRAP_OID = (1, 3, 6, 1, 6, 3, 1, 1, 4, 1, 0)
+SNMP_TRAPS_OID = (1, 3, 6, 1, 6, 3, 1, 1, 5)
+
+GAUGE_MAX = 4294967295
+
+
+def encode_oid(oid):
+    """Encode an OID tuple so that bytes order equals OID order"""
+    return struct.pack(f'>{len(oid)}I', *oid)
+
+
+def decode_oid(key):
+    """Decode an encoded OID back into a tuple"""
+    return struct.unpack(f'>{len(key) // 4}I', key)
+
+
+def gauge(value):
+    if value is None:
+        return None
+    return max(0, min(int(value), GAUGE_MAX))
+
+
+def counter(value):
+    return None if value is None else int(value) % (GAUGE_MAX + 1)
+
+
+def text(value):
+    return '' if value is None else str(value)
+
+
+class MibIndex:
+    """Immutable sorted (encoded OID -> value) index for one data snapshot"""
+
+    def __init__(self, keys, values, summary=None):
+        self.keys = keys
+        self.values = values
+        self.summary = summary or {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def get(self, oid):
+        """Return (oid, syntax) for an exact OID, or None"""
+        key = encode_oid(oid)
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return oid, self.syntax(i)
+        return None
+
+    def next_index(self, oid):
+        """Return the position of the first OID strictly after oid"""
+        return bisect_right(self.keys, encode_oid(oid))
+
+    def item(self, i):
+        return decode_oid(self.keys[i]), self.syntax(i)
+
+    def syntax(self, i):
+        syntax_class, raw = self.values[i]
+        return syntax_class(raw)
+
+
+class MibIndexBuilder:
+    """Collects objects in OID order and produces a MibIndex"""
+
+    def __init__(self):
+        self._keys = []
+        self._values = []
+
+    def add(self, oid, syntax_class, raw):
+        if raw is None:
+            return
+        key = encode_oid(oid)
+        if self._keys and key <= self._keys[-1]:
+            raise ValueError(f"OID {oid} added out of order")
+        self._keys.append(key)
+        self._values.append((syntax_class, raw))
+
+    def add_table(self, entry_oid, columns, rows):
+        """Add a conceptual table column by column (SNMP walk order)"""
+        for column, (syntax_class, getter) in enumerate(columns, 1):
+            for row_index, row in enumerate(rows, 1):
+                self.add(entry_oid + (column, row_index), syntax_class, getter(row_index, row))
+
+    def build(self, summary=None):
+        return MibIndex(self._keys, self._values, summary)
+
+
+NF_COLUMNS = (
+    (rfc1902.Integer32, lambda i, r: i),
+    (rfc1902.OctetString, lambda i, r: r[0]),
+    (rfc1902.OctetString, lambda i, r: r[1]),
+    (rfc1902.OctetString, lambda i, r: text(r[2].get('status'))),
+    (rfc1902.Gauge32, lambda i, r: gauge(r[3].get('cpuUtilization'))),
+    (rfc1902.Gauge32, lambda i, r: gauge(r[3].get('memoryUtilization'))),
+    (rfc1902.Gauge32, lambda i, r: gauge(
+        r[3].get('activeSessions', r[3].get('activePduSessions', r[3].get('activeUsers'))))),
+    (rfc1902.Counter64, lambda i, r: int(r[3]['throughput']) if 'throughput' in r[3] else None),
+    (rfc1902.Gauge32, lambda i, r: gauge(round(r[3]['packetLoss'] * 1000)) if 'packetLoss' in r[3] else None),
+)
+
+SUBSCRIBER_COLUMNS = (
+    (rfc1902.Integer32, lambda i, r: i),
+    (rfc1902.OctetString, lambda i, r: text(r.imsi)),
+    (rfc1902.OctetString, lambda i, r: text(r.msisdn)),
+    (rfc1902.OctetString, lambda i, r: text(r.status)),
+    (rfc1902.OctetString, lambda i, r: text(r.dnn)),
+    (rfc1902.OctetString, lambda i, r: text(r.snssai)),
+    (rfc1902.OctetString, lambda i, r: text(r.serving_nf)),
+)
+
+SESSION_COLUMNS = (
+    (rfc1902.Integer32, lambda i, r: i),
+    (rfc1902.OctetString, lambda i, r: text(r.session_id)),
+    (rfc1902.OctetString, lambda i, r: text(r.imsi)),
+    (rfc1902.OctetString, lambda i, r: text(r.status)),
+    (rfc1902.OctetString, lambda i, r: text(r.dnn)),
+    (rfc1902.OctetString, lambda i, r: text(r.snssai)),
+    (rfc1902.OctetString, lambda i, r: text(r.smf)),
+    (rfc1902.OctetString, lambda i, r: text(r.upf)),
+)
+
+PROVIDER_COLUMNS = (
+    (rfc1902.Integer32, lambda i, r: i),
+    (rfc1902.OctetString, lambda i, r: r["name"]),
+    (rfc1902.Gauge32, lambda i, r: gauge(r["ageMs"])),
+    (rfc1902.Gauge32, lambda i, r: gauge(r["lastRefreshMs"])),
+    (rfc1902.Gauge32, lambda i, r: gauge(r["maxRefreshMs"])),
+    (rfc1902.Counter32, lambda i, r: counter(r["refreshes"])),
+    (rfc1902.Counter32, lambda i, r: counter(r["refreshErrors"])),
+    (rfc1902.Counter32, lambda i, r: counter(r["cacheHits"])),
+    (rfc1902.Counter32, lambda i, r: counter(r["cacheMisses"])),
+)
+
+
+# Object names per table column, in column order (see the module docstring)
+COLUMN_NAMES = {
+    NF_ENTRY_OID: ('nfIndex', 'nfType', 'nfInstanceId', 'nfStatus', 'nfCpuUtilization',
+                   'nfMemoryUtilization', 'nfActiveSessions', 'nfThroughput', 'nfPacketLossMilli'),
+    SUBSCRIBER_ENTRY_OID: ('subIndex', 'subImsi', 'subMsisdn', 'subStatus', 'subDnn',
+                           'subSnssai', 'subServingAmf'),
+    SESSION_ENTRY_OID: ('sessIndex', 'sessId', 'sessImsi', 'sessStatus', 'sessDnn',
+                        'sessSnssai', 'sessSmf', 'sessUpf'),
+    PROVIDER_ENTRY_OID: ('provIndex', 'provSubtree', 'provAgeMs', 'provLastRefreshMs',
+                         'provMaxRefreshMs', 'provRefreshes', 'provRefreshErrors',
+                         'provCacheHits', 'provCacheMisses'),
+}
+# Row index columns: numbering, not measurements
+INDEX_NAMES = frozenset(names[0] for names in COLUMN_NAMES.values())
+SCALAR_NAMES = ('nfCount', 'subscriberCount', 'sessionCount', 'activeSubscriberCount')
+ALARM_NAMES = ('alarmNfType', 'alarmNfInstanceId', 'alarmSeverity', 'alarmText')
+
+# Notification OIDs: the 5G MIB's own plus the SNMPv2-MIB generic traps
+NOTIFICATION_NAMES = {
+    NOTIFICATIONS_OID + (1,): 'amfOverload',
+    NOTIFICATIONS_OID + (2,): 'upfLinkDown',
+    NOTIFICATIONS_OID + (3,): 'upfLinkUp',
+    NOTIFICATIONS_OID + (4,): 'nfStatusChange',
+    SNMP_TRAPS_OID + (1,): 'coldStart',
+    SNMP_TRAPS_OID + (2,): 'warmStart',
+    SNMP_TRAPS_OID + (3,): 'linkDown',
+    SNMP_TRAPS_OID + (4,): 'linkUp',
+    SNMP_TRAPS_OID + (5,): 'authenticationFailure',
+}
+
+
+def object_name(oid):
+    """Return 'name.row' for a 5G MIB object, or the dotted OID for anything else"""
+    oid = tuple(oid)
+    for base, names in ((SCALARS_OID, SCALAR_NAMES), (ALARM_OBJECTS_OID, ALARM_NAMES)):
+        if oid[:len(base)] == base and len(oid) == len(base) + 2:
+            column = oid[len(base)]
+            if 1 <= column <= len(names):
+                return names[column - 1]
+    if oid in NOTIFICATION_NAMES:
+        return NOTIFICATION_NAMES[oid]
+    for entry_oid, names in COLUMN_NAMES.items():
+        if oid[:len(entry_oid)] == entry_oid and len(oid) > len(entry_oid) + 1:
+            column = oid[len(entry_oid)]
+            if 1 <= column <= len(names):
+                row = '.'.join(str(arc) for arc in oid[len(entry_oid) + 1:])
+                return f"{names[column - 1]}.{row}"
+    return '.'.join(str(arc) for arc in oid)
+
+
+def nf_rows(nf_data):
+    """Return (type, instance id, instance, metrics) rows for the NF table"""
+    return [
+        (nf_type, instance_id, instance, instance_metrics(instance))
+        for nf_type, instance_id, instance in iter_instances(nf_data or {})
+    ]
+
+
+def build_scalars(nf_count, subscriber_count, session_count, active_subscribers):
+    builder = MibIndexBuilder()
+    builder.add(SCALARS_OID + (1, 0), rfc1902.Gauge32, gauge(nf_count))
+    builder.add(SCALARS_OID + (2, 0), rfc1902.Gauge32, gauge(subscriber_count))
+    builder.add(SCALARS_OID + (3, 0), rfc1902.Gauge32, gauge(session_count))
+    builder.add(SCALARS_OID + (4, 0), rfc1902.Gauge32, gauge(active_subscribers))
+    return builder.build()
+
+
+def build_table(entry_oid, columns, rows, summary=None):
+    builder = MibIndexBuilder()
+    builder.add_table(entry_oid, columns, rows)
+    return builder.build(dict(summary or {}, rows=len(rows)))
+
+
+def build_nf_table(nf_data):
+    """Build the NF table from a network-functions payload"""
+    return build_table(NF_ENTRY_OID, NF_COLUMNS, nf_rows(nf_data))
+
+
+def build_subscriber_table(subscribers):
+    """Build the subscriber table from subscriber list entries"""
+    rows = [SubscriberRecord(e) for e in subscribers or () if isinstance(e, dict)]
+    active = sum(1 for r in rows if r.status == 'active')
+    return build_table(SUBSCRIBER_ENTRY_OID, SUBSCRIBER_COLUMNS, rows, {"active": active})
+
+
+def build_session_table(sessions):
+    """Build the session table from session list entries"""
+    rows = [SessionRecord(e) for e in sessions or () if isinstance(e, dict)]
+    return build_table(SESSION_ENTRY_OID, SESSION_COLUMNS, rows)
+
+
+def build_provider_table(provider_stats):
+    """Build the agent provider table from provider stats dicts"""
+    return build_table(PROVIDER_ENTRY_OID, PROVIDER_COLUMNS, provider_stats)
+
+
+def merge_indexes(indexes):
+    """Concatenate indexes of disjoint subtrees given in OID order"""
+    keys = []
+    values = []
+    for index in indexes:
+        keys.extend(index.keys)
+        values.extend(index.values)
+    return MibIndex(keys, values)
+
+
+def build_mib_index(nf_data, subscribers, sessions):
+    """Build a MibIndex from RESTCONF network-functions and subscriber/session entries"""
+    nfs = build_nf_table(nf_data)
+    subs = build_subscriber_table(subscribers)
+    sess = build_session_table(sessions)
+    scalars = build_scalars(nfs.summary["rows"], subs.summary["rows"],
+                            sess.summary["rows"], subs.summary["active"])
+    return merge_indexes((scalars, nfs, subs, sess))
+
+
+class FiveGMibInstrum:
+    """MIB instrumentation for pysnmp command responders backed by a MibIndex
+
+    Registered on an SnmpContext in place of the default MibInstrumController;
+    implements the readVars/readNextVars/writeVars calls the responders make.
+    """
+
+    def __init__(self, index=None):
+        self.index = index or MibIndex([], [])
+
+    def update(self, index):
+        """Swap in a new snapshot (atomic reference assignment)"""
+        self.index = index
+
+    def index_for(self, oid):
+        """Return the index that may hold oid exactly, or None"""
+        return self.index
+
+    def indexes_after(self, oid):
+        """Yield, in OID order, the indexes that may hold OIDs after oid"""
+        yield self.index
+
+    def readVars(self, varBinds, acInfo=(None, None)):
+        acFun, acCtx = acInfo
+        result = []
+        for idx, (name, val) in enumerate(varBinds):
+            oid = tuple(name)
+            index = self.index_for(oid)
+            found = index.get(oid) if index is not None else None
+            if found is None or (acFun and acFun(found[0], found[1], idx, 'read', acCtx)):
+                result.append((name, rfc1905.noSuchObject))
+            else:
+                result.append((name, found[1]))
+        return result
+
+    def readNextVars(self, varBinds, acInfo=(None, None)):
+        acFun, acCtx = acInfo
+        result = []
+        for idx, (name, val) in enumerate(varBinds):
+            oid = tuple(name)
+            result.append((name, rfc1905.endOfMibView))
+            for index in self.indexes_after(oid):
+                found = self._next(index, oid, idx, acFun, acCtx)
+                if found is not None:
+                    result[-1] = found
+                    break
+        return result
+
+    @staticmethod
+    def _next(index, oid, idx, acFun, acCtx):
+        for i in range(index.next_index(oid), len(index)):
+            next_oid, syntax = index.item(i)
+            if not (acFun and acFun(next_oid, syntax, idx, 'read', acCtx)):
+                return rfc1902.ObjectName(next_oid), syntax
+        return None
+
+    def writeVars(self, varBinds, acInfo=(None, None)):
+        for idx, (name, val) in enumerate(varBinds):
+            raise error.NotWritableError(name=name, idx=idx)
+        return []
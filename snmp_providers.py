@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Cached value providers between the SNMP command responders and RESTCONF
+Each MIB subtree is built from one whole-table upstream read and cached with
+its own TTL; every PDU is answered from snapshots pinned for that PDU, so a
+GETBULK never mixes two refreshes. After a failed refresh the last snapshot
+is served and retries run off the dispatcher thread, at most one per
+retry_backoff seconds, so a down upstream does not stall every PDU.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+from response_cache import ResponseCache
+from singleflight import SingleFlight
+from snmp_mib import FiveGMibInstrum, MibIndex, encode_oid, merge_indexes
+
+EMPTY_INDEX = MibIndex([], [])
+
+
+class Snapshot:
+    """One built subtree and when it was loaded"""
+
+    __slots__ = ('index', 'loaded')
+
+    def __init__(self, index, loaded):
+        self.index = index
+        self.loaded = loaded
+
+
+class SubtreeProvider:
+    """Builds one MIB subtree from a single upstream read
+
+    load() fetches the data, build(data) turns it into a MibIndex. Providers
+    with a ttl are cached; ttl=None rebuilds on every PDU (cheap derived
+    subtrees such as counts and agent stats).
+    """
+
+    def __init__(self, name, prefix, load, build, ttl=None):
+        self.name = name
+        self.prefix = tuple(prefix)
+        self.key = encode_oid(self.prefix)
+        self.load = load
+        self.build = build
+        self.ttl = ttl
+        self._last = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "refreshes": 0,
+            "refreshErrors": 0,
+            "lastRefreshMs": 0.0,
+            "maxRefreshMs": 0.0,
+        }
+
+    def contains(self, oid):
+        return oid[:len(self.prefix)] == self.prefix
+
+    def refresh(self):
+        """Load and build a new snapshot, timing the whole refresh
+
+        Unchanged upstream data keeps the previous index, so readers (and the
+        shared-snapshot publisher) can tell nothing changed by identity.
+        """
+        started = time.perf_counter()
+        try:
+            data = self.load()
+            last = self._last
+            if last is not None and last[0] == data:
+                index = last[1]
+            else:
+                index = self.build(data)
+                self._last = (data, index)
+        except Exception:
+            with self._lock:
+                self._stats["refreshErrors"] += 1
+            raise
+        elapsed = round((time.perf_counter() - started) * 1000, 2)
+        with self._lock:
+            self._stats["refreshes"] += 1
+            self._stats["lastRefreshMs"] = elapsed
+            self._stats["maxRefreshMs"] = max(self._stats["maxRefreshMs"], elapsed)
+        return Snapshot(index, time.monotonic())
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, ttl=self.ttl)
+
+
+class ProviderMib(FiveGMibInstrum):
+    """MIB instrumentation that reads subtrees through cached providers"""
+
+    def __init__(self, providers, stale_ttl=30, retry_backoff=5):
+        super().__init__()
+        self.providers = sorted(providers, key=lambda provider: provider.key)
+        self.cache = ResponseCache(
+            max_entries=len(self.providers),
+            ttls={p.name: p.ttl for p in self.providers if p.ttl is not None},
+            stale_ttl=stale_ttl
+        )
+        self.flights = SingleFlight()
+        self.retry_backoff = retry_backoff
+        self._pins = threading.local()
+        self._lock = threading.Lock()
+        self._snapshots = {}
+        self._retry_at = {}
+
+    @contextmanager
+    def pinned(self):
+        """Serve every read in this block from the same snapshots"""
+        if getattr(self._pins, 'snapshots', None) is not None:
+            yield
+            return
+        self._pins.snapshots = {}
+        try:
+            yield
+        finally:
+            self._pins.snapshots = None
+
+    def snapshot(self, provider):
+        """Return the provider's snapshot (pinned, cached or freshly built)"""
+        pinned = getattr(self._pins, 'snapshots', None)
+        if pinned is not None and provider.name in pinned:
+            return pinned[provider.name]
+        if provider.ttl is None:
+            try:
+                snapshot = provider.refresh()
+            except Exception as e:
+                print(f"Error refreshing {provider.name}: {e}")
+                snapshot = Snapshot(EMPTY_INDEX, time.monotonic())
+        else:
+            snapshot = self._cached(provider)
+        if pinned is not None:
+            pinned[provider.name] = snapshot
+        return snapshot
+
+    def _cached(self, provider):
+        """Cached snapshot, or the last one while a failed provider backs off"""
+        name = provider.name
+        with self._lock:
+            retry_at = self._retry_at.get(name)
+            if retry_at is not None and time.monotonic() >= retry_at:
+                # One background retry at a time
+                self._retry_at[name] = float('inf')
+                threading.Thread(target=self._retry, args=(provider,),
+                                 name=f"snmp-retry-{name}", daemon=True).start()
+        if retry_at is not None:
+            return self._last(name)
+        try:
+            snapshot = self.cache.get(name, lambda: self.flights.do(name, provider.refresh))
+        except Exception as e:
+            print(f"Error refreshing {name}: {e}")
+            with self._lock:
+                self._retry_at[name] = time.monotonic() + self.retry_backoff
+            return self._last(name)
+        with self._lock:
+            self._snapshots[name] = snapshot
+        return snapshot
+
+    def _retry(self, provider):
+        """Refresh a failed provider off the dispatcher thread"""
+        name = provider.name
+        try:
+            snapshot = self.flights.do(name, provider.refresh)
+        except Exception as e:
+            print(f"Error refreshing {name}: {e}")
+            with self._lock:
+                self._retry_at[name] = time.monotonic() + self.retry_backoff
+            return
+        self.cache.put(name, snapshot)
+        with self._lock:
+            self._snapshots[name] = snapshot
+            self._retry_at.pop(name, None)
+
+    def _last(self, name):
+        with self._lock:
+            snapshot = self._snapshots.get(name)
+        return snapshot or Snapshot(EMPTY_INDEX, time.monotonic())
+
+    def subtree_index(self, name):
+        """Return the current index of a provider by name"""
+        for provider in self.providers:
+            if provider.name == name:
+                return self.snapshot(provider).index
+        raise KeyError(name)
+
+    def merged_index(self):
+        """Return one MibIndex of every subtree (call inside pinned())"""
+        return merge_indexes(self.snapshot(provider).index for provider in self.providers)
+
+    def index_for(self, oid):
+        for provider in self.providers:
+            if provider.contains(oid):
+                return self.snapshot(provider).index
+        return None
+
+    def indexes_after(self, oid):
+        for provider in self.providers:
+            # Skip subtrees that lie entirely before oid
+            if oid > provider.prefix and not provider.contains(oid):
+                continue
+            yield self.snapshot(provider).index
+
+    def stats(self):
+        """Per cached provider: staleness, refresh latency and cache counters"""
+        cache_keys = self.cache.stats()["keys"]
+        now = time.monotonic()
+        with self._lock:
+            loaded = {name: snapshot.loaded for name, snapshot in self._snapshots.items()}
+        result = []
+        for provider in self.providers:
+            if provider.ttl is None:
+                continue
+            counts = cache_keys.get(provider.name, {})
+            age = now - loaded[provider.name] if provider.name in loaded else None
+            result.append(dict(
+                provider.stats(),
+                name=provider.name,
+                ageMs=None if age is None else round(age * 1000),
+                cacheHits=counts.get("hits", 0) + counts.get("staleHits", 0),
+                cacheMisses=counts.get("misses", 0)
+            ))
+        return result
+
+
+def pinned_responder(responder_class):
+    """Subclass a pysnmp command responder so each PDU reads one pinned snapshot"""
+
+    class PinnedResponder(responder_class):
+        def handleMgmtOperation(self, snmpEngine, stateReference, contextName, PDU, acInfo):
+            mib = self.snmpContext.getMibInstrum(contextName)
+            if not hasattr(mib, 'pinned'):
+                return responder_class.handleMgmtOperation(
+                    self, snmpEngine, stateReference, contextName, PDU, acInfo
+                )
+            with mib.pinned():
+                return responder_class.handleMgmtOperation(
+                    self, snmpEngine, stateReference, contextName, PDU, acInfo
+                )
+
+    PinnedResponder.__name__ = f"Pinned{responder_class.__name__}"
+    return PinnedResponder
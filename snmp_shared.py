@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Shared MIB snapshot for multi-process SNMP agents
+The leader writes the merged MIB index to one file (atomically replaced);
+workers map it read-only and bisect it in place, so N workers share one copy
+through the page cache.
+
+Layout (native byte order): header (magic, version, count), then count+1
+key offsets, count+1 value offsets, the key blob and the value blob. Keys are
+encoded OIDs (snmp_mib.encode_oid); values are a type code and a payload.
+"""
+
+import mmap
+import os
+import struct
+import time
+from array import array
+from contextlib import nullcontext
+
+from pysnmp.proto import rfc1902
+
+from snmp_mib import FiveGMibInstrum, decode_oid, encode_oid
+
+MAGIC = b'5GMI'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('=4sII')
+
+SYNTAX_CODES = (
+    (rfc1902.Integer32, struct.Struct('=q')),
+    (rfc1902.Gauge32, struct.Struct('=Q')),
+    (rfc1902.Counter32, struct.Struct('=Q')),
+    (rfc1902.Counter64, struct.Struct('=Q')),
+    (rfc1902.OctetString, None),
+)
+CODE_FOR_SYNTAX = {syntax_class: code for code, (syntax_class, _) in enumerate(SYNTAX_CODES)}
+
+# How often a worker checks whether the leader published a new file
+RELOAD_INTERVAL = 0.5
+
+
+def write_shared_mib(path, index):
+    """Serialize a MibIndex to path, replacing any previous file atomically"""
+    key_offsets = array('I', [0])
+    value_offsets = array('I', [0])
+    values = bytearray()
+    for syntax_class, raw in index.values:
+        code = CODE_FOR_SYNTAX[syntax_class]
+        values.append(code)
+        packer = SYNTAX_CODES[code][1]
+        if packer is None:
+            values += raw.encode() if isinstance(raw, str) else bytes(raw)
+        else:
+            values += packer.pack(raw)
+        value_offsets.append(len(values))
+    position = 0
+    for key in index.keys:
+        position += len(key)
+        key_offsets.append(position)
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(index.keys)))
+        f.write(key_offsets.tobytes())
+        f.write(value_offsets.tobytes())
+        f.write(b''.join(index.keys))
+        f.write(values)
+    os.replace(temp_path, path)
+
+
+class MappedMibIndex:
+    """Read-only MibIndex over a file written by write_shared_mib"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Not a shared MIB file: {path}")
+        view = memoryview(self.map)
+        start = HEADER.size
+        size = (self.count + 1) * 4
+        self.key_offsets = view[start:start + size].cast('I')
+        self.value_offsets = view[start + size:start + 2 * size].cast('I')
+        self.keys_base = start + 2 * size
+        self.values_base = self.keys_base + self.key_offsets[self.count]
+        self.summary = {}
+
+    def __len__(self):
+        return self.count
+
+    def key(self, i):
+        return self.map[self.keys_base + self.key_offsets[i]:self.keys_base + self.key_offsets[i + 1]]
+
+    def _bisect(self, key, right):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            probe = self.key(mid)
+            if probe < key or (right and probe == key):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def get(self, oid):
+        key = encode_oid(oid)
+        i = self._bisect(key, False)
+        if i < self.count and self.key(i) == key:
+            return oid, self.syntax(i)
+        return None
+
+    def next_index(self, oid):
+        return self._bisect(encode_oid(oid), True)
+
+    def item(self, i):
+        return decode_oid(self.key(i)), self.syntax(i)
+
+    def syntax(self, i):
+        start = self.values_base + self.value_offsets[i]
+        end = self.values_base + self.value_offsets[i + 1]
+        syntax_class, unpacker = SYNTAX_CODES[self.map[start]]
+        if unpacker is None:
+            return syntax_class(self.map[start + 1:end])
+        return syntax_class(unpacker.unpack_from(self.map, start + 1)[0])
+
+
+class SharedMib(FiveGMibInstrum):
+    """MIB instrumentation for a worker serving the leader's published file"""
+
+    def __init__(self, path, reload_interval=RELOAD_INTERVAL):
+        super().__init__()
+        self.path = path
+        self.reload_interval = reload_interval
+        self._identity = None
+        self._checked = 0.0
+
+    def reload(self):
+        """Map the published file again if the leader replaced it"""
+        now = time.monotonic()
+        if now - self._checked < self.reload_interval:
+            return
+        self._checked = now
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        identity = (st.st_ino, st.st_mtime_ns)
+        if identity != self._identity:
+            try:
+                self.index = MappedMibIndex(self.path)
+                self._identity = identity
+            except (OSError, ValueError) as e:
+                print(f"Error mapping {self.path}: {e}")
+
+    def pinned(self):
+        """Pick up a new snapshot between PDUs only, never inside one"""
+        self.reload()
+        return nullcontext()
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+SNMP trap/inform receiver for NF alarms
+SNMPv2c traps and informs are decoded by a small BER parser on the receive
+thread (pyasn1 is only used for SNMPv1 traps) and pushed into a bounded
+queue. A consumer thread hands them to on_batch(events) in batches. When the
+queue is full new traps are dropped and counted, and informs are left
+unacknowledged so the sender retransmits later.
+
+Usage: python snmp_traps.py [--host 0.0.0.0] [--port 162] [--community public]
+"""
+
+import argparse
+import queue
+import socket
+import threading
+import time
+
+from pyasn1.codec.ber import decoder
+from pyasn1.type import univ
+from pysnmp.proto import api
+
+from snmp_mib import NOTIFICATION_NAMES, SNMP_TRAP_OID, SNMP_TRAPS_OID, SYS_UPTIME_OID, object_name
+
+DEFAULT_ADDRESS = ('0.0.0.0', 162)
+DEFAULT_QUEUE_SIZE = 20000
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_BATCH_INTERVAL = 0.05
+RECEIVE_BUFFER = 4 * 1024 * 1024
+
+SEQUENCE = 0x30
+INTEGER = 0x02
+OCTET_STRING = 0x04
+OBJECT_IDENTIFIER = 0x06
+IP_ADDRESS = 0x40
+UNSIGNED_TAGS = (0x41, 0x42, 0x43, 0x46)  # Counter32, Gauge32, TimeTicks, Counter64
+TRAP_PDU = 0xA7
+INFORM_PDU = 0xA6
+RESPONSE_PDU = 0xA2
+PDU_KINDS = {TRAP_PDU: 'trap', INFORM_PDU: 'inform'}
+SNMP_V2C = 1
+
+
+class TrapDecodeError(Exception):
+    """Raised for datagrams that are not well-formed SNMP notifications"""
+
+
+def read_tlv(data, pos, end):
+    """Return (tag, value start, value end) of the BER element at pos"""
+    if pos + 2 > end:
+        raise TrapDecodeError("truncated element")
+    tag = data[pos]
+    length = data[pos + 1]
+    pos += 2
+    if length & 0x80:
+        size = length & 0x7F
+        if not 0 < size <= 4 or pos + size > end:
+            raise TrapDecodeError("bad length")
+        length = int.from_bytes(data[pos:pos + size], 'big')
+        pos += size
+    if pos + length > end:
+        raise TrapDecodeError("truncated element")
+    return tag, pos, pos + length
+
+
+def read_oid(data, start, end):
+    arcs = []
+    value = 0
+    for byte in data[start:end]:
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            arcs.append(value)
+            value = 0
+    if not arcs:
+        raise TrapDecodeError("empty OID")
+    first = arcs[0]
+    head = (first // 40, first % 40) if first < 80 else (2, first - 80)
+    return head + tuple(arcs[1:])
+
+
+def text(raw):
+    """Octet strings as text when printable, else as hex"""
+    try:
+        value = raw.decode()
+        if value.isprintable():
+            return value
+    except UnicodeDecodeError:
+        pass
+    return raw.hex(':')
+
+
+def decode_value(tag, data, start, end):
+    if tag == INTEGER:
+        return int.from_bytes(data[start:end], 'big', signed=True)
+    if tag in UNSIGNED_TAGS:
+        return int.from_bytes(data[start:end], 'big')
+    if tag == OCTET_STRING:
+        return text(bytes(data[start:end]))
+    if tag == OBJECT_IDENTIFIER:
+        return read_oid(data, start, end)
+    if tag == IP_ADDRESS:
+        return '.'.join(str(byte) for byte in data[start:end])
+    # NULL, noSuchObject/noSuchInstance/endOfMibView, Opaque
+    return None if start == end else bytes(data[start:end]).hex()
+
+
+def decode_notification(data):
+    """Fast path for SNMPv2c traps/informs
+
+    Returns (kind, community, request id, PDU tag offset, [(oid, value)]), or
+    None for other SNMP versions (see decode_v1_trap).
+    """
+    try:
+        tag, pos, end = read_tlv(data, 0, len(data))
+        if tag != SEQUENCE:
+            raise TrapDecodeError("not an SNMP message")
+        tag, start, pos = read_tlv(data, pos, end)
+        if tag != INTEGER or int.from_bytes(data[start:pos], 'big') != SNMP_V2C:
+            return None
+        tag, start, pos = read_tlv(data, pos, end)
+        community = bytes(data[start:pos])
+        pdu_offset = pos
+        tag, pos, end = read_tlv(data, pos, end)
+        kind = PDU_KINDS.get(tag)
+        if kind is None:
+            raise TrapDecodeError("not a notification")
+        tag, start, pos = read_tlv(data, pos, end)
+        request_id = int.from_bytes(data[start:pos], 'big', signed=True)
+        _, _, pos = read_tlv(data, pos, end)  # error-status
+        _, _, pos = read_tlv(data, pos, end)  # error-index
+        tag, pos, end = read_tlv(data, pos, end)
+        varbinds = []
+        while pos < end:
+            _, start, pos = read_tlv(data, pos, end)
+            tag, oid_start, value_pos = read_tlv(data, start, pos)
+            if tag != OBJECT_IDENTIFIER:
+                raise TrapDecodeError("varbind without OID")
+            oid = read_oid(data, oid_start, value_pos)
+            tag, value_start, value_end = read_tlv(data, value_pos, pos)
+            varbinds.append((oid, decode_value(tag, data, value_start, value_end)))
+        return kind, community, request_id, pdu_offset, varbinds
+    except (IndexError, ValueError) as e:
+        raise TrapDecodeError(str(e))
+
+
+def python_value(value):
+    if isinstance(value, univ.ObjectIdentifier):
+        return tuple(value)
+    if isinstance(value, univ.Integer):
+        return int(value)
+    if isinstance(value, univ.OctetString):
+        return text(value.asOctets())
+    return None
+
+
+def decode_v1_trap(data):
+    """Slow path for SNMPv1 traps, translated to v2 form (RFC 3584)
+
+    Returns (community, [(oid, value)]) like the fast path's varbinds.
+    """
+    p = api.protoModules[api.protoVersion1]
+    try:
+        message, _ = decoder.decode(data, asn1Spec=p.Message())
+    except Exception as e:
+        raise TrapDecodeError(str(e))
+    pdu = p.apiMessage.getPDU(message)
+    if not pdu.isSameTypeWith(p.TrapPDU()):
+        raise TrapDecodeError("not a notification")
+    generic = int(p.apiTrapPDU.getGenericTrap(pdu))
+    if generic == 6:
+        trap_oid = tuple(p.apiTrapPDU.getEnterprise(pdu)) + (0, int(p.apiTrapPDU.getSpecificTrap(pdu)))
+    else:
+        trap_oid = SNMP_TRAPS_OID + (generic + 1,)
+    varbinds = [(SYS_UPTIME_OID, int(p.apiTrapPDU.getTimeStamp(pdu))), (SNMP_TRAP_OID, trap_oid)]
+    varbinds += [(tuple(oid), python_value(value)) for oid, value in p.apiTrapPDU.getVarBinds(pdu)]
+    return bytes(p.apiMessage.getCommunity(message)), varbinds
+
+
+def dotted(oid):
+    return '.'.join(str(arc) for arc in oid)
+
+
+def build_event(received, source, kind, varbinds):
+    """Event dict for one notification: name, trap OID, uptime and named varbinds"""
+    uptime = None
+    trap_oid = None
+    objects = {}
+    for oid, value in varbinds:
+        if oid == SYS_UPTIME_OID:
+            uptime = value
+        elif oid == SNMP_TRAP_OID:
+            trap_oid = value if isinstance(value, tuple) else None
+        else:
+            objects[object_name(oid)] = dotted(value) if isinstance(value, tuple) else value
+    return {
+        "time": received,
+        "source": source,
+        "kind": kind,
+        "name": NOTIFICATION_NAMES.get(trap_oid) or (dotted(trap_oid) if trap_oid else 'unknown'),
+        "trapOid": dotted(trap_oid) if trap_oid else None,
+        "severity": objects.get('alarmSeverity'),
+        "uptime": uptime,
+        "varbinds": objects
+    }
+
+
+class TrapReceiver:
+    """UDP trap/inform listener feeding a batch consumer through a bounded queue"""
+
+    def __init__(self, address=DEFAULT_ADDRESS, on_batch=None, communities=('public',),
+                 queue_size=DEFAULT_QUEUE_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+                 batch_interval=DEFAULT_BATCH_INTERVAL):
+        self.address = address
+        self.on_batch = on_batch
+        self.communities = {community.encode() for community in communities}
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.sock = None
+        self._running = False
+        self._threads = []
+        self._stats = {
+            "received": 0,
+            "queued": 0,
+            "dropped": 0,
+            "decodeErrors": 0,
+            "badCommunity": 0,
+            "slowPath": 0,
+            "informsAcked": 0,
+            "batches": 0,
+            "written": 0,
+            "writeErrors": 0,
+            "maxQueueDepth": 0,
+        }
+
+    def open(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER)
+        self.sock.bind(self.address)
+        self.sock.settimeout(0.5)
+        self.address = self.sock.getsockname()
+
+    def start(self):
+        """Bind the socket and start the receive and consumer threads"""
+        self.open()
+        self._running = True
+        for name, target in (('trap-receiver', self.serve), ('trap-consumer', self.consume)):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def close(self):
+        self._running = False
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def serve(self):
+        while self._running:
+            try:
+                data, source = self.sock.recvfrom(65535)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            self.handle(data, source)
+
+    def handle(self, data, source):
+        """Decode one datagram, queue it and acknowledge informs"""
+        stats = self._stats
+        stats["received"] += 1
+        try:
+            decoded = decode_notification(data)
+            if decoded is None:
+                stats["slowPath"] += 1
+                community, varbinds = decode_v1_trap(data)
+                kind, pdu_offset = 'trap', None
+            else:
+                kind, community, _, pdu_offset, varbinds = decoded
+        except TrapDecodeError:
+            stats["decodeErrors"] += 1
+            return
+        if community not in self.communities:
+            stats["badCommunity"] += 1
+            return
+        try:
+            self.queue.put_nowait((time.time(), f"{source[0]}:{source[1]}", kind, varbinds))
+        except queue.Full:
+            # Backpressure: an unacknowledged inform is retransmitted by its sender
+            stats["dropped"] += 1
+            return
+        stats["queued"] += 1
+        if kind == 'inform':
+            # The Response-PDU echoes the inform's request-id and varbinds
+            response = data[:pdu_offset] + bytes((RESPONSE_PDU,)) + data[pdu_offset + 1:]
+            try:
+                self.sock.sendto(response, source)
+                stats["informsAcked"] += 1
+            except OSError:
+                pass
+
+    def next_batch(self):
+        """Wait for the first event, then collect more for up to batch_interval"""
+        try:
+            batch = [self.queue.get(timeout=self.batch_interval)]
+        except queue.Empty:
+            return []
+        depth = self.queue.qsize() + 1
+        if depth > self._stats["maxQueueDepth"]:
+            self._stats["maxQueueDepth"] = depth
+        deadline = time.monotonic() + self.batch_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def consume(self):
+        while self._running or not self.queue.empty():
+            batch = self.next_batch()
+            if batch:
+                self.write(batch)
+
+    def write(self, batch):
+        events = [build_event(*item) for item in batch]
+        self._stats["batches"] += 1
+        self._stats["written"] += len(events)
+        if self.on_batch is not None:
+            try:
+                self.on_batch(events)
+            except Exception as e:
+                self._stats["writeErrors"] += 1
+                print(f"Error storing trap events: {e}")
+
+    def stats(self):
+        return dict(self._stats, queueDepth=self.queue.qsize(), queueSize=self.queue.maxsize,
+                    address=f"{self.address[0]}:{self.address[1]}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='SNMP trap/inform receiver')
+    parser.add_argument('--host', default=DEFAULT_ADDRESS[0])
+    parser.add_argument('--port', type=int, default=DEFAULT_ADDRESS[1])
+    parser.add_argument('--community', action='append', help='accepted community (default public)')
+    args = parser.parse_args()
+
+    def show(events):
+        for event in events:
+            print(f"{time.strftime('%H:%M:%S', time.localtime(event['time']))} {event['source']} "
+                  f"{event['kind']} {event['name']} {event['varbinds']}")
+
+    receiver = TrapReceiver((args.host, args.port), on_batch=show,
+                            communities=args.community or ('public',))
+    receiver.start()
+    print(f"Listening for traps on {args.host}:{args.port}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        receiver.close()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Sampling stack profiler for a running server
+The profiling thread reads every other thread's current frame with
+sys._current_frames() at a fixed rate and counts identical stacks, so the
+profiled code is never instrumented. Cost is bounded: one profile at a time,
+at most MAX_SECONDS long, at most MAX_STACKS distinct stacks kept, and the
+sampling rate drops when a sample takes more than MAX_OVERHEAD of the time.
+"""
+
+import math
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+DEFAULT_HZ = 100
+MAX_HZ = 250
+MAX_SECONDS = 60
+MAX_DEPTH = 128
+MAX_STACKS = 20000
+MAX_LABELS = 50000
+# Fraction of one CPU the sampling loop may use
+MAX_OVERHEAD = 0.05
+
+TRUNCATED = '[truncated]'
+DROPPED = '[other stacks]'
+SPEEDSCOPE_SCHEMA = 'https://www.speedscope.app/file-format-schema.json'
+
+# Per-request thread names end in a counter; drop it so their stacks merge
+THREAD_NUMBER = re.compile(r'[-_]\d+')
+
+_profiling = threading.Lock()
+_labels = {}
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is already running"""
+
+
+def frame_label(code):
+    """Flamegraph label of a code object: qualified name, file and first line"""
+    label = _labels.get(code)
+    if label is None:
+        if len(_labels) >= MAX_LABELS:
+            _labels.clear()
+        name = getattr(code, 'co_qualname', code.co_name)
+        label = _labels[code] = f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return label
+
+
+def thread_stack(frame):
+    """Return a frame's stack as labels, outermost first"""
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    if frame is not None:
+        labels.append(TRUNCATED)
+    labels.reverse()
+    return tuple(labels)
+
+
+class StackProfile:
+    """Counts of (thread name, stack) samples"""
+
+    def __init__(self, hz):
+        self.hz = hz
+        self.stacks = Counter()
+        self.samples = 0
+        self.dropped = 0
+        self.started = time.time()
+        self.duration = 0.0
+
+    def add(self, thread, stack):
+        key = (thread, stack)
+        if key in self.stacks or len(self.stacks) < MAX_STACKS:
+            self.stacks[key] += 1
+        else:
+            self.dropped += 1
+            self.stacks[(thread, (DROPPED,))] += 1
+
+    def collapsed(self):
+        """Brendan Gregg's collapsed-stack format: 'thread;frame;...;frame count' per line"""
+        lines = [f"{';'.join((thread,) + stack)} {count}"
+                 for (thread, stack), count in sorted(self.stacks.items())]
+        return '\n'.join(lines) + '\n'
+
+    def speedscope(self, name='profile'):
+        """speedscope file: one sampled profile per thread, one sample per distinct stack"""
+        # Weight samples by the achieved interval (the rate drops under load)
+        interval = self.duration / self.samples if self.samples else 1 / self.hz
+        frames = []
+        frame_index = {}
+        profiles = {}
+        for (thread, stack), count in sorted(self.stacks.items()):
+            indexes = []
+            for label in stack:
+                index = frame_index.get(label)
+                if index is None:
+                    index = frame_index[label] = len(frames)
+                    frames.append({"name": label})
+                indexes.append(index)
+            profile = profiles.get(thread)
+            if profile is None:
+                profile = profiles[thread] = {
+                    "type": "sampled", "name": thread, "unit": "seconds",
+                    "startValue": 0, "endValue": 0, "samples": [], "weights": []
+                }
+            profile["samples"].append(indexes)
+            profile["weights"].append(count * interval)
+            profile["endValue"] += count * interval
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "stack_profiler",
+            "shared": {"frames": frames},
+            "profiles": list(profiles.values())
+        }
+
+    def stats(self):
+        return {
+            "started": self.started,
+            "seconds": round(self.duration, 3),
+            "hz": self.hz,
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "dropped": self.dropped
+        }
+
+
+def profile_threads(seconds, hz=DEFAULT_HZ, threads=None):
+    """Sample the other threads' stacks for seconds and return a StackProfile
+
+    threads(), if given, returns the idents to sample at each tick (e.g. the
+    threads serving one route). Raises ProfilerBusy if a profile is running.
+    """
+    # min/max pass NaN through, and a NaN deadline never expires
+    seconds = min(max(seconds, 0), MAX_SECONDS) if math.isfinite(seconds) else 0
+    hz = min(max(hz, 1), MAX_HZ)
+    if not _profiling.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running")
+    try:
+        profile = StackProfile(hz)
+        interval = 1 / hz
+        own = threading.get_ident()
+        started = time.monotonic()
+        deadline = started + seconds
+        while True:
+            tick = time.monotonic()
+            if tick >= deadline:
+                break
+            wanted = threads() if threads is not None else None
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            frames = sys._current_frames()
+            for ident, frame in frames.items():
+                if ident == own or (wanted is not None and ident not in wanted):
+                    continue
+                name = THREAD_NUMBER.sub('', names.get(ident, f"thread {ident}"))
+                profile.add(name, thread_stack(frame))
+            # Holding frames would keep their locals alive until the next tick
+            frames = frame = None
+            profile.samples += 1
+            spent = time.monotonic() - tick
+            time.sleep(max(interval - spent, spent / MAX_OVERHEAD - spent, 0))
+        profile.duration = time.monotonic() - started
+        return profile
+    finally:
+        _profiling.release()
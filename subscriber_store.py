@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Compact indexed in-memory store for subscribers and sessions
+Kept in sync from the versioned RESTCONF datasets
+"""
+
+import sys
+import threading
+
+
+def intern_str(value):
+    """Intern a repeated string value (status, DNN, slice, NF name)"""
+    return sys.intern(str(value)) if value is not None else None
+
+
+def first_of(entry, *names):
+    """Return the first present field among names"""
+    for name in names:
+        value = entry.get(name)
+        if value is not None:
+            return value
+    return None
+
+
+def snssai_key(value):
+    """Normalize an S-NSSAI (dict, list or string) to "sst" or "sst-sd" """
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        sst = value.get('sst')
+        sd = value.get('sd')
+        if sst is None:
+            return None
+        return intern_str(f"{sst}-{sd}" if sd else sst)
+    return intern_str(value)
+
+
+class SubscriberRecord:
+    """One subscriber held in compact form"""
+
+    __slots__ = ('imsi', 'supi', 'msisdn', 'status', 'dnn', 'snssai', 'serving_nf')
+
+    def __init__(self, entry):
+        self.imsi = str(first_of(entry, 'imsi', 'supi', 'id'))
+        self.supi = first_of(entry, 'supi')
+        self.msisdn = first_of(entry, 'msisdn', 'gpsi')
+        self.status = intern_str(first_of(entry, 'status', 'state'))
+        self.dnn = intern_str(first_of(entry, 'dnn', 'apn'))
+        self.snssai = snssai_key(first_of(entry, 'sNssai', 'snssai', 's-nssai', 'slice'))
+        self.serving_nf = intern_str(first_of(entry, 'servingAmf', 'amf', 'servingNf'))
+
+    def index_values(self):
+        return {
+            'status': (self.status,),
+            'snssai': (self.snssai,),
+            'servingNf': (self.serving_nf,),
+        }
+
+    def to_dict(self):
+        return {
+            "imsi": self.imsi,
+            "supi": self.supi,
+            "msisdn": self.msisdn,
+            "status": self.status,
+            "dnn": self.dnn,
+            "sNssai": self.snssai,
+            "servingNf": self.serving_nf
+        }
+
+
+class SessionRecord:
+    """One PDU session held in compact form"""
+
+    __slots__ = ('session_id', 'imsi', 'status', 'dnn', 'snssai', 'smf', 'upf')
+
+    def __init__(self, entry):
+        self.session_id = str(first_of(entry, 'sessionId', 'session-id', 'id'))
+        imsi = first_of(entry, 'imsi', 'supi')
+        self.imsi = str(imsi) if imsi is not None else None
+        self.status = intern_str(first_of(entry, 'status', 'state'))
+        self.dnn = intern_str(first_of(entry, 'dnn', 'apn'))
+        self.snssai = snssai_key(first_of(entry, 'sNssai', 'snssai', 's-nssai', 'slice'))
+        self.smf = intern_str(first_of(entry, 'smf', 'servingSmf'))
+        self.upf = intern_str(first_of(entry, 'upf', 'servingUpf'))
+
+    def index_values(self):
+        return {
+            'status': (self.status,),
+            'snssai': (self.snssai,),
+            'servingNf': (self.smf, self.upf),
+            'imsi': (self.imsi,),
+        }
+
+    def to_dict(self):
+        return {
+            "sessionId": self.session_id,
+            "imsi": self.imsi,
+            "status": self.status,
+            "dnn": self.dnn,
+            "sNssai": self.snssai,
+            "smf": self.smf,
+            "upf": self.upf
+        }
+
+
+class RecordTable:
+    """Records keyed by ID with hash indexes on selected attributes"""
+
+    def __init__(self, record_class, index_names):
+        self.record_class = record_class
+        self._lock = threading.RLock()
+        self._records = {}
+        self._indexes = {name: {} for name in index_names}
+
+    def _index(self, key, record):
+        for name, values in record.index_values().items():
+            index = self._indexes[name]
+            for value in values:
+                if value is not None:
+                    index.setdefault(value, set()).add(key)
+
+    def _unindex(self, key, record):
+        for name, values in record.index_values().items():
+            index = self._indexes[name]
+            for value in values:
+                bucket = index.get(value)
+                if bucket is not None:
+                    bucket.discard(key)
+                    if not bucket:
+                        del index[value]
+
+    def apply(self, changes):
+        """Apply [(id, op, entry)] changes from a VersionedDataset"""
+        with self._lock:
+            for key, op, entry in changes:
+                old = self._records.pop(key, None)
+                if old is not None:
+                    self._unindex(key, old)
+                if op != 'remove' and isinstance(entry, dict):
+                    record = self.record_class(entry)
+                    self._records[key] = record
+                    self._index(key, record)
+
+    def get(self, key):
+        """Return one record by ID, or None"""
+        return self._records.get(key)
+
+    def query(self, filters, limit=None):
+        """Return records matching all index filters (intersection of index buckets)"""
+        with self._lock:
+            buckets = []
+            for name, value in filters.items():
+                bucket = self._indexes[name].get(value)
+                if not bucket:
+                    return [], 0
+                buckets.append(bucket)
+            if not buckets:
+                keys = self._records.keys()
+            else:
+                buckets.sort(key=len)
+                keys = buckets[0].intersection(*buckets[1:]) if len(buckets) > 1 else buckets[0]
+            total = len(keys)
+            records = []
+            for key in keys:
+                if limit is not None and len(records) >= limit:
+                    break
+                records.append(self._records[key])
+            return records, total
+
+    def counts(self, name):
+        """Return the number of records per value of one index"""
+        with self._lock:
+            return {value: len(keys) for value, keys in self._indexes[name].items()}
+
+    def __len__(self):
+        return len(self._records)
+
+
+class SubscriberStore:
+    """Subscriber and session tables for the dashboard"""
+
+    def __init__(self):
+        self.subscribers = RecordTable(SubscriberRecord, ('status', 'snssai', 'servingNf'))
+        self.sessions = RecordTable(SessionRecord, ('status', 'snssai', 'servingNf', 'imsi'))
+
+    def stats(self):
+        return {
+            "subscribers": len(self.subscribers),
+            "sessions": len(self.sessions),
+            "subscribersByStatus": self.subscribers.counts('status'),
+            "sessionsByStatus": self.sessions.counts('status')
+        }
@@ -0,0 +1,120 @@
+"""Tests for admission control: token buckets and the heavy/cheap in-flight split"""
+
+import json
+
+import pytest
+
+import admission
+import web_dashboard_server as dashboard
+from admission import CHEAP, HEAVY, AdmissionController, AdmissionMiddleware, forwarded_client
+from dataset_versions import VersionedDataset
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(admission.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_bucket_allows_burst_then_rate_limits_with_retry_after(clock):
+    controller = AdmissionController(max_concurrent=0, client_rate=10, client_burst=30)
+    for _ in range(30):
+        ticket, status, _ = controller.admit('a', CHEAP)
+        assert ticket is not None
+        controller.release(ticket)
+    ticket, status, retry_after = controller.admit('a', CHEAP)
+    assert ticket is None and status == 429
+    assert retry_after == pytest.approx(0.1)
+    # Other clients have their own bucket
+    assert controller.admit('b', CHEAP)[0] is not None
+    clock[0] += 0.1
+    assert controller.admit('a', CHEAP)[0] is not None
+
+
+def test_heavy_requests_cost_more_tokens(clock):
+    controller = AdmissionController(max_concurrent=0, client_rate=10, client_burst=30)
+    for _ in range(6):
+        assert controller.admit('a', HEAVY)[0] is not None
+    ticket, status, retry_after = controller.admit('a', HEAVY)
+    assert status == 429 and retry_after == pytest.approx(0.5)
+    assert controller.stats()["routes"][HEAVY] == {"admitted": 6, "rateLimited": 1, "shed": 0}
+
+
+def test_heavy_routes_cannot_take_the_capacity_of_cheap_ones(clock):
+    controller = AdmissionController(max_concurrent=4, heavy_limit=2, client_rate=0)
+    heavy = [controller.admit(str(i), HEAVY)[0] for i in range(2)]
+    assert all(heavy)
+    ticket, status, retry_after = controller.admit('x', HEAVY)
+    assert ticket is None and status == 503 and retry_after == 1
+    cheap = [controller.admit(str(i), CHEAP)[0] for i in range(2)]
+    assert all(cheap)
+    assert controller.admit('y', CHEAP)[1] == 503
+    assert controller.stats()["inFlight"] == {CHEAP: 2, HEAVY: 2}
+
+    controller.release(heavy[0])
+    controller.release(heavy[0])
+    assert controller.stats()["inFlight"] == {CHEAP: 2, HEAVY: 1}
+    assert controller.admit('x', HEAVY)[0] is not None
+
+
+def test_shed_requests_get_their_tokens_back(clock):
+    controller = AdmissionController(max_concurrent=1, heavy_limit=1, client_rate=10, client_burst=5)
+    held = controller.admit('a', HEAVY)[0]
+    for _ in range(10):
+        assert controller.admit('b', HEAVY)[1] == 503
+    controller.release(held)
+    assert controller.admit('b', HEAVY)[0] is not None
+
+
+def test_middleware_rejects_with_retry_after_and_releases_after_body():
+    controller = AdmissionController(max_concurrent=1, heavy_limit=1, client_rate=0)
+
+    def app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [b'ok']
+
+    middleware = AdmissionMiddleware(app, controller, lambda path, query: HEAVY if path.startswith('/api') else None,
+                                     lambda environ: environ['REMOTE_ADDR'])
+    responses = []
+
+    def start_response(status, headers, exc_info=None):
+        responses.append((status, dict(headers)))
+
+    environ = {'PATH_INFO': '/api/snapshot', 'QUERY_STRING': '', 'REMOTE_ADDR': '10.0.0.1'}
+    first = middleware(environ, start_response)
+    assert controller.stats()["inFlight"][HEAVY] == 1
+    rejected = middleware(dict(environ), start_response)
+    assert responses[-1][0] == '503 Service Unavailable'
+    assert responses[-1][1]['Retry-After'] == '1'
+    assert json.loads(b''.join(rejected))["error"] == "Server overloaded"
+    assert b''.join(first) == b'ok'
+    assert controller.stats()["inFlight"][HEAVY] == 0
+
+    # Unclassified paths bypass admission
+    middleware({'PATH_INFO': '/', 'QUERY_STRING': '', 'REMOTE_ADDR': '10.0.0.1'}, start_response)
+    assert controller.stats()["routes"][HEAVY]["admitted"] == 1
+
+
+def test_only_diffable_since_values_are_cheap(monkeypatch):
+    dataset = VersionedDataset('subscribers', ('imsi',), max_versions=2)
+    monkeypatch.setitem(dashboard.versioned_datasets, 'subscribers', dataset)
+    for count in range(1, 5):
+        dataset.update({"subscribers": [{"imsi": str(i)} for i in range(count)]})
+
+    assert dashboard.admission_class('/api/subscribers', 'since=4') == CHEAP
+    assert dashboard.admission_class('/api/subscribers', 'since=2') == CHEAP
+    # Full resyncs: expired, zero and future versions, and no since at all
+    for query in ('since=1', 'since=0', 'since=9', ''):
+        assert dashboard.admission_class('/api/subscribers', query) == HEAVY
+
+
+def test_forwarded_client_ignores_hops_the_client_wrote():
+    proxies = ('10.0.0.1', '10.0.0.2')
+    # The leftmost entries are whatever the client sent
+    assert forwarded_client('10.0.0.1', 'spoofed, 203.0.113.7', proxies) == '203.0.113.7'
+    assert forwarded_client('10.0.0.1', '1.1.1.1, 203.0.113.7, 10.0.0.2', proxies) == '203.0.113.7'
+    # Untrusted peers cannot name another client
+    assert forwarded_client('198.51.100.9', '203.0.113.7', proxies) == '198.51.100.9'
+    assert forwarded_client('10.0.0.1', '10.0.0.2', proxies) == '10.0.0.1'
+    assert forwarded_client('10.0.0.1', None, proxies) == '10.0.0.1'
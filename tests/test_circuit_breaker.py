@@ -0,0 +1,146 @@
+"""Tests for circuit breaker transitions and adaptive timeouts"""
+
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def make_breaker(**settings):
+    settings.setdefault('failure_threshold', 3)
+    settings.setdefault('reset_timeout', 5)
+    settings.setdefault('max_reset_timeout', 12)
+    return CircuitBreaker('test', **settings)
+
+
+def fail(breaker, times):
+    for _ in range(times):
+        breaker.allow()
+        breaker.failure()
+
+
+def test_opens_after_consecutive_failures_and_fails_fast(clock):
+    breaker = make_breaker()
+    fail(breaker, 2)
+    breaker.success(0.01)
+    fail(breaker, 2)
+    assert breaker.state == CLOSED
+    fail(breaker, 1)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    assert breaker.stats()["rejected"] == 1
+    assert breaker.stats()["opened"] == 1
+
+
+def test_half_open_admits_one_probe_and_success_closes(clock):
+    breaker = make_breaker()
+    fail(breaker, 3)
+    clock[0] += 4.9
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    clock[0] += 0.2
+    breaker.allow()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.success(0.01)
+    assert breaker.state == CLOSED
+    breaker.allow()
+
+
+def test_failed_probe_reopens_for_twice_as_long_up_to_the_cap(clock):
+    breaker = make_breaker()
+    fail(breaker, 3)
+    for open_for in (10, 12, 12):
+        clock[0] += 100
+        breaker.allow()
+        breaker.failure()
+        assert breaker.state == OPEN
+        clock[0] += open_for - 0.1
+        with pytest.raises(CircuitOpenError):
+            breaker.allow()
+        clock[0] -= open_for - 0.1
+    # A success resets the backoff
+    clock[0] += 100
+    breaker.allow()
+    breaker.success(0.01)
+    fail(breaker, 3)
+    clock[0] += 5
+    breaker.allow()
+    assert breaker.state == HALF_OPEN
+
+
+def test_probe_slot_is_freed_by_ignore_or_after_max_timeout(clock):
+    breaker = make_breaker(max_timeout=2)
+    fail(breaker, 3)
+    clock[0] += 5
+    breaker.allow()
+    breaker.ignore()
+    breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    clock[0] += 2.1
+    breaker.allow()
+    assert breaker.state == HALF_OPEN
+
+
+def test_timeout_follows_p99_latency_within_bounds(clock):
+    breaker = make_breaker(min_timeout=0.5, max_timeout=2, timeout_multiplier=4)
+    for _ in range(circuit_breaker.MIN_SAMPLES - 1):
+        breaker.success(0.1)
+    assert breaker.timeout() == 2
+    breaker.success(0.1)
+    # 4 x 0.1 s is below the floor
+    assert breaker.timeout() == 0.5
+    for _ in range(circuit_breaker.LATENCY_WINDOW):
+        breaker.success(0.3)
+    assert breaker.timeout() == pytest.approx(1.2)
+
+
+def test_timed_out_calls_raise_the_timeout(clock):
+    breaker = make_breaker(failure_threshold=1000, min_timeout=0.5, max_timeout=2)
+    for _ in range(circuit_breaker.LATENCY_WINDOW):
+        breaker.success(0.2)
+    assert breaker.timeout() == pytest.approx(0.8)
+    for _ in range(circuit_breaker.LATENCY_WINDOW):
+        breaker.failure(timed_out_after=breaker.timeout())
+    assert breaker.timeout() == 2
+    assert breaker.stats()["timeouts"] == circuit_breaker.LATENCY_WINDOW
+
+
+def test_timeout_grows_before_a_slower_upstream_opens_the_breaker(clock):
+    breaker = make_breaker(failure_threshold=5, min_timeout=0.5, max_timeout=2)
+    for _ in range(circuit_breaker.LATENCY_WINDOW):
+        breaker.success(0.05)
+    assert breaker.timeout() == 0.5
+    # The upstream now answers in 0.6 s: calls time out until the timeout covers it
+    timeouts = 0
+    while breaker.timeout() < 0.6:
+        breaker.failure(timed_out_after=breaker.timeout())
+        timeouts += 1
+    assert timeouts < 5
+    assert breaker.state == CLOSED
+    breaker.success(0.6)
+    assert breaker.stats()["consecutiveFailures"] == 0
+
+
+def test_local_pool_waits_are_not_upstream_failures(clock):
+    import web_dashboard_server as dashboard
+    breaker = make_breaker()
+    for _ in range(5):
+        breaker.allow()
+        dashboard.record_call(breaker, clock[0], error=dashboard.PoolTimeoutError("pool full"))
+    assert breaker.state == CLOSED
+    assert breaker.stats()["failures"] == 0
+    for _ in range(3):
+        breaker.allow()
+        dashboard.record_call(breaker, clock[0], error=TimeoutError("timed out"))
+    assert breaker.state == OPEN
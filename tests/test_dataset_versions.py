@@ -0,0 +1,82 @@
+"""Tests for VersionedDataset deltas and version handling"""
+
+from dataset_versions import VersionedDataset
+
+
+def subscribers(*entries):
+    return {"subscribers": [dict(entry) for entry in entries]}
+
+
+def make_dataset(max_versions=100):
+    return VersionedDataset('subscribers', ('imsi',), max_versions)
+
+
+def test_first_update_is_version_one_and_unchanged_payload_keeps_version():
+    dataset = make_dataset()
+    assert dataset.update(subscribers({"imsi": "1", "status": "active"})) == 1
+    assert dataset.update(subscribers({"imsi": "1", "status": "active"})) == 1
+
+
+def test_delta_lists_add_replace_and_remove():
+    dataset = make_dataset()
+    dataset.update(subscribers({"imsi": "1", "status": "active"}, {"imsi": "2", "status": "active"}))
+    dataset.update(subscribers({"imsi": "1", "status": "idle"}, {"imsi": "3", "status": "active"}))
+
+    delta = dataset.delta(1)
+    assert delta["version"] == 2 and delta["full"] is False
+    changes = {change["path"]: change for change in delta["changes"]}
+    assert changes["/subscribers/1"] == {"op": "replace", "path": "/subscribers/1",
+                                         "value": {"imsi": "1", "status": "idle"}}
+    assert changes["/subscribers/3"]["op"] == "add"
+    assert changes["/subscribers/2"] == {"op": "remove", "path": "/subscribers/2"}
+
+
+def test_delta_over_several_versions_collapses_changes():
+    dataset = make_dataset()
+    dataset.update(subscribers({"imsi": "1"}))
+    dataset.update(subscribers({"imsi": "1"}, {"imsi": "2"}))
+    dataset.update(subscribers({"imsi": "1"}))
+
+    # 2 was added and removed again after version 1: nothing to send
+    assert dataset.delta(1)["changes"] == []
+    assert dataset.delta(3) == {"version": 3, "full": False, "changes": []}
+
+
+def test_delta_is_none_when_too_old_or_ahead():
+    dataset = make_dataset(max_versions=2)
+    for i in range(5):
+        dataset.update(subscribers({"imsi": "1", "n": i}))
+    assert dataset.version == 5
+    assert dataset.delta(3) is not None
+    assert dataset.delta(2) is None
+    assert dataset.delta(6) is None
+
+
+def test_adopted_consecutive_version_keeps_change_log():
+    dataset = make_dataset()
+    dataset.update(subscribers({"imsi": "1"}), version=7)
+    dataset.update(subscribers({"imsi": "1"}, {"imsi": "2"}), version=8)
+    assert dataset.delta(7)["changes"] == [{"op": "add", "path": "/subscribers/2",
+                                            "value": {"imsi": "2"}}]
+
+
+def test_version_jump_drops_change_log_so_clients_get_full_payload():
+    dataset = make_dataset()
+    dataset.update(subscribers({"imsi": "1"}), version=1)
+    dataset.update(subscribers({"imsi": "1"}, {"imsi": "2"}), version=2)
+    # Another process published versions 3 and 4 that this one never saw
+    dataset.update(subscribers({"imsi": "3"}), version=5)
+
+    assert dataset.version == 5
+    assert dataset.delta(2) is None
+    assert dataset.delta(5)["changes"] == []
+    assert dataset.full() == {"version": 5, "full": True, "data": subscribers({"imsi": "3"})}
+
+
+def test_listeners_receive_applied_changes():
+    dataset = make_dataset()
+    received = []
+    dataset.add_listener(received.append)
+    dataset.update(subscribers({"imsi": "1"}))
+    dataset.update(subscribers())
+    assert received == [[("1", "add", {"imsi": "1"})], [("1", "remove", None)]]
@@ -0,0 +1,27 @@
+"""Tests for the aggregation sample windows"""
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from metrics_aggregate import SampleWindows
+
+
+def test_series_beyond_max_series_are_dropped():
+    windows = SampleWindows(8, initial_series=2, max_series=3)
+    windows.append(1.0, {f"nf{i}": i for i in range(5)})
+    names, times, block = windows.window(['*'], 60)
+    assert names == ['nf0', 'nf1', 'nf2']
+    stats = windows.stats()
+    assert stats["series"] == 3
+    assert stats["droppedSeries"] == 2
+
+
+def test_window_is_not_overwritten_by_later_appends():
+    windows = SampleWindows(4)
+    for t in range(4):
+        windows.append(float(t), {"nf": t})
+    names, times, block = windows.window(['nf'], 60)
+    windows.append(4.0, {"nf": 40})
+    assert times.tolist() == [0.0, 1.0, 2.0, 3.0]
+    assert block.tolist() == [[0.0, 1.0, 2.0, 3.0]]
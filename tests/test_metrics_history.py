@@ -0,0 +1,22 @@
+"""Tests for the tiered in-memory metrics history"""
+
+from metrics_history import MetricsHistory, RingTier
+
+
+def test_ring_grows_to_capacity_then_wraps():
+    tier = RingTier(1, 4)
+    for t in range(3):
+        tier.add(float(t), float(t))
+    assert len(tier.times) == 2
+    for t in range(3, 10):
+        tier.add(float(t), float(t))
+    assert len(tier.times) == 4
+    # Four closed buckets plus the open one
+    assert [point[0] for point in tier.points(0, 100)] == [5.0, 6.0, 7.0, 8.0, 9.0]
+
+
+def test_series_beyond_max_series_are_dropped():
+    history = MetricsHistory(max_series=2)
+    history.record(1.0, {"a": 1, "b": 2, "c": 3})
+    assert history.names() == ["a", "b"]
+    assert history.stats()["droppedSeries"] == 1
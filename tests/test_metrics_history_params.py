@@ -0,0 +1,39 @@
+"""Tests for /api/metrics/history parameter validation"""
+
+import pytest
+
+import web_dashboard_server as dashboard
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # No background collection or disk storage: only the parameter checks are under test
+    monkeypatch.setattr(dashboard, 'start_background_thread', lambda name, target: None)
+    monkeypatch.setattr(dashboard, 'query_metrics_history', lambda patterns, start, end, step: {})
+    monkeypatch.setattr(dashboard.admission, 'client_rate', 0)
+    return dashboard.app.test_client()
+
+
+@pytest.mark.parametrize('query', [
+    'step=nan',
+    'step=inf',
+    'from=0&to=inf',
+    'from=-inf&to=100',
+    'from=nan&to=100',
+    'to=nan',
+])
+def test_non_finite_values_are_rejected(client, query):
+    response = client.get(f'/api/metrics/history?{query}')
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "from, to and step must be finite"}
+
+
+@pytest.mark.parametrize('query', ['step=0', 'step=-5', 'from=200&to=100', 'step=abc'])
+def test_invalid_ranges_are_rejected(client, query):
+    assert client.get(f'/api/metrics/history?{query}').status_code == 400
+
+
+def test_valid_range_is_answered(client):
+    response = client.get('/api/metrics/history?series=amf/*&from=100&to=200&step=10')
+    assert response.status_code == 200
+    assert response.get_json() == {"from": 100.0, "to": 200.0, "series": {}}
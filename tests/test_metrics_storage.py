@@ -0,0 +1,29 @@
+"""Tests for the mmap'd metrics segments"""
+
+from metrics_storage import MetricsStorage
+
+
+def test_evicted_segments_keep_their_samples(tmp_path):
+    storage = MetricsStorage(str(tmp_path), max_mapped=4)
+    samples = {f"amf/{i}/cpu": float(i) for i in range(10)}
+    for t in range(1, 4):
+        storage.append_many(float(t), samples)
+    assert storage.stats()["mapped"] == 4
+    storage.flush()
+    assert list(storage.query("amf/0/cpu", 0, 10)[0]) == [1.0, 0.0, 2.0, 0.0, 3.0, 0.0]
+    storage.close()
+
+    reopened = MetricsStorage(str(tmp_path), max_mapped=4)
+    assert reopened.stats()["records"] == 30
+    assert list(reopened.query("amf/9/cpu", 2, 3)[0]) == [2.0, 9.0, 3.0, 9.0]
+    reopened.close()
+
+
+def test_series_beyond_max_series_are_dropped(tmp_path):
+    storage = MetricsStorage(str(tmp_path), max_series=2)
+    assert storage.append("a", 1.0, 1.0)
+    assert storage.append("b", 1.0, 1.0)
+    assert not storage.append("c", 1.0, 1.0)
+    assert storage.names() == ["a", "b"]
+    assert storage.stats()["dropped"] == 1
+    storage.close()
@@ -0,0 +1,47 @@
+"""Tests for connection reuse in the RESTCONF pool"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from restconf_pool import RestconfConnectionPool
+
+
+def serve(protocol_version):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = b'{}'
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    Handler.protocol_version = protocol_version
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.mark.parametrize('protocol_version, reused', [('HTTP/1.1', True), ('HTTP/1.0', False)])
+def test_connections_are_reused_only_when_kept_alive(protocol_version, reused):
+    server = serve(protocol_version)
+    pool = RestconfConnectionPool(pool_size=2)
+    url = f"http://127.0.0.1:{server.server_address[1]}/restconf/data/x"
+    try:
+        for _ in range(3):
+            assert pool.request('GET', url)[0] == 200
+        stats = pool.stats()
+    finally:
+        pool.close()
+        server.shutdown()
+        server.server_close()
+    # An HTTP/1.0 upstream closes every connection without a Connection header
+    assert stats["hits"] == (2 if reused else 0)
+    assert stats["newConnections"] == (1 if reused else 3)
+    assert stats["retries"] == 0
+    assert stats["idle"] == (1 if reused else 0)
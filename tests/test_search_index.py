@@ -0,0 +1,74 @@
+"""Tests for the subscriber prefix search index"""
+
+import pytest
+
+from search_index import (SortedTermIndex, SubscriberSearchIndex,
+                          decode_search_cursor, encode_search_cursor)
+
+
+def test_prefix_returns_sorted_matches_across_chunks():
+    index = SortedTermIndex(chunk_size=4)
+    for i in range(50):
+        index.add(f"00101{i:04d}", f"id{i}")
+    assert len(index) == 50
+    matches = index.prefix("00101001", 100)
+    assert matches == [(f"00101{i:04d}", f"id{i}") for i in range(10, 20)]
+
+
+def test_prefix_after_resumes_past_the_given_pair():
+    index = SortedTermIndex(chunk_size=2)
+    index.bulk_load([("ab", "1"), ("abc", "2"), ("abd", "3"), ("b", "4")])
+    assert index.prefix("ab", 2) == [("ab", "1"), ("abc", "2")]
+    assert index.prefix("ab", 2, after=("abc", "2")) == [("abd", "3")]
+
+
+def test_remove_keeps_index_consistent():
+    index = SortedTermIndex(chunk_size=2)
+    for i in range(10):
+        index.add(f"t{i}", str(i))
+    assert index.remove("t3", "3")
+    assert not index.remove("t3", "3")
+    assert not index.remove("zz", "1")
+    assert len(index) == 9
+    assert [term for term, _ in index.prefix("t", 20)] == [f"t{i}" for i in range(10) if i != 3]
+
+
+def subscriber(imsi, msisdn, dnn):
+    return {"imsi": f"imsi-{imsi}", "msisdn": msisdn, "dnn": dnn}
+
+
+def test_search_follows_dataset_changes():
+    index = SubscriberSearchIndex(chunk_size=2)
+    index.apply([("a", "add", subscriber("001010000000001", "4917000001", "internet")),
+                 ("b", "add", subscriber("001010000000002", "4917000002", "IMS"))])
+    matches, cursor = index.search("0010100000000")
+    assert [record_id for _, _, record_id in matches] == ["a", "b"] and cursor is None
+    assert index.search("ims", fields=("dnn",))[0] == [("dnn", "ims", "b")]
+
+    index.apply([("a", "replace", subscriber("001019999999999", "4917000001", "internet")),
+                 ("b", "remove", None)])
+    assert index.search("0010100000000")[0] == []
+    assert index.search("00101999")[0] == [("imsi", "001019999999999", "a")]
+    assert index.stats() == {"imsi": 1, "msisdn": 1, "dnn": 1}
+
+
+def test_search_pages_with_cursor():
+    index = SubscriberSearchIndex(chunk_size=3)
+    index.apply([(str(i), "add", subscriber(f"00101{i:010d}", f"49{i:08d}", "internet"))
+                 for i in range(7)])
+    seen = []
+    cursor = None
+    while True:
+        matches, cursor = index.search("00101", fields=("imsi",), limit=3, cursor=cursor)
+        seen += [record_id for _, _, record_id in matches]
+        if cursor is None:
+            break
+        cursor = decode_search_cursor(encode_search_cursor(cursor))
+    assert seen == [str(i) for i in range(7)]
+
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        decode_search_cursor("not-a-cursor")
+    with pytest.raises(ValueError):
+        decode_search_cursor(encode_search_cursor(("status", "x", "1")))
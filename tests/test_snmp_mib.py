@@ -0,0 +1,68 @@
+"""Tests for the 5G MIB index and the instrumentation the SNMP agent serves"""
+
+import pytest
+from pysnmp.proto import rfc1902, rfc1905
+
+from snmp_mib import (INDEX_NAMES, NF_ENTRY_OID, SCALARS_OID, FiveGMibInstrum,
+                      MibIndexBuilder, build_mib_index, build_nf_table, object_name)
+
+NF_DATA = {
+    "amf": [{"id": "amf-1", "status": "active", "cpuUtilization": 40}],
+    "smf": [{"id": "smf-1", "status": "active", "cpuUtilization": 55, "activeSessions": 7}],
+}
+
+
+def test_encoded_oids_sort_in_oid_order():
+    builder = MibIndexBuilder()
+    builder.add((1, 3, 6, 1, 2), rfc1902.Integer32, 2)
+    builder.add((1, 3, 6, 1, 10), rfc1902.Integer32, 10)
+    builder.add((1, 3, 6, 1, 10, 1), rfc1902.Integer32, 101)
+    with pytest.raises(ValueError):
+        builder.add((1, 3, 6, 1, 9), rfc1902.Integer32, 9)
+    index = builder.build()
+    assert [index.item(i)[0] for i in range(len(index))] == [
+        (1, 3, 6, 1, 2), (1, 3, 6, 1, 10), (1, 3, 6, 1, 10, 1)]
+    assert index.next_index((1, 3, 6, 1, 3)) == 1
+    assert index.next_index((1, 3, 6, 1, 10)) == 2
+
+
+def test_nf_table_is_built_column_by_column():
+    index = build_nf_table(NF_DATA)
+    assert index.summary["rows"] == 2
+    assert index.get(NF_ENTRY_OID + (2, 1))[1] == rfc1902.OctetString('amf')
+    assert index.get(NF_ENTRY_OID + (3, 2))[1] == rfc1902.OctetString('smf-1')
+    # Missing metrics leave holes instead of zeros
+    assert index.get(NF_ENTRY_OID + (7, 1)) is None
+    assert index.get(NF_ENTRY_OID + (7, 2))[1] == rfc1902.Gauge32(7)
+
+
+def test_instrum_get_and_getnext_walk_the_index():
+    mib = FiveGMibInstrum(build_mib_index(NF_DATA, [], []))
+    nf_count = rfc1902.ObjectName(SCALARS_OID + (1, 0))
+    missing = rfc1902.ObjectName(SCALARS_OID + (9, 0))
+    result = mib.readVars([(nf_count, None), (missing, None)])
+    assert result[0][1] == rfc1902.Gauge32(2)
+    assert result[1][1] == rfc1905.noSuchObject
+
+    name, value = mib.readNextVars([(rfc1902.ObjectName(SCALARS_OID), None)])[0]
+    assert tuple(name) == SCALARS_OID + (1, 0)
+    name, value = mib.readNextVars([(rfc1902.ObjectName(NF_ENTRY_OID + (1, 2)), None)])[0]
+    assert tuple(name) == NF_ENTRY_OID + (2, 1)
+    name, value = mib.readNextVars([(rfc1902.ObjectName((1, 3, 6, 1, 9)), None)])[0]
+    assert value == rfc1905.endOfMibView
+
+
+def test_instrum_serves_updated_snapshot():
+    mib = FiveGMibInstrum()
+    oid = rfc1902.ObjectName(NF_ENTRY_OID + (1, 1))
+    assert mib.readVars([(oid, None)])[0][1] == rfc1905.noSuchObject
+    mib.update(build_nf_table(NF_DATA))
+    assert mib.readVars([(oid, None)])[0][1] == rfc1902.Integer32(1)
+
+
+def test_object_names_and_index_columns():
+    assert object_name(SCALARS_OID + (1, 0)) == 'nfCount'
+    assert object_name(NF_ENTRY_OID + (2, 1)) == 'nfType.1'
+    assert object_name(NF_ENTRY_OID + (1, 1)).split('.')[0] in INDEX_NAMES
+    assert 'nfType' not in INDEX_NAMES
+    assert object_name((1, 3, 6, 1, 9)) == '1.3.6.1.9'
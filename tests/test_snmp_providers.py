@@ -0,0 +1,77 @@
+"""Tests for the cached SNMP subtree providers"""
+
+import threading
+
+import pytest
+
+import snmp_providers
+from snmp_mib import NF_ENTRY_OID, build_nf_table
+from snmp_providers import ProviderMib, SubtreeProvider
+
+NF_DATA = {"amf": [{"id": "amf-1", "status": "active"}]}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(snmp_providers.time, 'monotonic', lambda: now[0])
+    return now
+
+
+class Upstream:
+    def __init__(self):
+        self.calls = 0
+        self.up = True
+
+    def load(self):
+        self.calls += 1
+        if not self.up:
+            raise OSError("connection refused")
+        return NF_DATA
+
+
+def make_mib(upstream):
+    provider = SubtreeProvider('nfTable', NF_ENTRY_OID, upstream.load, build_nf_table, ttl=1)
+    return ProviderMib([provider], stale_ttl=0, retry_backoff=5)
+
+
+def retried(mib):
+    """Read once after the backoff and wait for the background retry"""
+    mib.subtree_index('nfTable')
+    for thread in threading.enumerate():
+        if thread.name == 'snmp-retry-nfTable':
+            thread.join(5)
+
+
+def test_failed_refresh_serves_last_snapshot_without_retrying_inline(clock):
+    upstream = Upstream()
+    mib = make_mib(upstream)
+    good = mib.subtree_index('nfTable')
+    assert len(good) > 0
+
+    upstream.up = False
+    clock[0] += 2
+    assert mib.subtree_index('nfTable') is good
+    assert upstream.calls == 2
+    # Backing off: PDUs are answered without touching the upstream
+    for _ in range(10):
+        assert mib.subtree_index('nfTable') is good
+    assert upstream.calls == 2
+
+    clock[0] += 5
+    retried(mib)
+    assert upstream.calls == 3
+    assert mib.subtree_index('nfTable') is good
+
+
+def test_background_retry_restores_fresh_snapshots(clock):
+    upstream = Upstream()
+    upstream.up = False
+    mib = make_mib(upstream)
+    assert len(mib.subtree_index('nfTable')) == 0
+
+    upstream.up = True
+    clock[0] += 5
+    retried(mib)
+    assert len(mib.subtree_index('nfTable')) > 0
+    assert mib.stats()[0]["ageMs"] == 0
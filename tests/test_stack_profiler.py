@@ -0,0 +1,24 @@
+"""Tests for the sampling profiler's duration bounds"""
+
+import pytest
+
+import stack_profiler
+import web_dashboard_server as dashboard
+
+
+@pytest.mark.parametrize('seconds', [float('nan'), float('inf'), -1])
+def test_out_of_range_durations_return_promptly(seconds):
+    profile = stack_profiler.profile_threads(seconds, 10)
+    assert profile.duration < 1
+    # The profiler lock is released for the next profile
+    assert stack_profiler.profile_threads(0, 10).samples == 0
+
+
+@pytest.mark.parametrize('seconds', ['nan', 'inf', '-inf'])
+def test_profile_route_rejects_non_finite_seconds(monkeypatch, seconds):
+    monkeypatch.setattr(dashboard, 'ADMIN_TOKEN', 'secret')
+    monkeypatch.setattr(dashboard.admission, 'client_rate', 0)
+    response = dashboard.app.test_client().get(
+        f'/admin/profile?seconds={seconds}', headers={'Authorization': 'Bearer secret'})
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "seconds must be finite"}
@@ -4,29 +4,582 @@ Python-based web dashboard server for 5G Core Management
 Serves the dashboard and connects to RESTCONF API
 """
 
-from flask import Flask, send_from_directory, jsonify
-import urllib.request
+from flask import (Flask, send_from_directory, jsonify, request, Response, stream_with_context,
+                   g, has_request_context)
+import argparse
+import asyncio
+import hmac
 import json
+import math
+import multiprocessing
+import signal
+import socket
+import sys
+import tempfile
 import threading
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from urllib.parse import parse_qs, urlencode
+from werkzeug.exceptions import HTTPException
+from werkzeug.serving import make_server
+
+from restconf_pool import PoolTimeoutError, RestconfConnectionPool
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreakers, CircuitOpenError
+from admission import (ADMITTED_KEY, CHEAP, HEAVY, AdmissionController, AdmissionMiddleware,
+                       forwarded_client)
+from metrics_exposition import CONTENT_TYPE, ROUTE_KEY, Registry, RequestMetricsMiddleware, method_label
+from stack_profiler import DEFAULT_HZ, ProfilerBusy, profile_threads
+from response_cache import ResponseCache
+from singleflight import SingleFlight
+from event_stream import EventBroadcaster, stream_events
+from dataset_versions import VersionedDataset
+from collection_view import CollectionQuery, QueryError, stream_collection
+from subscriber_store import SubscriberStore
+from response_encoding import BodyEncoder
+from metrics_history import MetricsHistory, match_names
+from metrics_storage import MetricsStorage, downsample
+from nf_metrics import NfMetrics, iter_instances, instance_metrics
+from snmp_collector import SnmpCollector, SnmpTarget
+from snmp_traps import TrapReceiver
+from event_store import EventStore
+from dashboard_shared import SharedSnapshot, shared_request_handler, write_shared_snapshot
+from metrics_aggregate import (AggregationUnavailable, SampleWindows,
+                               percentiles, rates, top_n)
+from search_index import (SEARCH_FIELDS, SubscriberSearchIndex,
+                          encode_search_cursor, decode_search_cursor)
 
 app = Flask(__name__, static_folder='web-dashboard/public', static_url_path='')
 
 # RESTCONF API base URL
 RESTCONF_BASE = "http://localhost:830/restconf/data"
+RESTCONF_TIMEOUT = 2
+
+# Keep-alive connection pool shared by all /api/* routes
+RESTCONF_POOL_SIZE = 16
+RESTCONF_MAX_PER_HOST = 8
+restconf_pool = RestconfConnectionPool(
+    pool_size=RESTCONF_POOL_SIZE,
+    max_per_host=RESTCONF_MAX_PER_HOST,
+    timeout=RESTCONF_TIMEOUT
+)
+
+# Circuit breaker per RESTCONF endpoint: after BREAKER_FAILURES consecutive
+# failures reads fail fast for BREAKER_RESET seconds (doubling, up to
+# BREAKER_MAX_RESET, while probes keep failing). Request timeouts follow the
+# observed latency, between RESTCONF_MIN_TIMEOUT and RESTCONF_TIMEOUT
+BREAKER_FAILURES = 5
+BREAKER_RESET = 5
+BREAKER_MAX_RESET = 60
+RESTCONF_MIN_TIMEOUT = 0.5
+restconf_breakers = CircuitBreakers(
+    failure_threshold=BREAKER_FAILURES,
+    reset_timeout=BREAKER_RESET,
+    max_reset_timeout=BREAKER_MAX_RESET,
+    min_timeout=RESTCONF_MIN_TIMEOUT,
+    max_timeout=RESTCONF_TIMEOUT
+)
+
+# The server's own metrics, exposed for Prometheus at /metrics
+metrics_registry = Registry()
+http_requests_in_flight = metrics_registry.gauge(
+    'dashboard_http_requests_in_flight', 'HTTP requests being served'
+)
+http_request_duration = metrics_registry.histogram(
+    'dashboard_http_request_duration_seconds', 'HTTP request latency by route and status',
+    ('method', 'route', 'status')
+)
+restconf_request_duration = metrics_registry.histogram(
+    'dashboard_restconf_request_duration_seconds', 'RESTCONF request latency by endpoint and outcome',
+    ('endpoint', 'status')
+)
 
-def fetch_restconf_data(endpoint):
-    """Fetch data from RESTCONF API"""
+# Response cache in front of RESTCONF (seconds fresh per endpoint, then served
+# stale for up to CACHE_STALE_TTL while a background refresh runs)
+CACHE_MAX_ENTRIES = 64
+CACHE_STALE_TTL = 30
+CACHE_TTLS = {
+    'network-functions': 5,
+    'subscribers': 10,
+    'sessions': 3,
+    'qos-profiles': 60
+}
+restconf_cache = ResponseCache(
+    max_entries=CACHE_MAX_ENTRIES,
+    default_ttl=5,
+    ttls=CACHE_TTLS,
+    stale_ttl=CACHE_STALE_TTL
+)
+
+# Coalesces concurrent upstream fetches of the same endpoint and query
+restconf_flights = SingleFlight()
+
+def load_restconf_data(endpoint, query=''):
+    """Fetch data from RESTCONF API through its breaker, raising on failure"""
+    url = f"{RESTCONF_BASE}/{endpoint}"
+    if query:
+        url = f"{url}?{query}"
+    breaker = restconf_breakers.get(endpoint)
+    breaker.allow()
+    started = time.monotonic()
     try:
-        url = f"{RESTCONF_BASE}/{endpoint}"
-        req = urllib.request.Request(url)
-        req.add_header('Accept', 'application/json')
-        with urllib.request.urlopen(req, timeout=2) as response:
-            return json.loads(response.read().decode())
+        status, _, body = restconf_pool.request('GET', url, {'Accept': 'application/json'},
+                                                timeout=breaker.timeout())
     except Exception as e:
-        print(f"Error fetching {endpoint}: {e}")
+        record_call(breaker, started, error=e)
+        raise
+    record_call(breaker, started, status)
+    return decode_restconf_body(status, body)
+
+def record_call(breaker, started, status=None, error=None):
+    """Report a RESTCONF call to its breaker (5xx and errors count as failures) and metrics"""
+    elapsed = time.monotonic() - started
+    if isinstance(error, PoolTimeoutError):
+        # Waiting for a local pooled connection says nothing about the upstream
+        breaker.ignore()
+        outcome = 'pool_timeout'
+    elif error is not None:
+        timed_out = isinstance(error, TimeoutError)
+        breaker.failure(elapsed if timed_out else None)
+        outcome = 'timeout' if timed_out else 'error'
+    else:
+        if status >= 500:
+            breaker.failure()
+        else:
+            breaker.success(elapsed)
+        outcome = str(status)
+    restconf_request_duration.observe(elapsed, (breaker.name, outcome))
+
+# Set in worker processes (--workers): RESTCONF sections are read from the
+# collector's published snapshot instead of the network
+shared_snapshot = None
+
+def load_shared_data(endpoint, query=''):
+    """Read a published section and its dataset version, raising if absent"""
+    entry = shared_snapshot.entry(endpoint) if not query else None
+    if entry is None:
+        raise Exception(f"{endpoint} is not in the shared snapshot")
+    version = entry.headers.get('X-Data-Version')
+    return entry.json(), int(version) if version else None
+
+def decode_restconf_body(status, body):
+    """Decode a RESTCONF JSON response body, raising on HTTP errors"""
+    if status >= 400:
+        raise Exception(f"HTTP Error {status}")
+    return json.loads(body.decode())
+
+# Serialized (and compressed) bodies of cached payloads, built once per payload
+body_encoder = BodyEncoder()
+
+def encoded_response(key, data, headers=None):
+    """Serve a payload from its pre-encoded body, honouring ETag and Accept-Encoding"""
+    encoded = body_encoder.encode(key, data)
+    encoding = encoded.negotiate(request.accept_encodings)
+    etag = encoded.variant_etag(encoding)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(encoded.variant(encoding), mimetype='application/json')
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'no-cache'
+    for name, value in (headers or {}).items():
+        response.headers[name] = value
+    return response
+
+# Versioned copies of the large list datasets for ?since=<version> deltas
+versioned_datasets = {
+    'subscribers': VersionedDataset('subscribers', ('imsi', 'supi', 'id')),
+    'sessions': VersionedDataset('sessions', ('sessionId', 'session-id', 'id'))
+}
+
+# Indexed local copy of subscribers and sessions, fed by dataset changes
+subscriber_store = SubscriberStore()
+versioned_datasets['subscribers'].add_listener(subscriber_store.subscribers.apply)
+versioned_datasets['sessions'].add_listener(subscriber_store.sessions.apply)
+
+# Prefix search over IMSI, MSISDN and DNN, updated incrementally
+SEARCH_MAX_LIMIT = 200
+subscriber_search = SubscriberSearchIndex()
+versioned_datasets['subscribers'].add_listener(subscriber_search.apply)
+
+# Last successful read per cache key, served (marked stale) while RESTCONF fails
+last_good = {}
+
+def record_version(endpoint, query, data, version=None):
+    """Keep a successful read as last good data and version tracked datasets"""
+    last_good[f"{endpoint}?{query}" if query else endpoint] = (data, time.time())
+    if not query and endpoint in versioned_datasets:
+        versioned_datasets[endpoint].update(data, version)
+    return data
+
+def load_and_version(endpoint, query=''):
+    """Load data from RESTCONF and record new versions of tracked datasets"""
+    if shared_snapshot is not None:
+        data, version = load_shared_data(endpoint, query)
+        return record_version(endpoint, query, data, version)
+    return record_version(endpoint, query, load_restconf_data(endpoint, query))
+
+def restconf_key(endpoint, params=None):
+    """Return the (cache key, query string) of a RESTCONF read"""
+    query = urlencode(sorted(params.items())) if params else ''
+    return (f"{endpoint}?{query}" if query else endpoint), query
+
+def read_restconf_data(endpoint, params=None):
+    """Fetch data from RESTCONF API (cached, coalesced), raising on failure"""
+    key, query = restconf_key(endpoint, params)
+    return restconf_cache.get(key, lambda: restconf_flights.do(
+        key, lambda: load_and_version(endpoint, query)
+    ))
+
+def versioned_response(endpoint):
+    """Return the full list, a streamed page or a delta for a versioned dataset"""
+    data = fetch_restconf_data(endpoint)
+    dataset = versioned_datasets[endpoint]
+    since = request.args.get('since')
+    if since is None and not request.args:
+        return encoded_response(endpoint, data, {'X-Data-Version': str(dataset.version)})
+    if since is None:
+        try:
+            query = CollectionQuery(request.args)
+        except QueryError as e:
+            return jsonify({"error": str(e)}), 400
+        return Response(
+            stream_collection(data, endpoint, query),
+            mimetype='application/json',
+            headers={'X-Data-Version': str(dataset.version)}
+        )
+    try:
+        since = int(since)
+    except ValueError:
+        return jsonify({"error": "since must be an integer version"}), 400
+    delta = dataset.delta(since)
+    return jsonify(delta if delta is not None else dataset.full())
+
+def fetch_restconf_data(endpoint, params=None):
+    """Fetch data from RESTCONF API (cached, coalesced), or the last good data"""
+    key, _ = restconf_key(endpoint, params)
+    failed = False
+    try:
+        data = read_restconf_data(endpoint, params)
+    except Exception as e:
+        if not isinstance(e, CircuitOpenError):
+            print(f"Error fetching {endpoint}: {e}")
+        failed = True
+        data = last_good.get(key, ({}, None))[0]
+    note_stale(stale_age(endpoint, key, failed))
+    return data
+
+def stale_age(endpoint, key, failed):
+    """Age of the data a read returned if it is stale (inf when there is none), else None"""
+    if not failed and restconf_breakers.get(endpoint).state == CLOSED:
+        return None
+    good = last_good.get(key)
+    return time.time() - good[1] if good is not None else float('inf')
+
+def stale_headers(age):
+    """Staleness marker headers for data of the given age"""
+    if age is None:
         return {}
+    if age == float('inf'):
+        return {'X-Data-Stale': 'unavailable'}
+    return {'X-Data-Stale': 'true', 'X-Data-Age': str(int(age))}
+
+def unavailable_body(endpoint):
+    """503 for a read with neither fresh nor last good data, retried when the breaker allows"""
+    retry_after = max(1, math.ceil(restconf_breakers.get(endpoint).stats().get("retryIn", 1)))
+    body = {"error": f"{endpoint} data is unavailable", "retryAfter": retry_after}
+    return body, retry_after
+
+def note_stale(age):
+    """Mark the current response as carrying stale data"""
+    if age is not None and has_request_context():
+        g.data_age = max(age, g.get('data_age', 0))
+
+# Route template each request thread is serving, for per-route profiles
+route_threads = {}
+
+@app.before_request
+def record_route():
+    """Label request metrics (and profiles) with the route template, not the raw path"""
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    request.environ[ROUTE_KEY] = route
+    route_threads[threading.get_ident()] = route
+
+@app.after_request
+def forget_route_when_sent(response):
+    """Keep the thread's route until the body has been sent (views of cached data return early)"""
+    ident = threading.get_ident()
+    response.call_on_close(lambda: route_threads.pop(ident, None))
+    return response
+
+@app.after_request
+def add_stale_headers(response):
+    response.headers.update(stale_headers(g.get('data_age')))
+    return response
+
+# Sections of /api/snapshot and how long each may take (seconds)
+SNAPSHOT_TIMEOUTS = {
+    'network-functions': 1.5,
+    'subscribers': 2.0,
+    'sessions': 2.0,
+    'qos-profiles': 1.0
+}
+snapshot_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='snapshot')
+
+def build_metrics(nf_data):
+    """Derive metrics from network functions data (simulated)"""
+    amf_count = len(nf_data.get('amf', []))
+    smf_count = len(nf_data.get('smf', []))
+    upf_count = len(nf_data.get('upf', []))
+
+    return {
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "amf": {
+            "activeSessions": amf_count * 500 + 1000,
+            "cpuUtilization": 30 + (amf_count * 5),
+            "memoryUtilization": 50 + (amf_count * 3)
+        },
+        "smf": {
+            "activePduSessions": smf_count * 400 + 900,
+            "cpuUtilization": 25 + (smf_count * 5),
+            "memoryUtilization": 45 + (smf_count * 3)
+        },
+        "upf": {
+            "activeUsers": upf_count * 400 + 800,
+            "throughput": upf_count * 50000000 + 100000000,
+            "packetLoss": round(0.01 + (upf_count * 0.01), 2)
+        }
+    }
+
+def build_snapshot():
+    """Fetch all RESTCONF sections concurrently into one document"""
+    started = time.monotonic()
+    futures = {
+        section: snapshot_executor.submit(read_restconf_data, section)
+        for section in SNAPSHOT_TIMEOUTS
+    }
+    snapshot = {"timestamp": time.strftime('%Y-%m-%dT%H:%M:%S')}
+    errors = {}
+    for section, future in futures.items():
+        remaining = SNAPSHOT_TIMEOUTS[section] - (time.monotonic() - started)
+        try:
+            snapshot[section] = future.result(timeout=max(remaining, 0))
+        except FutureTimeoutError:
+            snapshot[section] = None
+            errors[section] = f"timed out after {SNAPSHOT_TIMEOUTS[section]}s"
+        except Exception as e:
+            snapshot[section] = None
+            errors[section] = str(e)
+    return finish_snapshot(snapshot, errors, started)
+
+def finish_snapshot(snapshot, errors, started):
+    """Add last good data, derived metrics and error details to a snapshot of the sections"""
+    stale = {}
+    for section in SNAPSHOT_TIMEOUTS:
+        age = stale_age(section, section, section in errors)
+        if age is None:
+            continue
+        if section in errors and section in last_good:
+            snapshot[section] = last_good[section][0]
+        stale[section] = round(age, 1) if age != float('inf') else None
+    snapshot["stale"] = stale
+    nf_data = snapshot.get('network-functions')
+    snapshot["metrics"] = build_metrics(nf_data) if nf_data is not None else None
+    snapshot["errors"] = errors
+    snapshot["partial"] = bool(errors)
+    snapshot["durationMs"] = round((time.monotonic() - started) * 1000, 2)
+    return snapshot
+
+# Background workers, started once on first use
+background_threads = {}
+background_threads_lock = threading.Lock()
+
+def start_background_thread(name, target):
+    """Start a named daemon thread unless it is already running"""
+    with background_threads_lock:
+        if name not in background_threads:
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            background_threads[name] = thread
+            thread.start()
+
+# Server-Sent Events: one poller fetches snapshots and fans them out to clients
+STREAM_INTERVAL = 5
+STREAM_HEARTBEAT = 15
+STREAM_CLIENT_QUEUE = 8
+stream_broadcaster = EventBroadcaster(max_queue=STREAM_CLIENT_QUEUE)
+
+def poll_snapshots():
+    """Publish a snapshot every STREAM_INTERVAL while clients are connected"""
+    while True:
+        if stream_broadcaster.subscriber_count():
+            try:
+                stream_broadcaster.publish('snapshot', build_snapshot())
+            except Exception as e:
+                print(f"Error polling snapshot: {e}")
+        time.sleep(STREAM_INTERVAL)
+
+# Metrics history: sampled every HISTORY_INTERVAL into fixed-size ring buffers
+HISTORY_INTERVAL = 1
+HISTORY_MAX_POINTS = 1000
+metrics_history = MetricsHistory()
+history_started = None
+
+# Durable copy of the sampled metrics in mmap'd segment files
+METRICS_STORAGE_DIR = 'data/metrics'
+METRICS_RETENTION = 7 * 86400
+METRICS_COMPACT_INTERVAL = 600
+METRICS_FLUSH_INTERVAL = 60
+metrics_storage = None
+
+# Per-instance NF metrics and load rankings, rebuilt on each collector pass
+NF_DRILLDOWN_HISTORY = 300
+nf_metrics = NfMetrics()
+
+def nf_samples(nf_data):
+    """Flatten network functions data into {series name: value} samples"""
+    samples = {}
+    for nf_type, instance_id, instance in iter_instances(nf_data):
+        for field, value in instance_metrics(instance).items():
+            samples[f"{nf_type}/{instance_id}/{field}"] = value
+    for nf_type, values in build_metrics(nf_data).items():
+        if isinstance(values, dict):
+            for field, value in values.items():
+                samples[f"{nf_type}/{field}"] = value
+    return samples
+
+def open_metrics_storage():
+    """Map the on-disk metrics segments (once)"""
+    global metrics_storage
+    with background_threads_lock:
+        if metrics_storage is None:
+            metrics_storage = MetricsStorage(METRICS_STORAGE_DIR, retention=METRICS_RETENTION)
+            print(f"Metrics storage: {metrics_storage.stats()['segments']} segments "
+                  f"indexed in {metrics_storage.open_ms} ms")
+    return metrics_storage
+
+def collect_metrics():
+    """Sample network function metrics into the history every HISTORY_INTERVAL"""
+    global history_started
+    storage = open_metrics_storage()
+    history_started = time.time()
+    last_compact = last_flush = history_started
+    while True:
+        try:
+            nf_data = read_restconf_data('network-functions')
+            now = time.time()
+            samples = nf_samples(nf_data)
+            metrics_history.record(now, samples)
+            nf_metrics.update(now, nf_data)
+            storage.append_many(now, samples)
+            if now - last_compact >= METRICS_COMPACT_INTERVAL:
+                storage.compact(now)
+                last_compact = now
+            if now - last_flush >= METRICS_FLUSH_INTERVAL:
+                storage.flush()
+                last_flush = now
+        except Exception as e:
+            print(f"Error collecting metrics: {e}")
+        time.sleep(HISTORY_INTERVAL)
+
+# Windowed aggregations (NumPy): one sample column per AGGREGATE_INTERVAL
+AGGREGATE_INTERVAL = 10
+AGGREGATE_SAMPLES = 7 * 86400 // AGGREGATE_INTERVAL
+aggregate_windows = None
+
+def collect_aggregates():
+    """Poll network functions into the aggregation windows every AGGREGATE_INTERVAL"""
+    while True:
+        try:
+            nf_data = read_restconf_data('network-functions')
+            aggregate_windows.append(time.time(), nf_samples(nf_data))
+        except Exception as e:
+            print(f"Error collecting aggregates: {e}")
+        time.sleep(AGGREGATE_INTERVAL)
+
+def start_aggregates():
+    """Create the aggregation windows and start their collector (once)"""
+    global aggregate_windows
+    with background_threads_lock:
+        if aggregate_windows is None:
+            aggregate_windows = SampleWindows(AGGREGATE_SAMPLES)
+    start_background_thread('metrics-aggregator', collect_aggregates)
+
+# SNMP collector: GETBULK-walks the agents listed in SNMP_TARGETS_FILE (a JSON
+# list of "host:port" strings or target objects) into the metrics pipeline
+SNMP_TARGETS_FILE = 'snmp_targets.json'
+SNMP_POLL_INTERVAL = 10
+snmp_collector = None
+
+def record_samples(timestamp, samples):
+    """Add a batch of externally collected samples to the history and storage"""
+    metrics_history.record(timestamp, samples)
+    open_metrics_storage().append_many(timestamp, samples)
+
+def load_snmp_targets():
+    """Read the SNMP targets file; no file means no targets"""
+    if not os.path.exists(SNMP_TARGETS_FILE):
+        return []
+    with open(SNMP_TARGETS_FILE) as f:
+        return [SnmpTarget.parse(spec) for spec in json.load(f)]
+
+def run_snmp_collector():
+    asyncio.run(snmp_collector.run(SNMP_POLL_INTERVAL))
+
+def start_snmp_collector():
+    """Create the SNMP collector and start polling (once), if targets are configured"""
+    global snmp_collector
+    targets = load_snmp_targets()
+    if not targets:
+        return
+    with background_threads_lock:
+        if snmp_collector is None:
+            snmp_collector = SnmpCollector(targets, on_batch=record_samples)
+    print(f"SNMP collector: {len(targets)} targets every {SNMP_POLL_INTERVAL}s")
+    start_background_thread('snmp-collector', run_snmp_collector)
+
+# NF alarms received as SNMP traps/informs, kept in a bounded event store
+TRAP_ADDRESS = ('0.0.0.0', 162)
+TRAP_COMMUNITIES = ('public',)
+EVENTS_CAPACITY = 10000
+EVENTS_MAX_LIMIT = 1000
+event_store = EventStore(capacity=EVENTS_CAPACITY)
+trap_receiver = None
+
+def start_trap_receiver():
+    """Listen for SNMP traps/informs and store them as events (once)"""
+    global trap_receiver
+    with background_threads_lock:
+        if trap_receiver is not None:
+            return
+        receiver = TrapReceiver(TRAP_ADDRESS, on_batch=event_store.append_many,
+                                communities=TRAP_COMMUNITIES)
+        receiver.start()
+        trap_receiver = receiver
+    print(f"SNMP trap receiver: {receiver.address[0]}:{receiver.address[1]}")
+
+def json_number(value):
+    """Convert a NumPy scalar to a JSON-safe float (NaN/inf become None)"""
+    value = float(value)
+    return value if value == value and value not in (float('inf'), float('-inf')) else None
+
+def query_metrics_history(patterns, start, end, step):
+    """Query in-memory history, filling time before this process started from disk"""
+    series = metrics_history.query(patterns, start, end, step)
+    if history_started is None or metrics_storage is None or start >= history_started:
+        return series
+    disk_end = min(end, history_started)
+    for name in match_names(metrics_storage.names(), patterns):
+        entry = series.get(name, {"step": step, "points": []})
+        disk_points = downsample(metrics_storage.query(name, start, disk_end), entry["step"])
+        if not disk_points:
+            continue
+        series[name] = entry
+        memory_points = [p for p in entry["points"] if p[0] > disk_points[-1][0]]
+        entry["points"] = disk_points + memory_points
+    return series
 
 @app.route('/')
 def index():
@@ -37,25 +590,101 @@ def index():
 def get_network_functions():
     """Get network functions from RESTCONF API"""
     data = fetch_restconf_data('network-functions')
-    return jsonify(data)
+    return encoded_response('network-functions', data)
 
 @app.route('/api/subscribers')
 def get_subscribers():
-    """Get subscribers from RESTCONF API"""
-    data = fetch_restconf_data('subscribers')
-    return jsonify(data)
+    """Get subscribers from RESTCONF API (?since=<version> for deltas)"""
+    return versioned_response('subscribers')
+
+def store_query_response(endpoint, table, filter_names):
+    """Serve a filtered query from the indexed store"""
+    fetch_restconf_data(endpoint)
+    filters = {name: request.args[name] for name in filter_names if request.args.get(name)}
+    limit = request.args.get('limit', type=int)
+    if limit is not None and limit < 1:
+        return jsonify({"error": "limit must be at least 1"}), 400
+    records, total = table.query(filters, limit)
+    return jsonify({
+        endpoint: [record.to_dict() for record in records],
+        "total": total
+    })
+
+@app.route('/api/subscribers/query')
+def query_subscribers():
+    """Filter subscribers by status, snssai or servingNf"""
+    return store_query_response('subscribers', subscriber_store.subscribers,
+                                ('status', 'snssai', 'servingNf'))
+
+@app.route('/api/subscribers/search')
+def search_subscribers():
+    """Prefix search subscribers by IMSI, MSISDN or DNN"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "q is required"}), 400
+    field = request.args.get('field')
+    if field is not None and field not in SEARCH_FIELDS:
+        return jsonify({"error": f"field must be one of {', '.join(SEARCH_FIELDS)}"}), 400
+    limit = max(1, min(request.args.get('limit', 20, type=int), SEARCH_MAX_LIMIT))
+    cursor = request.args.get('cursor')
+    try:
+        cursor = decode_search_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    fetch_restconf_data('subscribers')
+    matches, next_cursor = subscriber_search.search(
+        query, (field,) if field else SEARCH_FIELDS, limit, cursor
+    )
+    results = []
+    for match_field, term, record_id in matches:
+        record = subscriber_store.subscribers.get(record_id)
+        results.append({
+            "field": match_field,
+            "match": term,
+            "subscriber": record.to_dict() if record is not None else {"imsi": record_id}
+        })
+    return jsonify({
+        "results": results,
+        "nextCursor": encode_search_cursor(next_cursor) if next_cursor else None
+    })
+
+@app.route('/api/subscribers/<imsi>')
+def get_subscriber(imsi):
+    """Get one subscriber by IMSI or SUPI"""
+    fetch_restconf_data('subscribers')
+    record = subscriber_store.subscribers.get(imsi)
+    if record is None and imsi.startswith('imsi-'):
+        record = subscriber_store.subscribers.get(imsi[len('imsi-'):])
+    if record is None:
+        return jsonify({"error": f"Subscriber {imsi} not found"}), 404
+    return jsonify(record.to_dict())
 
 @app.route('/api/sessions')
 def get_sessions():
-    """Get sessions from RESTCONF API"""
-    data = fetch_restconf_data('sessions')
-    return jsonify(data)
+    """Get sessions from RESTCONF API (?since=<version> for deltas)"""
+    return versioned_response('sessions')
+
+@app.route('/api/sessions/query')
+def query_sessions():
+    """Filter sessions by status, snssai, servingNf or imsi"""
+    return store_query_response('sessions', subscriber_store.sessions,
+                                ('status', 'snssai', 'servingNf', 'imsi'))
+
+@app.route('/api/sessions/<session_id>')
+def get_session(session_id):
+    """Get one session by session ID"""
+    fetch_restconf_data('sessions')
+    record = subscriber_store.sessions.get(session_id)
+    if record is None:
+        return jsonify({"error": f"Session {session_id} not found"}), 404
+    return jsonify(record.to_dict())
 
 @app.route('/api/qos-profiles')
 def get_qos_profiles():
     """Get QoS profiles from RESTCONF API"""
     data = fetch_restconf_data('qos-profiles')
-    return jsonify(data)
+    return encoded_response('qos-profiles', data)
 
 @app.route('/api/metrics')
 def get_metrics():
@@ -63,41 +692,516 @@ def get_metrics():
     # Simulate metrics based on network functions
     try:
         nf_data = fetch_restconf_data('network-functions')
-        amf_count = len(nf_data.get('amf', []))
-        smf_count = len(nf_data.get('smf', []))
-        upf_count = len(nf_data.get('upf', []))
-        
-        metrics = {
-            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
-            "amf": {
-                "activeSessions": amf_count * 500 + 1000,
-                "cpuUtilization": 30 + (amf_count * 5),
-                "memoryUtilization": 50 + (amf_count * 3)
-            },
-            "smf": {
-                "activePduSessions": smf_count * 400 + 900,
-                "cpuUtilization": 25 + (smf_count * 5),
-                "memoryUtilization": 45 + (smf_count * 3)
-            },
-            "upf": {
-                "activeUsers": upf_count * 400 + 800,
-                "throughput": upf_count * 50000000 + 100000000,
-                "packetLoss": round(0.01 + (upf_count * 0.01), 2)
-            }
-        }
-        return jsonify(metrics)
+        if g.get('data_age') == float('inf'):
+            # Nothing to derive metrics from: don't make them up from an empty list
+            body, retry_after = unavailable_body('network-functions')
+            return jsonify(body), 503, {'Retry-After': str(retry_after)}
+        return jsonify(build_metrics(nf_data))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/metrics/history')
+def get_metrics_history():
+    """Get metric series history (?series=upf/*/throughput&from=&to=&step=)"""
+    start_background_thread('metrics-collector', collect_metrics)
+    patterns = [p for p in request.args.get('series', '').split(',') if p]
+    try:
+        end = float(request.args.get('to', time.time()))
+        start = float(request.args.get('from', end - 3600))
+        step = request.args.get('step')
+        step = float(step) if step else max(1.0, (end - start) / HISTORY_MAX_POINTS)
+    except ValueError:
+        return jsonify({"error": "from, to and step must be numbers (epoch seconds)"}), 400
+    if not all(math.isfinite(value) for value in (start, end, step)):
+        return jsonify({"error": "from, to and step must be finite"}), 400
+    if start > end or step <= 0:
+        return jsonify({"error": "from must not be after to, and step must be positive"}), 400
+    return jsonify({
+        "from": start,
+        "to": end,
+        "series": query_metrics_history(patterns, start, end, step)
+    })
+
+@app.route('/api/metrics/aggregate')
+def get_metrics_aggregate():
+    """Aggregate metric series over a window (?op=percentiles|rate|topn&series=&window=)"""
+    try:
+        start_aggregates()
+    except AggregationUnavailable as e:
+        return jsonify({"error": str(e)}), 503
+
+    op = request.args.get('op', 'percentiles')
+    patterns = [p for p in request.args.get('series', '').split(',') if p]
+    try:
+        window = float(request.args.get('window', 3600))
+        q = [float(p) for p in request.args.get('q', '50,95,99').split(',')]
+        n = int(request.args.get('n', 10))
+    except ValueError:
+        return jsonify({"error": "window, q and n must be numbers"}), 400
+    by = request.args.get('by', 'avg')
+    if op not in ('percentiles', 'rate', 'topn') or by not in ('avg', 'max', 'last'):
+        return jsonify({"error": "op must be percentiles, rate or topn; by must be avg, max or last"}), 400
+    if not all(math.isfinite(value) for value in [window] + q):
+        return jsonify({"error": "window and q must be finite"}), 400
+    if window <= 0 or n < 1 or any(p < 0 or p > 100 for p in q):
+        return jsonify({"error": "window and n must be positive, q within 0-100"}), 400
+
+    names, times, block = aggregate_windows.window(patterns, window)
+    result = {"op": op, "window": window, "samples": int(block.shape[1]) if block.ndim == 2 else 0}
+    if op == 'percentiles':
+        values = percentiles(block, q)
+        result["series"] = {
+            name: {f"p{p:g}": json_number(v) for p, v in zip(q, row)}
+            for name, row in zip(names, values)
+        }
+    elif op == 'rate':
+        result["series"] = {name: json_number(v) for name, v in zip(names, rates(times, block))}
+    else:
+        result["by"] = by
+        result["top"] = [
+            {"series": name, "score": json_number(score)}
+            for name, score in top_n(names, times, block, n, by)
+        ]
+    return jsonify(result)
+
+@app.route('/api/metrics/<nf_type>')
+def get_nf_group_metrics(nf_type):
+    """Get per-instance metrics of one NF type (?sort=load&order=desc&limit=)"""
+    start_background_thread('metrics-collector', collect_metrics)
+    if nf_metrics.updated is None:
+        nf_metrics.update(time.time(), fetch_restconf_data('network-functions'))
+    sort = request.args.get('sort', 'load')
+    order = request.args.get('order', 'desc')
+    limit = request.args.get('limit', type=int)
+    if limit is not None and limit < 1:
+        return jsonify({"error": "limit must be at least 1"}), 400
+    try:
+        instances = nf_metrics.group(nf_type, sort, order != 'asc', limit)
+    except KeyError:
+        return jsonify({"error": f"Unknown sort field {sort}"}), 400
+    if instances is None:
+        return jsonify({"error": f"Unknown NF type {nf_type}", "types": nf_metrics.types()}), 404
+    return jsonify({
+        "type": nf_type,
+        "updated": nf_metrics.updated,
+        "sort": sort,
+        "order": order,
+        "instances": instances
+    })
+
+@app.route('/api/metrics/<nf_type>/<instance_id>')
+def get_nf_instance_metrics(nf_type, instance_id):
+    """Get metrics, load rank and recent history of one NF instance"""
+    start_background_thread('metrics-collector', collect_metrics)
+    if nf_metrics.updated is None:
+        nf_metrics.update(time.time(), fetch_restconf_data('network-functions'))
+    record = nf_metrics.instance(nf_type, instance_id)
+    if record is None:
+        return jsonify({"error": f"Unknown instance {nf_type}/{instance_id}"}), 404
+    now = time.time()
+    history = metrics_history.query([f"{nf_type}/{instance_id}/*"], now - NF_DRILLDOWN_HISTORY, now, 1)
+    return jsonify(dict(record, updated=nf_metrics.updated, history={
+        name.rsplit('/', 1)[-1]: series for name, series in history.items()
+    }))
+
+@app.route('/api/events')
+def get_events():
+    """Get NF events (SNMP traps/informs), optionally after an event id"""
+    try:
+        since = request.args.get('since')
+        since = int(since) if since is not None else None
+        limit = max(1, min(int(request.args.get('limit', 100)), EVENTS_MAX_LIMIT))
+    except ValueError:
+        return jsonify({"error": "since and limit must be integers"}), 400
+    return jsonify(event_store.query(since, limit, request.args.get('name'),
+                                     request.args.get('source')))
+
+@app.route('/api/snapshot')
+def get_snapshot():
+    """Get all dashboard data and derived metrics in one document"""
+    return jsonify(build_snapshot())
+
+@app.route('/api/stream')
+def get_stream():
+    """Stream dashboard snapshots as Server-Sent Events"""
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('lastEventId'))
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    start_background_thread('stream-poller', poll_snapshots)
+    subscriber = stream_broadcaster.subscribe(last_event_id)
+    return Response(
+        stream_with_context(stream_events(stream_broadcaster, subscriber, STREAM_HEARTBEAT)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+# Admission control on /api/*: per-client token buckets (heavy routes cost
+# more tokens) and a global in-flight limit, of which heavy routes (full list
+# dumps, snapshots, history queries) may use only ADMISSION_HEAVY_LIMIT
+ADMISSION_MAX_CONCURRENT = 64
+ADMISSION_HEAVY_LIMIT = 16
+ADMISSION_CLIENT_RATE = 10
+ADMISSION_CLIENT_BURST = 30
+ADMISSION_COSTS = {CHEAP: 1, HEAVY: 5}
+ADMISSION_MAX_CLIENTS = 10000
+ADMISSION_EXEMPT = ('/api/stream', '/api/stats')
+HEAVY_ROUTES = (
+    '/api/subscribers', '/api/sessions', '/api/subscribers/query', '/api/sessions/query',
+    '/api/snapshot', '/api/metrics/history', '/api/metrics/aggregate'
+)
+# Reverse proxies whose X-Forwarded-For header names the real client
+TRUSTED_PROXIES = ()
+admission = AdmissionController(
+    max_concurrent=ADMISSION_MAX_CONCURRENT,
+    heavy_limit=ADMISSION_HEAVY_LIMIT,
+    client_rate=ADMISSION_CLIENT_RATE,
+    client_burst=ADMISSION_CLIENT_BURST,
+    costs=ADMISSION_COSTS,
+    max_clients=ADMISSION_MAX_CLIENTS
+)
+
+def admission_class(path, query=''):
+    """CHEAP or HEAVY for an admission-controlled path, None for the others"""
+    if not path.startswith('/api/') or path in ADMISSION_EXEMPT:
+        return None
+    if path in HEAVY_ROUTES:
+        # ?since=<version> deltas of the list datasets are small; a since the
+        # dataset cannot diff from gets the full list, so it stays heavy
+        dataset = versioned_datasets.get(path[len('/api/'):])
+        since = parse_qs(query).get('since')
+        if dataset is not None and since:
+            try:
+                return CHEAP if dataset.can_delta(int(since[0])) else HEAVY
+            except ValueError:
+                return CHEAP
+        return HEAVY
+    return CHEAP
+
+def client_address(environ):
+    """Client address, from X-Forwarded-For behind a trusted proxy"""
+    return forwarded_client(environ.get('REMOTE_ADDR', ''), environ.get('HTTP_X_FORWARDED_FOR'),
+                            TRUSTED_PROXIES)
+
+app.wsgi_app = AdmissionMiddleware(app.wsgi_app, admission, admission_class, client_address)
+
+def route_template(path, method='GET'):
+    """Route template of a path, for requests answered before reaching a view"""
+    try:
+        rule, _ = app.url_map.bind('localhost').match(path, method, return_rule=True)
+        return rule.rule
+    except HTTPException:
+        return 'unmatched'
+
+CIRCUIT_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+ADMISSION_OUTCOMES = {'admitted': 'admitted', 'rateLimited': 'rate_limited', 'shed': 'shed'}
+
+def collect_server_metrics():
+    """Scrape-time metrics from the breakers and admission control"""
+    breakers = restconf_breakers.stats()
+    routes = admission.stats()["routes"]
+    return [
+        ('dashboard_restconf_circuit_state', 'gauge',
+         'RESTCONF breaker state (0 closed, 1 half-open, 2 open)', ('endpoint',),
+         [((name, ), CIRCUIT_STATE_VALUES[b["state"]]) for name, b in breakers.items()]),
+        ('dashboard_restconf_circuit_rejected_total', 'counter',
+         'RESTCONF reads failed fast by an open breaker', ('endpoint',),
+         [((name, ), b["rejected"]) for name, b in breakers.items()]),
+        ('dashboard_restconf_timeout_seconds', 'gauge',
+         'Adaptive RESTCONF request timeout', ('endpoint',),
+         [((name, ), b["timeout"]) for name, b in breakers.items()]),
+        ('dashboard_admission_requests_total', 'counter',
+         'Admission decisions on /api/* by route class', ('class', 'outcome'),
+         [((route_class, ADMISSION_OUTCOMES[outcome]), count)
+          for route_class, counts in routes.items() for outcome, count in counts.items()]),
+    ]
+
+metrics_registry.add_collector(collect_server_metrics)
+app.wsgi_app = RequestMetricsMiddleware(
+    app.wsgi_app, http_request_duration, http_requests_in_flight,
+    lambda environ: route_template(environ.get('PATH_INFO', ''), environ.get('REQUEST_METHOD', 'GET'))
+)
+
+@app.route('/metrics')
+def get_prometheus_metrics():
+    """Prometheus exposition of request, RESTCONF and admission metrics"""
+    return Response(metrics_registry.exposition(), content_type=CONTENT_TYPE)
+
+# Sampling profiler at /admin/profile, enabled by setting an admin token;
+# X-Profile-Route limits a profile to the threads serving one route
+ADMIN_TOKEN = os.environ.get('DASHBOARD_ADMIN_TOKEN')
+PROFILE_ROUTE_HEADER = 'X-Profile-Route'
+PROFILE_DEFAULT_SECONDS = 10
+PROFILE_FORMATS = ('collapsed', 'speedscope')
+
+def admin_authorized():
+    """True if the request carries the admin token as a bearer token"""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+@app.route('/admin/profile')
+def profile_server():
+    """Sample all threads' stacks (or one route's) for ?seconds=N and return a flamegraph profile"""
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Not found"}), 404
+    if not admin_authorized():
+        return jsonify({"error": "Admin token required"}), 401, {'WWW-Authenticate': 'Bearer'}
+    seconds = request.args.get('seconds', PROFILE_DEFAULT_SECONDS, type=float)
+    hz = request.args.get('hz', DEFAULT_HZ, type=int)
+    output = request.args.get('format', 'collapsed')
+    if not math.isfinite(seconds):
+        return jsonify({"error": "seconds must be finite"}), 400
+    if output not in PROFILE_FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(PROFILE_FORMATS)}"}), 400
+    route = request.headers.get(PROFILE_ROUTE_HEADER)
+    threads = None
+    if route:
+        route = route if route in {rule.rule for rule in app.url_map.iter_rules()} else route_template(route)
+        if route == 'unmatched':
+            return jsonify({"error": f"{PROFILE_ROUTE_HEADER} matches no route"}), 400
+        threads = lambda: {ident for ident, serving in list(route_threads.items()) if serving == route}
+    try:
+        profile = profile_threads(seconds, hz, threads)
+    except ProfilerBusy as e:
+        return jsonify({"error": str(e)}), 409
+    headers = {f'X-Profile-{name.title()}': value for name, value in profile.stats().items()}
+    if route:
+        headers[PROFILE_ROUTE_HEADER] = route
+    if output == 'speedscope':
+        return Response(json.dumps(profile.speedscope(f"dashboard {route or 'all threads'}")),
+                        mimetype='application/json', headers=headers)
+    return Response(profile.collapsed(), mimetype='text/plain', headers=headers)
+
+def server_stats():
+    """Internal statistics of every dashboard component"""
+    return {
+        "pool": restconf_pool.stats(),
+        "cache": restconf_cache.stats(),
+        "singleflight": restconf_flights.stats(),
+        "stream": stream_broadcaster.stats(),
+        "datasets": {name: dataset.stats() for name, dataset in versioned_datasets.items()},
+        "store": subscriber_store.stats(),
+        "search": subscriber_search.stats(),
+        "encoding": body_encoder.stats(),
+        "history": metrics_history.stats(),
+        "storage": metrics_storage.stats() if metrics_storage is not None else None,
+        "aggregates": aggregate_windows.stats() if aggregate_windows is not None else None,
+        "snmp": snmp_collector.stats() if snmp_collector is not None else None,
+        "events": event_store.stats(),
+        "traps": trap_receiver.stats() if trap_receiver is not None else None,
+        "shared": shared_snapshot.stats() if shared_snapshot is not None else None,
+        "breakers": restconf_breakers.stats(),
+        "admission": admission.stats()
+    }
+
+@app.route('/api/stats')
+def get_stats():
+    """Get internal dashboard server statistics"""
+    return jsonify(server_stats())
+
+def start_services():
+    """Start the background collectors and receivers of a serving process"""
+    start_background_thread('metrics-collector', collect_metrics)
+    try:
+        start_aggregates()
+    except AggregationUnavailable as e:
+        print(f"Metric aggregation disabled: {e}")
+    try:
+        start_snmp_collector()
+    except (OSError, ValueError) as e:
+        print(f"SNMP collector disabled: {e}")
+    try:
+        start_trap_receiver()
+    except OSError as e:
+        print(f"SNMP trap receiver disabled: {e}")
+
+# Multi-process serving (--workers): one collector process owns RESTCONF and the
+# background services and publishes the served bodies to a shared file; the
+# pre-forked workers send them from the page cache and forward the routes
+# backed by collector-only state (history, aggregates, drilldowns, events)
+SHARED_SNAPSHOT_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+SHARED_PUBLISH_INTERVAL = 1
+SHARED_ROUTES = {
+    '/api/network-functions': 'network-functions',
+    '/api/subscribers': 'subscribers',
+    '/api/sessions': 'sessions',
+    '/api/qos-profiles': 'qos-profiles',
+    '/api/metrics': 'metrics',
+    '/api/snapshot': 'snapshot'
+}
+COLLECTOR_ROUTES = ('/api/metrics/', '/api/events')
+COLLECTOR_HOST = '127.0.0.1'
+SERVER_BACKLOG = 1024
+collector_url = None
+
+def forward_to_collector():
+    """Proxy a worker request for collector-only state to the collector process"""
+    if collector_url is None or not request.path.startswith(COLLECTOR_ROUTES):
+        return None
+    try:
+        status, headers, body = restconf_pool.request(
+            'GET', f"{collector_url}{request.full_path}", {'Accept': 'application/json'}
+        )
+    except Exception as e:
+        return jsonify({"error": f"Collector unavailable: {e}"}), 502
+    return Response(body, status=status, content_type=headers.get('Content-Type'))
+
+def shared_entries(sections, errors, snapshot_entry, started):
+    """Encode the bodies workers serve, with last good data for failed sections"""
+    entries = {}
+    served = {}
+    for endpoint in SNAPSHOT_TIMEOUTS:
+        data = sections.get(endpoint)
+        if endpoint in errors and endpoint in last_good:
+            data = last_good[endpoint][0]
+        if data is None:
+            continue
+        served[endpoint] = data
+        headers = stale_headers(stale_age(endpoint, endpoint, endpoint in errors))
+        dataset = versioned_datasets.get(endpoint)
+        if dataset is not None:
+            headers['X-Data-Version'] = str(dataset.version)
+        entries[endpoint] = (body_encoder.encode(endpoint, data), headers)
+    nf_data = served.get('network-functions')
+    if nf_data is not None:
+        entries['metrics'] = (body_encoder.encode('metrics', build_metrics(nf_data)),
+                              entries['network-functions'][1])
+    if snapshot_entry is None:
+        snapshot = {"timestamp": time.strftime('%Y-%m-%dT%H:%M:%S')}
+        snapshot.update((section, sections.get(section)) for section in SNAPSHOT_TIMEOUTS)
+        snapshot_entry = (body_encoder.encode('snapshot', finish_snapshot(snapshot, errors, started)), {})
+    entries['snapshot'] = snapshot_entry
+    return entries
+
+def publish_snapshot(path, interval=SHARED_PUBLISH_INTERVAL):
+    """Collector loop: publish the served bodies whenever one of them changes"""
+    published = {}
+    last_sections = None
+    while True:
+        started = time.monotonic()
+        sections = {}
+        errors = {}
+        for endpoint in SNAPSHOT_TIMEOUTS:
+            try:
+                sections[endpoint] = read_restconf_data(endpoint)
+            except Exception as e:
+                errors[endpoint] = str(e)
+        # The snapshot is the largest body: rebuild it only when a section changed
+        # (or while sections are stale, so their age stays current)
+        rebuild = last_sections is None or errors or any(
+            sections.get(e) is not last_sections.get(e) for e in SNAPSHOT_TIMEOUTS
+        ) or any(restconf_breakers.get(e).state != CLOSED for e in SNAPSHOT_TIMEOUTS)
+        entries = shared_entries(sections, errors, None if rebuild else published.get('snapshot'), started)
+        last_sections = sections
+        if {name: (entry[0].etag, entry[1]) for name, entry in entries.items()} != \
+                {name: (entry[0].etag, entry[1]) for name, entry in published.items()}:
+            try:
+                write_shared_snapshot(path, entries)
+                published = entries
+            except OSError as e:
+                print(f"Error publishing {path}: {e}")
+        time.sleep(interval)
+
+def admitted_app(environ, start_response):
+    """The app for requests a worker already admitted (collector's loopback server)"""
+    environ[ADMITTED_KEY] = True
+    return app(environ, start_response)
+
+def watch_collector(server, collector):
+    """Stop a worker's server once its collector process is gone"""
+    while os.getppid() == collector:
+        time.sleep(1)
+    server.shutdown()
+
+def record_shared_response(method, path, status, seconds):
+    http_request_duration.observe(seconds, (method_label(method), path, str(status)))
+
+def run_worker(listener, path, collector_port):
+    """Worker process: serve the shared snapshot on the inherited listening socket"""
+    global shared_snapshot, collector_url
+    collector = os.getppid()
+    shared_snapshot = SharedSnapshot(
+        path, on_change=lambda names: [restconf_cache.invalidate(name) for name in names]
+    )
+    collector_url = f"http://{COLLECTOR_HOST}:{collector_port}"
+    app.before_request(forward_to_collector)
+    host, port = listener.getsockname()[:2]
+    server = make_server(host, port, app, threaded=True,
+                         request_handler=shared_request_handler(shared_snapshot, SHARED_ROUTES,
+                                                                on_response=record_shared_response),
+                         fd=listener.fileno())
+    start_background_thread('collector-watch', lambda: watch_collector(server, collector))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+def run_workers(count, host, port):
+    """Collector process plus count pre-forked workers sharing one listening socket"""
+    path = os.path.join(SHARED_SNAPSHOT_DIR, f"5g-dashboard-{port}")
+    listener = socket.create_server((host, port), backlog=SERVER_BACKLOG)
+    # Idle workers poll the shared socket; the ones that lose an accept race move on
+    listener.setblocking(False)
+    internal = socket.create_server((COLLECTOR_HOST, 0))
+    collector_port = internal.getsockname()[1]
+    # Fork before any thread starts: the workers get a single-threaded copy
+    workers = [
+        multiprocessing.Process(target=run_worker, args=(listener, path, collector_port),
+                                name=f"dashboard-worker-{i}", daemon=True)
+        for i in range(count)
+    ]
+    for worker in workers:
+        worker.start()
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"{count} workers on {host}:{port} (shared snapshot {path}, "
+          f"collector on {COLLECTOR_HOST}:{collector_port})")
+    try:
+        start_services()
+        server = make_server(COLLECTOR_HOST, collector_port, admitted_app, threaded=True,
+                             fd=internal.fileno())
+        start_background_thread('collector-server', server.serve_forever)
+        publish_snapshot(path)
+    except (KeyboardInterrupt, SystemExit):
+        print("\nShutting down...")
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.join()
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='5G core web dashboard server')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=3000)
+    parser.add_argument('--workers', type=int, default=0,
+                        help='serve from N pre-forked processes fed by one collector process')
+    parser.add_argument('--restconf', default=RESTCONF_BASE, help='RESTCONF data URL')
+    parser.add_argument('--max-concurrent', type=int, default=ADMISSION_MAX_CONCURRENT,
+                        help='in-flight /api/* requests per process (0 = unlimited)')
+    parser.add_argument('--client-rate', type=float, default=ADMISSION_CLIENT_RATE,
+                        help='request tokens per second per client (0 = unlimited)')
+    parser.add_argument('--admin-token', default=ADMIN_TOKEN,
+                        help='bearer token enabling /admin/profile (default $DASHBOARD_ADMIN_TOKEN)')
+    args = parser.parse_args()
+    RESTCONF_BASE = args.restconf
+    ADMIN_TOKEN = args.admin_token
+    admission.max_concurrent = args.max_concurrent
+    admission.client_rate = args.client_rate
+
     print("=" * 60)
     print("5G Core Management - Web Dashboard Server")
     print("=" * 60)
-    print(f"Dashboard: http://localhost:3000")
+    print(f"Dashboard: http://localhost:{args.port}")
     print(f"RESTCONF API: {RESTCONF_BASE}")
     print("=" * 60)
     print("Press Ctrl+C to stop")
     print()
-    
-    app.run(host='0.0.0.0', port=3000, debug=False)
+
+    if args.workers > 0:
+        run_workers(args.workers, args.host, args.port)
+    else:
+        start_services()
+        app.run(host=args.host, port=args.port, debug=False)
 